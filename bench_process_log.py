@@ -0,0 +1,210 @@
+"""
+process_log 基准测试：旧版（逐行改写为 JSON 再 json.loads）与流式解析器对比
+
+用法：python bench_process_log.py [日志目录，默认 example]
+"""
+import os
+import sys
+import csv
+import glob
+import json
+import time
+import tempfile
+import contextlib
+from functools import partial
+
+import process_log
+
+
+# ---------------- 旧版实现（仅用于对比） ----------------
+
+def legacy_process_log_file_radar(log_filename, csv_filename):
+    with open(log_filename, 'r') as log_file, open(csv_filename, 'w', newline='') as csv_file:
+        csv_writer = csv.writer(csv_file)
+        csv_writer.writerow(['timestamp_ns', 'sensor_timestamp_us', 'pipeline_start_timestamp_us', 'pipeline_finish_timestamp_us', 'pipeline_timestamp_us', 'available', 'camera_source', 'track_id', 'location_x', 'location_y', 'location_z'])  # 写入CSV头部
+
+        block = []
+        # within_block = False
+        
+        for line in log_file:
+            if "------------------" in line:
+                # if within_block:
+                block[len(block)-1] = block[len(block)-1][:-1]
+                json_str = '{' + ''.join(block) + '}'
+                try:
+                    json_obj = json.loads(json_str)
+                    # print(json.dumps(json_obj, indent=4))
+                    timestamp = json_obj.get('header',{}).get('stamp', '')
+                    sensor_timestamp = json_obj.get('meta',{}).get('sensor_timestamp_us', '')
+                    pipeline_start_timestamp = json_obj.get('meta',{}).get('pipeline_start_timestamp_us', '')
+                    pipeline_finish_timestamp = json_obj.get('meta',{}).get('pipeline_finish_timestamp_us', '')
+                    pipeline_timestamp = pipeline_finish_timestamp - pipeline_start_timestamp
+
+                    lidar_perception_objects = json_obj.get('lidar_perception_objects', {})
+                    available = lidar_perception_objects.get('available', '')
+
+                    value = json_obj.get('value', '')# not found
+
+                    lidar_perception_object_data = lidar_perception_objects.get('lidar_perception_object_data', {})
+                    if lidar_perception_object_data:
+                        track_id = lidar_perception_object_data.get('track_id', '')
+
+                        location_bv = lidar_perception_object_data.get('position', {})
+                        location_x = location_bv.get('x', '') if isinstance(location_bv, dict) else ''
+                        location_y = location_bv.get('y', '') if isinstance(location_bv, dict) else ''
+                        location_z = location_bv.get('z', '') if isinstance(location_bv, dict) else ''
+                    else:
+                        track_id = location_x = location_y = location_z = ''
+                    # print("available: ", available, "camera_source: ", value, "track_id: ", track_id, "location_x: ", location_x)
+
+                    csv_writer.writerow([timestamp, sensor_timestamp, pipeline_start_timestamp, pipeline_finish_timestamp, pipeline_timestamp, available, value, track_id, location_x, location_y, location_z])
+                except json.JSONDecodeError:
+                    print(f"Failed to decode JSON: {json_str}")
+                block = []
+                # within_block = not within_block
+            else:
+                line = line.strip()
+                if '{' in line:
+                    parts = line.split('{')
+                    parts[0] = '"' + parts[0].strip() + '":{'
+                    line = ''.join(parts)
+                elif ':' in line:
+                    parts = line.split(':', 1)
+                    parts[0] = '"' + parts[0].strip() + '":'
+                    line = ''.join(parts)
+
+                if not line.strip().endswith('{'):
+                    line += ','
+
+                if line.strip().startswith('}'):
+                    block[len(block)-1] = block[len(block)-1][:-1]
+                
+                block.append(line)
+
+def legacy_process_log_file_vision(log_filename, csv_filename, object_name):
+    with open(log_filename, 'r') as log_file, open(csv_filename, 'w', newline='') as csv_file:
+        csv_writer = csv.writer(csv_file)
+        csv_writer.writerow(['timestamp_ns', 'sensor_timestamp_us', 'pipeline_start_timestamp_us', 'pipeline_finish_timestamp_us', 'pipeline_timestamp_us', 'available', 'camera_source', 'track_id', 'location_x'])  # 写入CSV头部
+
+        block = []
+        # within_block = False
+        
+        for line in log_file:
+            if "------------------" in line:
+                # if within_block:
+                block[len(block)-1] = block[len(block)-1][:-1]
+                json_str = '{' + ''.join(block) + '}'
+                try:
+                    json_obj = json.loads(json_str)
+                    # print(json.dumps(json_obj, indent=4))
+                    timestamp = json_obj.get('header',{}).get('stamp', '')
+                    sensor_timestamp = json_obj.get('meta',{}).get('sensor_timestamp_us', '')
+                    pipeline_start_timestamp = json_obj.get('meta',{}).get('pipeline_start_timestamp_us', '')
+                    pipeline_finish_timestamp = json_obj.get('meta',{}).get('pipeline_finish_timestamp_us', '')
+                    pipeline_timestamp = pipeline_finish_timestamp - pipeline_start_timestamp
+
+                    available = json_obj.get('available', '')
+                    objects = json_obj.get(object_name, {})
+
+                    if objects:
+                        camera_source = objects.get('camera_source', {})
+                        value = camera_source.get('value', '')
+
+                        track_info = objects.get('track_info', {})
+                        track_id = track_info.get('track_id', '')
+
+                        location_bv = objects.get('location_bv', {})
+                        location_x = location_bv.get('x', '') if isinstance(location_bv, dict) else ''
+                    else:
+                        value = track_id = location_x = ''
+
+                    # print("available: ", available, "camera_source: ", value, "track_id: ", track_id, "location_x: ", location_x)
+
+                    csv_writer.writerow([timestamp, sensor_timestamp, pipeline_start_timestamp, pipeline_finish_timestamp, pipeline_timestamp, available, value, track_id, location_x])
+                except json.JSONDecodeError:
+                    print(f"Failed to decode JSON: {json_str}")
+                block = []
+                # within_block = not within_block
+            else:
+                line = line.strip()
+                if "reserved_infos" in line:
+                    continue
+                if '{' in line:
+                    parts = line.split('{')
+                    parts[0] = '"' + parts[0].strip() + '":{'
+                    line = ''.join(parts)
+                elif ':' in line:
+                    parts = line.split(':', 1)
+                    parts[0] = '"' + parts[0].strip() + '":'
+                    line = ''.join(parts)
+
+                if not line.strip().endswith('{'):
+                    line += ','
+
+                if line.strip().startswith('}'):
+                    block[len(block)-1] = block[len(block)-1][:-1]
+
+                block.append(line)
+
+
+# ---------------- 基准测试 ----------------
+
+def _jobs(log_dir):
+    """根据文件名选择处理函数：(名称, 旧版, 新版, 额外参数)"""
+    jobs = []
+    for log_filename in sorted(glob.glob(os.path.join(log_dir, '*.log'))):
+        name = os.path.basename(log_filename)
+        if name.startswith('radar_object'):
+            jobs.append((log_filename, legacy_process_log_file_radar, partial(process_log.process_log_file_radar, incremental=False), ()))
+        elif name.startswith('vision_aeb_object'):
+            jobs.append((log_filename, legacy_process_log_file_vision, partial(process_log.process_log_file_vision, incremental=False), ('vision_aeb_objects',)))
+        elif name.startswith('vision_object'):
+            jobs.append((log_filename, legacy_process_log_file_vision, partial(process_log.process_log_file_vision, incremental=False), ('objects',)))
+    return jobs
+
+def _timed(func, *args, repeat=3):
+    """返回最快一次的耗时（秒）"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def _read_rows(csv_filename):
+    with open(csv_filename, newline='') as f:
+        return list(csv.reader(f))
+
+def run(log_dir='example'):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print(f"{'log':<36}{'size(MB)':>10}{'legacy(s)':>12}{'stream(s)':>12}{'speedup':>10}  rows")
+        for log_filename, legacy, current, extra in _jobs(log_dir):
+            size_mb = os.path.getsize(log_filename) / 1e6
+            legacy_csv = os.path.join(tmp_dir, 'legacy.csv')
+            current_csv = os.path.join(tmp_dir, 'current.csv')
+
+            try:
+                # 旧版对日志开头的非数据行会打印解码失败信息，这里屏蔽掉
+                with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                    legacy_time = _timed(legacy, log_filename, legacy_csv, *extra)
+                legacy_rows = _read_rows(legacy_csv)
+            except Exception as e:
+                # 旧版遇到不规范的帧会直接抛异常
+                legacy_time = None
+                legacy_rows = None
+                print(f"legacy failed on {log_filename}: {e!r}")
+
+            current_time = _timed(current, log_filename, current_csv, *extra)
+            current_rows = _read_rows(current_csv)
+
+            if legacy_time is None:
+                print(f"{os.path.basename(log_filename):<36}{size_mb:>10.2f}{'-':>12}{current_time:>12.3f}{'-':>10}  {len(current_rows) - 1}")
+                continue
+
+            same = 'same' if legacy_rows == current_rows else f'differ (legacy {len(legacy_rows) - 1})'
+            print(f"{os.path.basename(log_filename):<36}{size_mb:>10.2f}{legacy_time:>12.3f}{current_time:>12.3f}"
+                  f"{legacy_time / current_time:>9.1f}x  {len(current_rows) - 1} {same}")
+
+if __name__ == "__main__":
+    run(sys.argv[1] if len(sys.argv) > 1 else 'example')
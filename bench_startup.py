@@ -0,0 +1,84 @@
+"""
+启动耗时基准：每个模块在新的 python 进程中 import，统计耗时，并检查导入时是否加载了重量级依赖或产生了输出
+
+批处理会启动大量短进程，每个进程都要付一次 import 的代价，因此：
+    pyproj / pandas / matplotlib / pyarrow / pdf2docx 只在真正用到的函数里导入
+    模块导入时不做任何转换、绘图或打印，示例代码放在 if __name__ == "__main__" 下
+
+用法：python bench_startup.py [模块名 ...]，默认测试所有工具模块
+"""
+import os
+import sys
+import json
+import time
+import subprocess
+import statistics
+
+MODULES = [
+    'log_parser', 'table_io', 'log_schema', 'log_checkpoint', 'process_log', 'frame_index', 'latency_analysis',
+    'log_follow', 'plot_render', 'process_figure', 'imu_dsp', 'geodesy', 'coordinates', 'coordinate_conversion',
+    'convert_asc', 'can_log', 'can_signals', 'can_store', 'sensor_sync', 'trajectory', 'pdf2word', 'path_viewer',
+    'insert_obstacle',
+]
+HEAVY_MODULES = ['pyproj', 'pandas', 'matplotlib', 'pyarrow', 'pdf2docx', 'tkinter']
+
+# 子进程中执行：计时 import，并报告已加载的重量级模块
+_PROBE = """
+import sys, time, json, io, contextlib
+start = time.perf_counter()
+output = io.StringIO()
+with contextlib.redirect_stdout(output):
+    import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'import_ms': elapsed * 1000, 'printed': len(output.getvalue()),
+                  'heavy': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def _run(code):
+    """在新进程中运行，返回 (总耗时 ms, 子进程 stdout 最后一行)"""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    elapsed = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()
+        raise RuntimeError(error[-1] if error else f'exit code {result.returncode}')
+    return elapsed, result.stdout.strip().splitlines()[-1] if result.stdout.strip() else ''
+
+
+def measure(module, repeat=5):
+    """
+    :return: {'process_ms': 进程总耗时中位数, 'import_ms': import 耗时中位数, 'printed': 导入时输出的字符数, 'heavy': [...]}
+    """
+    code = _PROBE.format(module=module, heavy=HEAVY_MODULES)
+    process_ms, import_ms = [], []
+    info = None
+    for _ in range(repeat):
+        elapsed, line = _run(code)
+        info = json.loads(line)
+        process_ms.append(elapsed)
+        import_ms.append(info['import_ms'])
+    return {'process_ms': statistics.median(process_ms), 'import_ms': statistics.median(import_ms),
+            'printed': info['printed'], 'heavy': info['heavy']}
+
+
+def run(modules=None, repeat=5):
+    modules = modules or MODULES
+    baseline = statistics.median(_run('pass')[0] for _ in range(repeat))
+    print(f"python 空进程: {baseline:.1f} ms")
+    print(f"{'module':<24}{'process(ms)':>12}{'import(ms)':>12}  heavy / output")
+    for module in modules:
+        try:
+            result = measure(module, repeat)
+        except RuntimeError as e:
+            print(f"{module:<24}{'-':>12}{'-':>12}  import failed: {e}")
+            continue
+        notes = ', '.join(result['heavy'])
+        if result['printed']:
+            notes += f"{', ' if notes else ''}printed {result['printed']} chars at import"
+        print(f"{module:<24}{result['process_ms']:>12.1f}{result['import_ms']:>12.1f}  {notes or '-'}")
+
+
+if __name__ == "__main__":
+    run(sys.argv[1:])
@@ -0,0 +1,267 @@
+"""
+candump 文本日志读取为 CAN 帧数组
+
+     (1745775054.129569)  can0  18FEE61C   [8]  5B 00 00 00 1D FC 00 00
+
+candump 的各字段按固定宽度对齐（ID 右对齐到 8 列），长度相同的行各字段的位置也相同。
+按块把文件映射为 uint8 数组，按换行符切分后把长度相同的行堆成二维字节矩阵，
+时间戳、ID、长度、数据在矩阵上整列转换，不逐行调用 Python；
+不符合该布局的行用 parse_line 逐行解析，仍无法解析的行只计数。
+
+帧以列的形式返回（{列名: ndarray}）：
+    timestamp_us  int64   时间戳（微秒）
+    can_id        uint32  CAN ID
+    extended      bool    扩展帧（ID 超过 3 位十六进制）
+    dlc           uint8   数据长度
+    data          uint8   (N, 8) 数据，不足 8 字节补 0
+只支持经典 CAN（DLC <= 8）。
+"""
+import os
+import numpy as np
+
+MAX_DLC = 8
+BLOCK_SIZE = 64 << 20
+MAX_LINE = 256  # 超过该长度的行不参与整列转换
+ERROR_SAMPLES = 5
+
+# 十六进制字符 -> 数值，非十六进制字符为 255
+_HEX = np.full(256, 255, dtype=np.uint8)
+for _i, _c in enumerate(b'0123456789ABCDEF'):
+    _HEX[_c] = _i
+for _i, _c in enumerate(b'abcdef'):
+    _HEX[_c] = 10 + _i
+_HEX_SPACE = _HEX.copy()
+_HEX_SPACE[ord(' ')] = 0  # 右对齐 ID 左侧的空格按 0 计
+
+SPACE, DIGIT_0 = ord(' '), ord('0')
+ID_WIDTH = 8
+EXTENDED_FLAG = 0x80000000  # 扩展帧 ID 的最高位（DBC 与 can_store 中的约定）
+
+
+def empty_frames(count=0):
+    return {
+        'timestamp_us': np.zeros(count, dtype=np.int64),
+        'can_id': np.zeros(count, dtype=np.uint32),
+        'extended': np.zeros(count, dtype=bool),
+        'dlc': np.zeros(count, dtype=np.uint8),
+        'data': np.zeros((count, MAX_DLC), dtype=np.uint8),
+    }
+
+
+def concat_frames(parts):
+    """按顺序拼接多段帧数组"""
+    if not parts:
+        return empty_frames()
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+
+def select_frames(frames, index):
+    """按布尔掩码或下标取出部分帧"""
+    return {name: column[index] for name, column in frames.items()}
+
+
+def parse_line(line):
+    """
+    逐行解析一帧
+    :param line: bytes
+    :return: (timestamp_us, can_id, extended, dlc, data bytes)；空行和 ; 注释行返回 None，格式错误抛 ValueError
+    """
+    parts = line.split()
+    if not parts or parts[0].startswith(b';'):
+        return None
+    if len(parts) < 4:
+        raise ValueError(f"bad line {line!r}")
+    stamp, _, can_id, length = parts[:4]
+    if stamp[:1] != b'(' or stamp[-1:] != b')' or length[:1] != b'[' or length[-1:] != b']':
+        raise ValueError(f"bad line {line!r}")
+    seconds, _, fraction = stamp[1:-1].partition(b'.')
+    timestamp_us = int(seconds) * 1000000 + int((fraction + b'000000')[:6])
+    dlc = int(length[1:-1])
+    data = bytes.fromhex(b' '.join(parts[4:]).decode())
+    if dlc > MAX_DLC or len(data) != dlc:
+        raise ValueError(f"bad data length {line!r}")
+    return timestamp_us, int(can_id, 16), len(can_id) > 3, dlc, data
+
+
+def _digits(matrix):
+    """
+    (N, W) 的十进制数字字符 -> int64，15 位以内 float64 精确，矩阵乘法走 BLAS
+    :return: (数值, 是否全为数字)
+    """
+    digits = matrix - np.uint8(DIGIT_0)  # uint8 运算，非数字字符回绕为大于 9 的值
+    weights = 10.0 ** np.arange(matrix.shape[1] - 1, -1, -1)
+    return (digits @ weights).astype(np.int64), np.all(digits <= 9, axis=1)
+
+
+def _layout(row):
+    """
+    由一行确定各字段的位置，以及哪些列是固定字符（空格、括号、小数点，同组各行必须与该行相同）
+    :return: (字段位置 dict, 固定列掩码 uint8 0xFF/0)，不是 candump 布局返回 None
+    """
+    width = len(row)
+    lp = row.find(b'(')
+    rp = row.find(b')', lp + 1)
+    dot = row.find(b'.', lp + 1, rp)
+    lb = row.find(b'[', rp + 1)
+    rb = row.find(b']', lb + 1)
+    if min(lp, rp, dot, lb, rb) < 0 or rp - dot - 1 > 15 or dot - lp - 1 > 15:
+        return None
+    id_end = rp + 1 + len(row[rp + 1:lb].rstrip())  # ID 最后一个字符之后
+    id_start = id_end - ID_WIDTH
+    data_start = rb + 1 + len(row[rb + 1:]) - len(row[rb + 1:].lstrip())
+    data_count = (width - data_start + 1) // 3 if data_start < width else 0
+    if id_start - 1 <= rp or data_count > MAX_DLC or (data_count and width - data_start != 3 * data_count - 1):
+        return None
+
+    fixed = np.full(width, 0xFF, dtype=np.uint8)
+    data_columns = (data_start + 3 * np.arange(data_count)[:, None] + np.arange(2)).ravel()  # 每字节的高/低位
+    # 数值列单独校验；接口名（rp 与 ID 之间）不限制
+    for start, end in ((lp + 1, dot), (dot + 1, rp), (rp + 2, id_start - 1), (id_start, id_end), (lb + 1, rb)):
+        fixed[start:end] = 0
+    fixed[data_columns] = 0
+    fields = {'lp': lp, 'rp': rp, 'dot': dot, 'lb': lb, 'rb': rb, 'id_start': id_start, 'id_end': id_end,
+              'data_count': data_count, 'data_columns': data_columns}
+    return fields, fixed
+
+
+def _parse_group(lines):
+    """
+    整列解析长度相同的一组行
+    :param lines: (N, L) uint8
+    :return: (ok 掩码, 帧数组)，ok 为 False 的行需要逐行解析
+    """
+    count = len(lines)
+    frames = empty_frames(count)
+    layout = _layout(lines[0].tobytes())
+    if layout is None:
+        return np.zeros(count, dtype=bool), frames
+    f, fixed = layout
+
+    ok = np.all(((lines ^ lines[0]) & fixed) == 0, axis=1)
+
+    # 时间戳：秒 + 小数（按 6 位对齐到微秒）
+    seconds, seconds_ok = _digits(lines[:, f['lp'] + 1:f['dot']])
+    fraction, fraction_ok = _digits(lines[:, f['dot'] + 1:f['rp']])
+    fraction_width = f['rp'] - f['dot'] - 1
+    if fraction_width <= 6:
+        fraction *= 10 ** (6 - fraction_width)
+    else:
+        fraction //= 10 ** (fraction_width - 6)
+    frames['timestamp_us'] = seconds * 1000000 + fraction
+    ok &= seconds_ok & fraction_ok
+
+    # ID：右对齐的十六进制，空格只能在左侧，且至少有一位
+    id_chars = lines[:, f['id_start']:f['id_end']]
+    id_values = _HEX_SPACE[id_chars]
+    spaces = id_chars == SPACE
+    ok &= np.all(id_values != 255, axis=1)
+    ok &= np.all(spaces[:, :-1] >= spaces[:, 1:], axis=1) & ~spaces[:, -1]
+    frames['can_id'] = (id_values @ (16.0 ** np.arange(ID_WIDTH - 1, -1, -1))).astype(np.uint32)
+    frames['extended'] = ~spaces[:, ID_WIDTH - 4]  # 超过 3 位
+
+    data_count = f['data_count']
+    dlc, dlc_ok = _digits(lines[:, f['lb'] + 1:f['rb']])
+    ok &= dlc_ok & (dlc == data_count)
+    frames['dlc'] = np.minimum(dlc, MAX_DLC).astype(np.uint8)
+
+    # 数据：每字节两位十六进制，以空格分隔（空格已在固定列中校验）
+    if data_count:
+        nibbles = _HEX[lines[:, f['data_columns']]]
+        ok &= np.all(nibbles != 255, axis=1)
+        nibbles = nibbles.reshape(count, data_count, 2)
+        frames['data'][:, :data_count] = nibbles[:, :, 0] * 16 + nibbles[:, :, 1]
+    return ok, frames
+
+
+def parse_block(buffer, errors):
+    """
+    解析一段完整的行
+    :param buffer: uint8 数组
+    :param errors: {'count': 无法解析的行数, 'samples': [...]}，原地累加
+    :return: 帧数组
+    """
+    newlines = np.flatnonzero(buffer == ord('\n'))
+    starts = np.concatenate(([0], newlines + 1))
+    ends = np.concatenate((newlines, [len(buffer)]))
+    keep = ends > starts
+    starts, ends = starts[keep], ends[keep]
+    ends = ends - (buffer[ends - 1] == ord('\r'))  # 兼容 \r\n
+    lengths = ends - starts
+
+    count = len(starts)
+    frames = empty_frames(count)
+    valid = np.zeros(count, dtype=bool)
+    slow = np.zeros(count, dtype=bool)
+    for width in np.unique(lengths):
+        rows = np.flatnonzero(lengths == width)
+        if width == 0 or width > MAX_LINE:
+            slow[rows] = width > 0
+            continue
+        # 按行起点从滑动窗口视图中取出 (N, width) 矩阵，只拷贝一次
+        lines = np.lib.stride_tricks.sliding_window_view(buffer, width)[starts[rows]]
+        ok, group = _parse_group(lines)
+        for name, column in group.items():
+            frames[name][rows[ok]] = column[ok]
+        valid[rows[ok]] = True
+        slow[rows[~ok]] = True
+
+    # 不符合固定布局的行逐行解析
+    for i in np.flatnonzero(slow):
+        line = buffer[starts[i]:ends[i]].tobytes()
+        try:
+            frame = parse_line(line)
+        except ValueError:
+            errors['count'] += 1
+            if len(errors['samples']) < ERROR_SAMPLES:
+                errors['samples'].append(line.strip())
+            continue
+        if frame is None:
+            continue
+        timestamp_us, can_id, extended, dlc, data = frame
+        frames['timestamp_us'][i] = timestamp_us
+        frames['can_id'][i] = can_id
+        frames['extended'][i] = extended
+        frames['dlc'][i] = dlc
+        frames['data'][i, :dlc] = np.frombuffer(data, dtype=np.uint8)
+        valid[i] = True
+    return select_frames(frames, valid)
+
+
+def iter_candump(filename, block_size=BLOCK_SIZE):
+    """
+    按块读取 candump 文本日志，每块产出一段帧数组，不需要把整个文件的帧放在内存中
+    无法解析的行在读完后汇总打印一次
+    """
+    size = os.path.getsize(filename)
+    if size == 0:
+        return
+    mapped = np.memmap(filename, dtype=np.uint8, mode='r')
+    errors = {'count': 0, 'samples': []}
+    pos = 0
+    while pos < size:
+        end = min(pos + block_size, size)
+        buffer = np.asarray(mapped[pos:end])
+        if end < size:
+            # 块在最后一个换行符之后截断，不完整的行留到下一块
+            tail = int((buffer[::-1] == ord('\n')).argmax())  # 最后一个换行符之后的字节数
+            if buffer[len(buffer) - 1 - tail] != ord('\n'):
+                block_size *= 2  # 一整块内没有换行符
+                continue
+            end -= tail
+            buffer = buffer[:len(buffer) - tail]
+        yield parse_block(buffer, errors)
+        pos = end
+    del mapped
+
+    if errors['count']:
+        print(f"{filename}: {errors['count']} lines could not be parsed, e.g.:")
+        for sample in errors['samples']:
+            print(f"    {sample.decode(errors='replace')}")
+
+
+def read_candump(filename, block_size=BLOCK_SIZE):
+    """
+    读取 candump 文本日志
+    :return: 帧数组，见模块说明
+    """
+    return concat_frames(list(iter_candump(filename, block_size)))
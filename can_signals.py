@@ -0,0 +1,230 @@
+"""
+CAN 信号解码
+
+信号定义可以来自 DBC 文件（load_dbc），也可以直接用 Message / Signal 声明（见 NAV_MESSAGES）。
+帧按 ID 分组后，同一 ID 的所有帧组成 (N, 8) 的 uint8 矩阵，整体视为 64 位整数，
+每个信号一次移位、掩码、符号扩展、缩放，整列得到物理值，不逐帧解码。
+
+输出为每个报文一张表：timestamp_us + 各信号，写为 <输出文件名>_<报文名>.<扩展名>（格式见 table_io）。
+数据长度不足以覆盖信号的帧，浮点信号为 NaN，整数信号为 MISSING_INT。
+"""
+import os
+import re
+import numpy as np
+
+from log_parser import MISSING_INT
+from table_io import write_columns
+from can_log import EXTENDED_FLAG
+from can_store import read_can_frames
+
+
+class Signal:
+    """
+    :param start: 起始位，Intel 为最低位，Motorola 为最高位（DBC 的编号方式）
+    :param length: 位数
+    :param little_endian: True 为 Intel（DBC @1），False 为 Motorola（DBC @0）
+    :param signed: 是否为有符号数（补码）
+    :param factor, offset: 物理值 = 原始值 * factor + offset；factor 为 1、offset 为 0 时输出整数
+    """
+
+    def __init__(self, name, start, length, little_endian=True, signed=False, factor=1.0, offset=0.0, unit=''):
+        self.name = name
+        self.start = start
+        self.length = length
+        self.little_endian = little_endian
+        self.signed = signed
+        self.factor = factor
+        self.offset = offset
+        self.unit = unit
+        if little_endian:
+            self.shift = start
+            self.bytes_needed = (start + length - 1) // 8 + 1
+        else:
+            # Motorola：把 DBC 的起始位（最高位）换算为大端 64 位整数中最低位的位置
+            msb = (7 - start // 8) * 8 + start % 8
+            self.shift = msb - length + 1
+            self.bytes_needed = 8 - self.shift // 8
+        if self.shift < 0 or self.shift + length > 64:
+            raise ValueError(f"signal {name} does not fit in 8 bytes")
+
+    @property
+    def is_integer(self):
+        return self.factor == 1 and self.offset == 0
+
+    def decode(self, words, dlc):
+        """
+        :param words: 报文数据按本信号字节序组成的 uint64 数组
+        :param dlc: 每帧的数据长度
+        :return: 物理值数组
+        """
+        mask = np.uint64((1 << self.length) - 1)
+        raw = (words >> np.uint64(self.shift)) & mask
+        if self.signed:
+            raw = raw.view(np.int64) if self.length == 64 else raw.astype(np.int64)
+            if self.length < 64:
+                raw = np.where(raw >= 1 << (self.length - 1), raw - (1 << self.length), raw)
+        else:
+            raw = raw.astype(np.int64) if self.length < 64 else raw
+        short = dlc < self.bytes_needed
+        if self.is_integer:
+            values = raw.astype(np.int64)
+            values[short] = MISSING_INT
+        else:
+            values = raw * self.factor + self.offset
+            values[short] = np.nan
+        return values
+
+
+class Message:
+    """
+    :param can_id: CAN ID（不含 DBC 的扩展帧标志位）
+    :param extended: 是否为扩展帧，None 时 ID 大于 0x7FF 即为扩展帧
+    """
+
+    def __init__(self, name, can_id, signals, extended=None):
+        self.name = name
+        self.can_id = can_id
+        self.signals = list(signals)
+        self.extended = can_id > 0x7FF if extended is None else extended
+
+    def __repr__(self):
+        return f"Message({self.name!r}, 0x{self.can_id:X}, {len(self.signals)} signals)"
+
+
+# ---------------- 导航设备报文（P_D2701_nav 中的 ID） ----------------
+# 没有供应商 DBC，以下布局由数据推断：
+#   18FEF31C 按 J1939 Vehicle Position 的 1e-7 度/位，解出的经纬度与测试场地一致（偏移为 -90 / -180）
+#   18FEE61C 三个 int16，静止时 z 约为 -1000，按 mg 缩放为 g
+#   18FEE71C 三个 int16，按 0.01 deg/s 缩放（比例系数待 DBC 确认）
+#   200 / 180 含义未知，按 16 位原始值输出
+# 拿到 DBC 后用 load_dbc 替换即可。
+
+NAV_MESSAGES = [
+    Message('nav_accel', 0x18FEE61C, [
+        Signal('acc_x', 0, 16, signed=True, factor=0.001, unit='g'),
+        Signal('acc_y', 16, 16, signed=True, factor=0.001, unit='g'),
+        Signal('acc_z', 32, 16, signed=True, factor=0.001, unit='g'),
+    ]),
+    Message('nav_gyro', 0x18FEE71C, [
+        Signal('gyro_x', 0, 16, signed=True, factor=0.01, unit='deg/s'),
+        Signal('gyro_y', 16, 16, signed=True, factor=0.01, unit='deg/s'),
+        Signal('gyro_z', 32, 16, signed=True, factor=0.01, unit='deg/s'),
+    ]),
+    Message('nav_position', 0x18FEF31C, [
+        Signal('latitude', 0, 32, factor=1e-7, offset=-90.0, unit='deg'),
+        Signal('longitude', 32, 32, factor=1e-7, offset=-180.0, unit='deg'),
+    ]),
+    Message('can_200', 0x200, [Signal(f'word{i}', 16 * i, 16) for i in range(4)]),
+    Message('can_180', 0x180, [Signal(f'word{i}', 16 * i, 16) for i in range(4)]),
+]
+
+
+# ---------------- DBC ----------------
+
+_BO = re.compile(r'^BO_\s+(\d+)\s+(\w+)\s*:')
+_SG = re.compile(r'^SG_\s+(\w+)\s*(M|m\d+)?\s*:\s*(\d+)\|(\d+)@([01])([+-])\s*'
+                 r'\(\s*([^,\s]+)\s*,\s*([^)\s]+)\s*\)\s*\[[^\]]*\]\s*"([^"]*)"')
+
+
+def load_dbc(dbc_filename):
+    """
+    读取 DBC 中的报文和信号（BO_ / SG_）
+    多路复用信号（m0、m1 ...）不支持，跳过并提示
+    :return: [Message]
+    """
+    messages = []
+    skipped = 0
+    with open(dbc_filename, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.strip()
+            m = _BO.match(line)
+            if m:
+                raw_id = int(m.group(1))
+                messages.append(Message(m.group(2), raw_id & ~EXTENDED_FLAG, [],
+                                        extended=bool(raw_id & EXTENDED_FLAG)))
+                continue
+            m = _SG.match(line)
+            if m and messages:
+                name, mux, start, length, order, sign, factor, offset, unit = m.groups()
+                if mux and mux != 'M':
+                    skipped += 1
+                    continue
+                messages[-1].signals.append(Signal(name, int(start), int(length), little_endian=order == '1',
+                                                   signed=sign == '-', factor=float(factor), offset=float(offset),
+                                                   unit=unit))
+    if skipped:
+        print(f"{dbc_filename}: {skipped} multiplexed signals skipped")
+    # 没有信号的报文（如 VECTOR__INDEPENDENT_SIG_MSG）不需要解码
+    return [message for message in messages if message.signals]
+
+
+# ---------------- 解码 ----------------
+
+def _frame_keys(frames):
+    """ID 与扩展帧标志合成一个键，标准帧 0x100 与扩展帧 0x100 不会混淆"""
+    return frames['can_id'].astype(np.int64) | (frames['extended'].astype(np.int64) << 32)
+
+
+def decode_message(frames, message, index=None):
+    """
+    解码一个报文的所有帧
+    :param index: 属于该报文的帧下标，None 则按 ID 查找
+    :return: {'timestamp_us': ..., 信号名: 物理值}
+    """
+    if index is None:
+        index = np.flatnonzero(_frame_keys(frames) == (message.can_id | (int(message.extended) << 32)))
+    data = np.ascontiguousarray(frames['data'][index])
+    dlc = frames['dlc'][index]
+    words = {
+        True: data.view('<u8')[:, 0].astype(np.uint64),
+        False: data.view('>u8')[:, 0].astype(np.uint64),
+    }
+    columns = {'timestamp_us': frames['timestamp_us'][index]}
+    for signal in message.signals:
+        columns[signal.name] = signal.decode(words[signal.little_endian], dlc)
+    return columns
+
+
+def decode_frames(frames, messages=NAV_MESSAGES):
+    """
+    按报文分组解码：帧按 ID 稳定排序一次，每个报文用二分查找取出自己的帧（保持时间顺序）
+    :return: {报文名: 列}
+    """
+    keys = _frame_keys(frames)
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    decoded = {}
+    for message in messages:
+        key = message.can_id | (int(message.extended) << 32)
+        lo, hi = np.searchsorted(sorted_keys, [key, key + 1])
+        decoded[message.name] = decode_message(frames, message, order[lo:hi])
+    return decoded
+
+
+def message_filename(output_filename, message_name):
+    root, ext = os.path.splitext(output_filename)
+    return f"{root}_{message_name}{ext or '.csv'}"
+
+
+def decode_can_log(log_filename, output_filename, messages=None, dbc_filename=None):
+    """
+    读取 candump 日志或 .canb 文件（只读取含所需 ID 的块），解码并按报文写出
+    :param output_filename: 输出文件名，实际文件为 <去掉扩展名>_<报文名>.<扩展名>
+    :param messages: [Message]，默认 NAV_MESSAGES；指定 dbc_filename 时使用 DBC 中的定义
+    :return: {报文名: 列}
+    """
+    if dbc_filename is not None:
+        messages = load_dbc(dbc_filename)
+    elif messages is None:
+        messages = NAV_MESSAGES
+    frames = read_can_frames(log_filename, ids={message.can_id for message in messages})
+    decoded = decode_frames(frames, messages)
+    for name, columns in decoded.items():
+        if len(columns['timestamp_us']):
+            write_columns(message_filename(output_filename, name), columns)
+    return decoded
+
+
+if __name__ == "__main__":
+    for name, columns in decode_can_log('example/P_D2701_nav.asc', 'P_D2701_nav_signals.npz').items():
+        print(name, len(columns['timestamp_us']), {k: v[:1] for k, v in columns.items()})
@@ -0,0 +1,274 @@
+"""
+CAN 帧的二进制存储（.canb），代替 candump / ASC 文本，分析时不需要再解析文本
+
+文件布局：
+    文件头  HEADER：魔数、版本、记录长度、每块记录数
+    数据块  每块最多 BLOCK_RECORDS 条定长记录（RECORD_DTYPE，21 字节）：
+                timestamp_us int64 | can_id uint32（最高位为扩展帧标志）| dlc uint8 | data 8 x uint8
+            可选压缩：记录按字节转置（同一字段的字节相邻）后 zlib 压缩
+    块索引  每块一条（INDEX_DTYPE）：偏移、字节数、记录数、压缩方式、时间范围、ID 位图
+    文件尾  FOOTER：块索引的偏移、块数、魔数
+
+读取时整个文件用 np.memmap 映射，只读取时间范围和 ID 位图与查询相交的块；
+未压缩的块直接在映射上按记录视图读取，不拷贝整块。
+ID 位图是 256 位的布隆过滤器，可能误选不含该 ID 的块，取出后再按 ID 精确过滤。
+返回的帧数组与 can_log 相同（{列名: ndarray}），可直接交给 can_signals.decode_frames。
+"""
+import os
+import zlib
+import struct
+import numpy as np
+
+from can_log import EXTENDED_FLAG, MAX_DLC, concat_frames, iter_candump, read_candump
+
+STORE_SUFFIX = '.canb'
+VERSION = 1
+BLOCK_RECORDS = 1 << 16
+
+CODEC_NONE = 0
+CODEC_ZLIB = 1  # 字节转置 + zlib
+
+RECORD_DTYPE = np.dtype([('timestamp_us', '<i8'), ('can_id', '<u4'), ('dlc', 'u1'), ('data', 'u1', (MAX_DLC,))])
+INDEX_DTYPE = np.dtype([('offset', '<u8'), ('size', '<u8'), ('count', '<u4'), ('codec', 'u1'),
+                        ('t_min', '<i8'), ('t_max', '<i8'), ('id_bloom', '<u8', (4,))])
+
+MAGIC = b'CANSTOR\x00'
+HEADER = struct.Struct('<8sIII')  # 魔数, 版本, 记录长度, 每块记录数
+FOOTER = struct.Struct('<QQ8s')   # 块索引偏移, 块数, 魔数
+
+
+def _bloom_bits(can_ids):
+    """CAN ID（不含扩展帧标志）-> 位图中的位置 0~255"""
+    ids = np.asarray(can_ids, dtype=np.uint64) & np.uint64(~EXTENDED_FLAG & 0xFFFFFFFF)
+    return ((ids * np.uint64(0x9E3779B1)) & np.uint64(0xFFFFFFFF)) >> np.uint64(24)
+
+
+def _bloom(can_ids):
+    """一组 CAN ID 的 256 位位图，4 个 uint64"""
+    bloom = np.zeros(4, dtype=np.uint64)
+    bits = np.unique(_bloom_bits(can_ids))
+    np.bitwise_or.at(bloom, (bits >> np.uint64(6)).astype(np.intp), np.uint64(1) << (bits & np.uint64(63)))
+    return bloom
+
+
+def to_records(frames):
+    """帧数组 -> RECORD_DTYPE 记录"""
+    records = np.empty(len(frames['timestamp_us']), dtype=RECORD_DTYPE)
+    records['timestamp_us'] = frames['timestamp_us']
+    records['can_id'] = frames['can_id'].astype(np.uint32) | (frames['extended'].astype(np.uint32) << 31)
+    records['dlc'] = frames['dlc']
+    records['data'] = frames['data']
+    return records
+
+
+def from_records(records):
+    """RECORD_DTYPE 记录 -> 帧数组（拷贝，不再引用映射的文件）"""
+    raw_id = records['can_id']
+    return {
+        'timestamp_us': records['timestamp_us'].copy(),
+        'can_id': (raw_id & np.uint32(~EXTENDED_FLAG & 0xFFFFFFFF)).astype(np.uint32),
+        'extended': (raw_id & np.uint32(EXTENDED_FLAG)) != 0,
+        'dlc': records['dlc'].copy(),
+        'data': np.ascontiguousarray(records['data']),
+    }
+
+
+class CanStoreWriter:
+    """
+    按块写入 .canb 文件，用法：
+        with CanStoreWriter(filename, compress=True) as writer:
+            writer.write(frames)
+    :param compress: 每块按字节转置后 zlib 压缩；False 时读取可零拷贝
+    :param level: zlib 压缩级别
+    :param block_records: 每块的记录数，越小时间窗口查询越精确，索引越大
+    """
+
+    def __init__(self, filename, compress=False, level=6, block_records=BLOCK_RECORDS):
+        self.filename = filename
+        self.codec = CODEC_ZLIB if compress else CODEC_NONE
+        self.level = level
+        self.block_records = block_records
+        self._file = open(filename, 'wb')
+        self._file.write(HEADER.pack(MAGIC, VERSION, RECORD_DTYPE.itemsize, block_records))
+        self._pending = np.empty(0, dtype=RECORD_DTYPE)
+        self._index = []
+        self.count = 0  # 已写出的记录数
+
+    def write(self, frames):
+        """追加帧数组，满一块即写出"""
+        records = to_records(frames)
+        if len(self._pending):
+            records = np.concatenate((self._pending, records))
+        full = len(records) - len(records) % self.block_records
+        for start in range(0, full, self.block_records):
+            self._write_block(records[start:start + self.block_records])
+        self._pending = records[full:].copy()
+
+    def _write_block(self, records):
+        payload = records.view(np.uint8)
+        if self.codec == CODEC_ZLIB:
+            # 转置后时间戳的高位字节、ID、DLC 等重复的字节连在一起，压缩率远高于直接压缩
+            payload = zlib.compress(payload.reshape(len(records), RECORD_DTYPE.itemsize).T.tobytes(), self.level)
+        else:
+            payload = payload.tobytes()
+        entry = np.zeros(1, dtype=INDEX_DTYPE)
+        entry['offset'] = self._file.tell()
+        entry['size'] = len(payload)
+        entry['count'] = len(records)
+        entry['codec'] = self.codec
+        entry['t_min'] = records['timestamp_us'].min()
+        entry['t_max'] = records['timestamp_us'].max()
+        entry['id_bloom'] = _bloom(records['can_id'])
+        self._file.write(payload)
+        self._index.append(entry)
+        self.count += len(records)
+
+    @property
+    def block_count(self):
+        return len(self._index)
+
+    def close(self):
+        """写出剩余的记录、块索引和文件尾"""
+        if self._file.closed:
+            return
+        if len(self._pending):
+            self._write_block(self._pending)
+            self._pending = self._pending[:0]
+        index = np.concatenate(self._index) if self._index else np.zeros(0, dtype=INDEX_DTYPE)
+        index_offset = self._file.tell()
+        self._file.write(index.tobytes())
+        self._file.write(FOOTER.pack(index_offset, len(index), MAGIC))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CanStore:
+    """
+    读取 .canb 文件
+    时间窗口为 [start_us, end_us)，None 表示不限；ids 为 CAN ID（不含扩展帧标志）的集合，None 表示全部
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        size = os.path.getsize(filename)
+        if size < HEADER.size + FOOTER.size:
+            raise ValueError(f"{filename}: not a CAN store file")
+        self._mapped = np.memmap(filename, dtype=np.uint8, mode='r')
+        magic, version, record_size, self.block_records = HEADER.unpack(self._mapped[:HEADER.size].tobytes())
+        if magic != MAGIC or record_size != RECORD_DTYPE.itemsize:
+            raise ValueError(f"{filename}: not a CAN store file")
+        if version != VERSION:
+            raise ValueError(f"{filename}: unsupported version {version}")
+        index_offset, block_count, magic = FOOTER.unpack(self._mapped[size - FOOTER.size:].tobytes())
+        if magic != MAGIC:
+            raise ValueError(f"{filename}: incomplete file (writer was not closed)")
+        self.index = np.frombuffer(self._mapped[index_offset:index_offset + block_count * INDEX_DTYPE.itemsize]
+                                   .tobytes(), dtype=INDEX_DTYPE)
+
+    def __len__(self):
+        return int(self.index['count'].sum())
+
+    @property
+    def time_range(self):
+        """(最早, 最晚) 时间戳（微秒），空文件为 None"""
+        if not len(self.index):
+            return None
+        return int(self.index['t_min'].min()), int(self.index['t_max'].max())
+
+    def select_blocks(self, start_us=None, end_us=None, ids=None):
+        """按块索引选出可能包含所需帧的块号"""
+        keep = np.ones(len(self.index), dtype=bool)
+        if start_us is not None:
+            keep &= self.index['t_max'] >= start_us
+        if end_us is not None:
+            keep &= self.index['t_min'] < end_us
+        if ids is not None:
+            wanted = _bloom(list(ids))
+            keep &= np.any(self.index['id_bloom'] & wanted, axis=1)
+        return np.flatnonzero(keep)
+
+    def records(self, block):
+        """第 block 块的记录，未压缩时是映射上的视图"""
+        entry = self.index[block]
+        start, count = int(entry['offset']), int(entry['count'])
+        payload = self._mapped[start:start + int(entry['size'])]
+        if entry['codec'] == CODEC_NONE:
+            return payload.view(RECORD_DTYPE)
+        if entry['codec'] == CODEC_ZLIB:
+            raw = np.frombuffer(zlib.decompress(payload), dtype=np.uint8)
+            return np.ascontiguousarray(raw.reshape(RECORD_DTYPE.itemsize, count).T).view(RECORD_DTYPE)[:, 0]
+        raise ValueError(f"{self.filename}: unknown codec {entry['codec']} in block {block}")
+
+    def iter_frames(self, start_us=None, end_us=None, ids=None):
+        """逐块产出符合条件的帧数组，内存占用只有一块"""
+        id_list = None if ids is None else np.asarray(list(ids), dtype=np.uint32)
+        for block in self.select_blocks(start_us, end_us, ids):
+            records = self.records(block)
+            entry = self.index[block]
+            keep = None
+            if start_us is not None and entry['t_min'] < start_us:
+                keep = records['timestamp_us'] >= start_us
+            if end_us is not None and entry['t_max'] >= end_us:
+                inside = records['timestamp_us'] < end_us
+                keep = inside if keep is None else keep & inside
+            if id_list is not None:
+                match = np.isin(records['can_id'] & np.uint32(~EXTENDED_FLAG & 0xFFFFFFFF), id_list)
+                keep = match if keep is None else keep & match
+            if keep is not None:
+                records = records[keep]
+            if len(records):
+                yield from_records(records)
+
+    def read(self, start_us=None, end_us=None, ids=None):
+        """读取符合条件的帧，返回帧数组（见 can_log）"""
+        return concat_frames(list(self.iter_frames(start_us, end_us, ids)))
+
+    def close(self):
+        self._mapped = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_can_frames(filename, start_us=None, end_us=None):
+    """逐块产出帧数组：.canb 只读取时间窗口内的帧，其它文件按 candump 文本读取全部帧"""
+    if filename.endswith(STORE_SUFFIX):
+        with CanStore(filename) as store:
+            yield from store.iter_frames(start_us, end_us)
+    else:
+        yield from iter_candump(filename)
+
+
+def read_can_frames(filename, ids=None):
+    """.canb 按 ID 读取（只读相关的块），其它文件按 candump 文本读取"""
+    if filename.endswith(STORE_SUFFIX):
+        with CanStore(filename) as store:
+            return store.read(ids=ids)
+    return read_candump(filename)
+
+
+def candump_to_store(input_file, output_file, compress=False, level=6, block_records=BLOCK_RECORDS):
+    """
+    candump 文本 -> .canb，逐块解析、逐块写出
+    :return: {'frames': 帧数, 'blocks': 块数, 'bytes': 输出文件大小}
+    """
+    with CanStoreWriter(output_file, compress, level, block_records) as writer:
+        for frames in iter_candump(input_file):
+            writer.write(frames)
+    return {'frames': writer.count, 'blocks': writer.block_count, 'bytes': os.path.getsize(output_file)}
+
+
+if __name__ == "__main__":
+    print(candump_to_store('example/P_D2701_nav.asc', 'P_D2701_nav.canb', compress=True))
+    with CanStore('P_D2701_nav.canb') as store:
+        first, _ = store.time_range
+        window = store.read(first, first + 1000000, ids=[0x18FEF31C])
+        print(len(store), 'frames,', len(window['timestamp_us']), 'nav_position frames in the first second')
@@ -0,0 +1,97 @@
+"""
+geodesy 与 pyproj 的一致性检查：WGS84 / CGCS2000 / Beijing54 三个椭球上随机取点，
+对比高斯投影正算 / 反算、大地坐标 <-> ECEF、大地坐标 <-> ENU，最大误差（米）须小于 TOLERANCE_M
+修改 Krüger 级数系数、Heikkinen 公式等之后运行，不通过时以非 0 退出
+
+用法：python check_geodesy.py [点数，默认 100000]（需要 pyproj）
+"""
+import sys
+import numpy as np
+
+import geodesy
+
+TOLERANCE_M = 1e-3
+METERS_PER_DEGREE = 111320.0  # 赤道上 1 度的弧长，角度误差按此换算为米（偏大，检查更严）
+SEED = 2024
+
+
+def _proj_ellipsoid(ell):
+    return f"+a={ell.a!r} +rf={1 / ell.f!r}"
+
+
+def _random_points(count, rng):
+    """中国范围内的随机点：中央子午线取 3 度的整倍数，经度在其 ±3 度内（6 度带的范围），返回 (lon, lat, alt, 中央子午线)"""
+    central_meridian = rng.choice(np.arange(75, 136, 3), count).astype(float)
+    lon = central_meridian + rng.uniform(-3, 3, count)
+    lat = rng.uniform(18, 54, count)
+    alt = rng.uniform(-100, 5000, count)
+    return lon, lat, alt, central_meridian
+
+
+def _angle_error_m(lon, lat, lon_ref, lat_ref):
+    return max(np.max(np.abs(lon - lon_ref)), np.max(np.abs(lat - lat_ref))) * METERS_PER_DEGREE
+
+
+def check_ellipsoid(name, count, rng):
+    """
+    :return: {检查项: 最大误差(米)}
+    """
+    from pyproj import Transformer  # 只在检查时导入
+
+    ell = geodesy.get_ellipsoid(name)
+    ellps = _proj_ellipsoid(ell)
+    lon, lat, alt, central_meridian = _random_points(count, rng)
+    errors = {}
+
+    # 高斯投影：按中央子午线分组，每组一个 pyproj 转换器
+    x_ref, y_ref = np.empty(count), np.empty(count)
+    for meridian in np.unique(central_meridian):
+        rows = central_meridian == meridian
+        transformer = Transformer.from_pipeline(
+            f"+proj=tmerc +lat_0=0 +lon_0={float(meridian)!r} +k=1 +x_0=500000 +y_0=0 {ellps}")
+        x_ref[rows], y_ref[rows] = transformer.transform(lon[rows], lat[rows])
+    x, y = geodesy.gauss_forward(lon, lat, central_meridian, name)
+    errors['gauss_forward'] = max(np.max(np.abs(x - x_ref)), np.max(np.abs(y - y_ref)))
+    lon_back, lat_back = geodesy.gauss_inverse(x_ref, y_ref, central_meridian, name)
+    errors['gauss_inverse'] = _angle_error_m(lon_back, lat_back, lon, lat)
+
+    # 大地坐标 <-> ECEF
+    transformer = Transformer.from_pipeline(f"+proj=cart {ellps}")
+    ecef_ref = transformer.transform(lon, lat, alt)
+    ecef = geodesy.geodetic_to_ecef(lon, lat, alt, name)
+    errors['geodetic_to_ecef'] = max(np.max(np.abs(a - b)) for a, b in zip(ecef, ecef_ref))
+    lon_back, lat_back, alt_back = geodesy.ecef_to_geodetic(*ecef_ref, ellps=name)
+    errors['ecef_to_geodetic'] = max(_angle_error_m(lon_back, lat_back, lon, lat), np.max(np.abs(alt_back - alt)))
+
+    # 大地坐标 <-> ENU：原点取第一个点，其余点放到原点附近 50 km 内
+    lon0, lat0, alt0 = lon[0], lat[0], alt[0]
+    lon_near = lon0 + rng.uniform(-0.5, 0.5, count)
+    lat_near = lat0 + rng.uniform(-0.5, 0.5, count)
+    transformer = Transformer.from_pipeline(
+        f"+proj=pipeline +step +proj=cart {ellps} "
+        f"+step +proj=topocentric +lon_0={float(lon0)!r} +lat_0={float(lat0)!r} +h_0={float(alt0)!r} {ellps}")
+    enu_ref = transformer.transform(lon_near, lat_near, alt)
+    enu = geodesy.geodetic_to_enu(lon_near, lat_near, alt, lat0, lon0, alt0, name)
+    errors['geodetic_to_enu'] = max(np.max(np.abs(a - b)) for a, b in zip(enu, enu_ref))
+    lon_back, lat_back, alt_back = geodesy.enu_to_geodetic(*enu_ref, lat0, lon0, alt0, name)
+    errors['enu_to_geodetic'] = max(_angle_error_m(lon_back, lat_back, lon_near, lat_near),
+                                    np.max(np.abs(alt_back - alt)))
+    return errors
+
+
+def run(count=100000):
+    """:return: 全部检查通过时为 True"""
+    rng = np.random.default_rng(SEED)
+    passed = True
+    print(f"{'ellipsoid':<12}{'check':<20}{'max error(m)':>14}")
+    for name in geodesy.ELLIPSOIDS:
+        for check, error in check_ellipsoid(name, count, rng).items():
+            ok = error < TOLERANCE_M
+            passed &= ok
+            print(f"{name:<12}{check:<20}{error:>14.3e}  {'ok' if ok else 'FAILED'}")
+    print(f"{count} points per ellipsoid, tolerance {TOLERANCE_M} m: {'passed' if passed else 'FAILED'}")
+    return passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run(*(int(arg) for arg in sys.argv[1:2])) else 1)
@@ -0,0 +1,386 @@
+"""
+统一命令行入口，不需要再修改各脚本 __main__ 中的路径
+
+子命令：
+    log2csv   感知日志 -> 表格（话题按日志内容自动识别，也可用 --topic 指定）
+    imu       IMU 日志 -> 表格，--plot 同时输出曲线图
+    imustat   IMU 日志或表格 -> 间断检测、静态零偏、各轴 Allan 偏差（见 imu_dsp）
+    simone    SimOne 位姿 txt -> 表格
+    traj      SimOne 位姿 txt 或表格 -> 时延分布、速度 / 加速度 / 航向角速度 / 曲率，--path-db 时计算相对参考路径的误差
+    can2asc   candump 文本 -> Vector ASC（--include / --exclude / --start / --end 筛选帧）
+    canstats  candump 文本或 .canb -> 每个 ID 的帧数、周期、抖动、丢帧和总线负载
+    can2bin   candump 文本 -> .canb 二进制存储（见 can_store，--compress 按块压缩）
+    candecode candump 文本或 .canb -> 按报文解码的信号表（--dbc 指定 DBC，默认为导航设备的信号表）
+    sync      多个表格按时间对齐为一张同步表（见 sensor_sync，--reference 指定基准流）
+    plot      表格（.csv / .parquet / .feather / .npz）-> location_x / track_id 曲线图
+    pdf2docx  PDF -> Word
+
+输入可以是文件、通配符或目录（目录按子命令的默认扩展名递归查找），
+每个文件一个任务，用 -j 指定并行的进程数，完成一个打印一行进度，最后输出每个文件的耗时汇总。
+
+用法示例：
+    python cli.py log2csv /media/drive/20241118 -o out --format .parquet -j 8
+    python cli.py imu 'example/imu_*.log' --plot
+    python cli.py plot out/*.parquet -j 4
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+# ---------------- 输入 / 输出文件 ----------------
+
+def expand_inputs(patterns, default_glob, exclude_suffixes=()):
+    """
+    文件 / 通配符 / 目录 -> 去重后的文件列表（保持参数顺序，同一参数内按名称排序）
+    :param default_glob: 参数为目录时递归查找的文件名模式，如 '*.log'
+    :param exclude_suffixes: 目录或通配符展开时跳过的文件名后缀（如自己生成的 _converted.asc）
+    """
+    files = []
+    seen = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(glob.glob(os.path.join(pattern, '**', default_glob), recursive=True))
+        elif os.path.isfile(pattern):
+            matches = [pattern]
+        else:
+            matches = sorted(glob.glob(pattern, recursive=True))
+            if not matches:
+                print(f"no file matches {pattern}")
+        for path in matches:
+            if path != pattern and path.endswith(tuple(exclude_suffixes)):
+                continue
+            key = os.path.abspath(path)
+            if os.path.isfile(path) and key not in seen:
+                seen.add(key)
+                files.append(path)
+    return files
+
+
+def output_path(input_path, output_dir, suffix):
+    """<输出目录，默认与输入相同>/<输入文件名去掉扩展名><suffix>"""
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+    return os.path.join(output_dir or os.path.dirname(input_path), stem + suffix)
+
+
+# ---------------- 单个文件的任务（在工作进程中执行，需为模块级函数） ----------------
+
+def log2csv_job(log_filename, output_filename, topic, shard_workers, incremental):
+    from log_schema import get_topic
+    get_topic(topic).write(log_filename, output_filename, shard_workers, incremental)
+
+
+def imu_job(log_filename, output_filename, figure_filename):
+    from process_figure import process_imu, read_imu, write_figure_imu
+    from table_io import write_columns
+    if not figure_filename:
+        process_imu(log_filename, output_filename)  # 逐块写出，内存与文件大小无关
+        return
+    data = read_imu(log_filename)
+    write_columns(output_filename, data)
+    write_figure_imu(data, figure_filename)  # 保存图片时使用 Agg 图形，不经过 pyplot，无需显示器
+
+
+def imustat_job(input_filename, output_filename, rate_hz, points):
+    from imu_dsp import analyze_imu, print_analysis
+    result = analyze_imu(input_filename, output_filename, rate_hz, points)
+    print(input_filename)
+    print_analysis(result)
+
+
+def simone_job(txt_filename, output_filename):
+    from process_figure import process_txt
+    process_txt(txt_filename, output_filename)
+
+
+def traj_job(input_filename, output_filename, path_db, path_table, path_enu):
+    from trajectory import analyze_trajectory, print_analysis
+    result = analyze_trajectory(input_filename, output_filename, path_db, path_table, path_enu=path_enu)
+    print(input_filename)
+    print_analysis(result)
+
+
+def can2asc_job(input_filename, output_filename, epoch_offset, shard_workers, frame_filter):
+    from convert_asc import convert_can_dump_to_asc
+    convert_can_dump_to_asc(input_filename, output_filename, epoch_offset, shard_workers, frame_filter=frame_filter)
+
+
+def canstats_job(input_filename, output_filename, frame_filter, bitrate):
+    from convert_asc import bus_statistics, print_statistics
+    from table_io import write_columns
+    statistics = bus_statistics(input_filename, frame_filter, bitrate)
+    write_columns(output_filename, statistics['table'])
+    print(input_filename)
+    print_statistics(statistics)
+
+
+def can2bin_job(input_filename, output_filename, compress):
+    from can_store import candump_to_store
+    candump_to_store(input_filename, output_filename, compress)
+
+
+def candecode_job(input_filename, output_filename, dbc_filename):
+    from can_signals import decode_can_log
+    decode_can_log(input_filename, output_filename, dbc_filename=dbc_filename)
+
+
+def sync_job(table_filenames, output_filename, time_columns, offsets_us, options):
+    from sensor_sync import align_files
+    align_files(table_filenames, output_filename, time_columns, offsets_us, **options)
+
+
+def plot_job(table_filename, output_prefix, columns):
+    from process_log import write_figures
+    write_figures(table_filename, output_prefix, columns)  # Agg 图形，不经过 pyplot
+
+
+def pdf2docx_job(pdf_filename, docx_filename):
+    from pdf2word import pdf_to_word
+    pdf_to_word(pdf_filename, docx_filename)
+
+
+# ---------------- 调度 ----------------
+
+def _timed_job(func, args):
+    """执行任务，返回 (耗时 s, 错误信息或 None)；异常只记录，不影响其它文件"""
+    start = time.perf_counter()
+    try:
+        func(*args)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return time.perf_counter() - start, error
+
+
+def run_jobs(jobs, workers=1):
+    """
+    执行任务并输出进度与耗时汇总
+    :param jobs: [(输入文件, 任务函数, 参数元组)]
+    :param workers: 并行进程数，1 则在当前进程中依次执行
+    :return: 失败的任务数
+    """
+    results = [None] * len(jobs)
+    started = time.perf_counter()
+
+    def report(i, result):
+        results[i] = result
+        done = sum(r is not None for r in results)
+        elapsed, error = result
+        print(f"[{done}/{len(jobs)}] {jobs[i][0]}  {elapsed:.2f}s  {'failed: ' + error if error else 'ok'}")
+
+    if workers <= 1 or len(jobs) <= 1:
+        for i, (_, func, args) in enumerate(jobs):
+            report(i, _timed_job(func, args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_timed_job, func, args): i for i, (_, func, args) in enumerate(jobs)}
+            for future in as_completed(futures):
+                report(futures[future], future.result())
+    wall = time.perf_counter() - started
+
+    print(f"\n{'file':<48}{'size(MB)':>10}{'time(s)':>10}{'MB/s':>8}  status")
+    total_size = 0.0
+    for (path, _, _), (elapsed, error) in zip(jobs, results):
+        size_mb = os.path.getsize(path) / 1e6
+        total_size += size_mb
+        rate = size_mb / elapsed if elapsed > 0 else float('inf')
+        print(f"{path:<48}{size_mb:>10.2f}{elapsed:>10.2f}{rate:>8.1f}  {error or 'ok'}")
+    failed = sum(error is not None for _, error in results)
+    print(f"{len(jobs)} files, {total_size:.1f} MB, {wall:.2f}s wall "
+          f"({sum(elapsed for elapsed, _ in results):.2f}s total in jobs, {workers} workers), {failed} failed")
+    return failed
+
+
+# ---------------- 各子命令生成任务 ----------------
+
+def _log2csv_jobs(args):
+    from log_schema import detect_topic
+    jobs = []
+    for path in expand_inputs(args.inputs, '*.log'):
+        topic = args.topic or detect_topic(path)
+        if topic is None:
+            print(f"{path}: unknown topic, skipped (use --topic)")
+            continue
+        output = output_path(path, args.output_dir, args.format)
+        jobs.append((path, log2csv_job, (path, output, topic, args.shard_workers, not args.no_incremental)))
+    return jobs
+
+
+def _imu_jobs(args):
+    return [(path, imu_job, (path, output_path(path, args.output_dir, args.format),
+                             output_path(path, args.output_dir, '.png') if args.plot else None))
+            for path in expand_inputs(args.inputs, '*imu*.log')]
+
+
+def _imustat_jobs(args):
+    return [(path, imustat_job, (path, output_path(path, args.output_dir, '_allan' + args.format), args.rate,
+                                 args.points))
+            for path in expand_inputs(args.inputs, '*imu*.log')]
+
+
+def _simone_jobs(args):
+    return [(path, simone_job, (path, output_path(path, args.output_dir, args.format)))
+            for path in expand_inputs(args.inputs, '*.txt')]
+
+
+def _traj_jobs(args):
+    return [(path, traj_job, (path, output_path(path, args.output_dir, '_traj' + args.format), args.path_db,
+                              args.path_table, not args.gauss))
+            for path in expand_inputs(args.inputs, '*.txt')]
+
+
+def _frame_filter(args):
+    """--include / --exclude / --start / --end -> FrameFilter，均未指定时为 None"""
+    if args.include is None and args.exclude is None and args.start is None and args.end is None:
+        return None
+    from convert_asc import FrameFilter
+    return FrameFilter(include=args.include.split(',') if args.include else None,
+                       exclude=args.exclude.split(',') if args.exclude else None, start=args.start, end=args.end)
+
+
+def _can2asc_jobs(args):
+    return [(path, can2asc_job, (path, output_path(path, args.output_dir, '_converted.asc'), args.epoch_offset,
+                                 args.shard_workers, _frame_filter(args)))
+            for path in expand_inputs(args.inputs, '*.asc', exclude_suffixes=('_converted.asc',))]
+
+
+def _canstats_jobs(args):
+    return [(path, canstats_job, (path, output_path(path, args.output_dir, '_stats' + args.format),
+                                  _frame_filter(args), args.bitrate))
+            for path in expand_inputs(args.inputs, '*.asc', exclude_suffixes=('_converted.asc',))]
+
+
+def _can2bin_jobs(args):
+    return [(path, can2bin_job, (path, output_path(path, args.output_dir, '.canb'), args.compress))
+            for path in expand_inputs(args.inputs, '*.asc', exclude_suffixes=('_converted.asc',))]
+
+
+def _candecode_jobs(args):
+    return [(path, candecode_job, (path, output_path(path, args.output_dir, args.format), args.dbc))
+            for path in expand_inputs(args.inputs, '*.asc', exclude_suffixes=('_converted.asc',))]
+
+
+def _name_values(items, convert=str):
+    """['radar=sensor_timestamp_us', ...] -> {'radar': 'sensor_timestamp_us'}"""
+    result = {}
+    for item in items or []:
+        name, _, value = item.partition('=')
+        result[name] = convert(value)
+    return result
+
+
+def _sync_jobs(args):
+    """所有输入合并为一个任务，输出 <基准流文件名>_sync"""
+    files = expand_inputs(args.inputs, '*.csv')
+    if len(files) < 2:
+        print("sync needs at least two input tables")
+        return []
+    names = [os.path.splitext(os.path.basename(path))[0] for path in files]
+    base = files[names.index(args.reference)] if args.reference in names else files[0]
+    options = {
+        'reference': args.reference,
+        'period_us': None if args.period_ms is None else round(args.period_ms * 1000),
+        'tolerance_us': None if args.tolerance_ms is None else round(args.tolerance_ms * 1000),
+        'direction': args.direction,
+    }
+    offsets_us = _name_values(args.offset_ms, lambda value: round(float(value) * 1000))
+    return [(base, sync_job, (files, output_path(base, args.output_dir, '_sync' + args.format),
+                              _name_values(args.time), offsets_us, options))]
+
+
+def _plot_jobs(args):
+    columns = args.columns.split(',')
+    return [(path, plot_job, (path, output_path(path, args.output_dir, ''), columns))
+            for path in expand_inputs(args.inputs, '*.csv')]
+
+
+def _pdf2docx_jobs(args):
+    return [(path, pdf2docx_job, (path, output_path(path, args.output_dir, '.docx')))
+            for path in expand_inputs(args.inputs, '*.pdf')]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='日志转换与绘图工具')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_filter(sub):
+        sub.add_argument('--include', help='只保留的 ID（十六进制），逗号分隔，可写区间，如 18FEF31C,200-2FF')
+        sub.add_argument('--exclude', help='排除的 ID，格式同 --include')
+        sub.add_argument('--start', type=float, help='时间窗口起点（秒，candump 原始时间戳）')
+        sub.add_argument('--end', type=float, help='时间窗口终点（秒，不含）')
+
+    def add(name, make_jobs, help, format=False):
+        sub = subparsers.add_parser(name, help=help)
+        sub.add_argument('inputs', nargs='+', help='文件、通配符或目录')
+        sub.add_argument('-o', '--output-dir', help='输出目录，默认与输入文件相同')
+        sub.add_argument('-j', '--jobs', type=int, default=1, help='并行的进程数')
+        if format:
+            sub.add_argument('--format', default='.csv', choices=['.csv', '.parquet', '.feather', '.npz'],
+                             help='输出格式')
+        sub.set_defaults(make_jobs=make_jobs)
+        return sub
+
+    sub = add('log2csv', _log2csv_jobs, '感知日志转换为表格', format=True)
+    sub.add_argument('--topic', help='话题名，默认按日志内容自动识别')
+    sub.add_argument('--shard-workers', type=int, default=1, help='单个文件按字节区间分片解析的进程数')
+    sub.add_argument('--no-incremental', action='store_true', help='忽略断点索引，总是从头转换')
+
+    sub = add('imu', _imu_jobs, 'IMU 日志转换为表格', format=True)
+    sub.add_argument('--plot', action='store_true', help='同时输出加速度 / 角速度曲线图')
+
+    sub = add('imustat', _imustat_jobs, 'IMU 零偏与噪声统计，输出 Allan 偏差表（<文件名>_allan）', format=True)
+    sub.add_argument('--rate', type=float, help='重采样频率 Hz，默认按时间戳估计')
+    sub.add_argument('--points', type=int, default=50, help='Allan 偏差的 tau 个数')
+
+    add('simone', _simone_jobs, 'SimOne 位姿 txt 转换为表格', format=True)
+    sub = add('traj', _traj_jobs, '轨迹分析，输出逐点的运动学量和路径误差（<文件名>_traj）', format=True)
+    sub.add_argument('--path-db', help='参考路径数据库（path_viewer 的 SQLite 文件）')
+    sub.add_argument('--path-table', help='路径表名，默认第一张表')
+    sub.add_argument('--gauss', action='store_true', help='按路径的原始高斯坐标匹配，默认换算为 ENU')
+
+    sub = add('can2asc', _can2asc_jobs, 'candump 文本转换为 Vector ASC')
+    sub.add_argument('--epoch-offset', default='auto', help='从时间戳中减去的秒数，默认 auto（第一帧的整数秒）')
+    sub.add_argument('--shard-workers', type=int, default=1, help='单个文件按行切分并行转换的进程数')
+    add_filter(sub)
+
+    sub = add('canstats', _canstats_jobs, 'CAN 总线统计，每个 ID 一行（<文件名>_stats）', format=True)
+    sub.add_argument('--bitrate', type=int, default=500000, help='总线波特率 bit/s，用于计算负载')
+    add_filter(sub)
+
+    sub = add('can2bin', _can2bin_jobs, 'candump 文本转换为 .canb 二进制存储')
+    sub.add_argument('--compress', action='store_true', help='每块 zlib 压缩（约为文本的 1/10，读取时需解压）')
+
+    sub = add('candecode', _candecode_jobs, 'CAN 信号解码，每个报文一个文件（<文件名>_<报文名>）', format=True)
+    sub.add_argument('--dbc', help='DBC 文件，默认使用 can_signals.NAV_MESSAGES')
+
+    sub = add('sync', _sync_jobs, '多个表格按时间对齐为一张同步表（<基准流文件名>_sync）', format=True)
+    sub.add_argument('--reference', help='基准流（文件名去掉扩展名），默认第一个输入')
+    sub.add_argument('--tolerance-ms', type=float, help='允许的最大时间差，超出记为缺失')
+    sub.add_argument('--direction', default='nearest', choices=['nearest', 'backward', 'forward'])
+    sub.add_argument('--period-ms', type=float, help='按固定周期的时间网格对齐，而不是基准流的每一行')
+    sub.add_argument('--time', action='append', help='指定时间列，如 radar_object=sensor_timestamp_us，可重复')
+    sub.add_argument('--offset-ms', action='append', help='流的时钟偏移，如 vision_object=12.5，可重复')
+
+    sub = add('plot', _plot_jobs, '表格绘制为曲线图（<文件名>_<列名>.png）')
+    sub.add_argument('--columns', default='location_x,track_id', help='绘制的列，逗号分隔')
+
+    add('pdf2docx', _pdf2docx_jobs, 'PDF 转换为 Word')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    jobs = args.make_jobs(args)
+    if not jobs:
+        print("no input files")
+        return 1
+    return 1 if run_jobs(jobs, args.jobs) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
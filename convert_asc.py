@@ -1,47 +1,386 @@
-def convert_can_dump_to_asc(input_file, output_file):
-    with open(input_file, 'r') as f_in, open(output_file, 'w') as f_out:
-        # 写入ASC文件头
-        f_out.write("date Mon Jan 1 00:00:00.000 2024\n")
-        f_out.write("base hex  timestamps absolute\n")
-        f_out.write("internal events logged\n")
-        f_out.write("// version 13.0.0\n")
-        f_out.write("// Measurement UUID: 523f8d33-0ca4-4251-914f-79b28bfed7a9\n")
-        f_out.write("0.000000 Start of measurement\n")
-        
-        # 逐行读取并转换
-        for line in f_in:
-            if line.strip() and not line.startswith(';'):  # 跳过空行和注释行
-                try:
-                    # 解析原始数据
-                    parts = line.strip().split()
-                    if len(parts) >= 4:  # 确保有足够的部分
-                        # 处理带括号的时间戳
-                        timestamp = float(parts[0].strip('()'))
-                        timestamp = timestamp - 1742452373
-
-                        #if parts[2] in["18FEE81C", "18FEF31C", "18FEF41C", "18FEF61C"] :#"18FEE61C", "18FEE71C",
-                        if len(parts[2]) == 3:
-                            can_id = parts[2]
-                        else:
-                            can_id = parts[2] + 'x'  # can0 之后的ID
-                        can_id_hex = parts[2]
-                        can_id_dec = str(int(can_id_hex, 16))
-
-                        # 跳过 [8] 部分，获取数据
-                        length_str = parts[3].strip('[]')  # 移除方括号
-                        data_length = int(length_str)
-
-                        data_start = line.find(']') + 1
-                        data = line[data_start:].strip()
-                    
-                        # 转换为标准ASC格式：时间戳 通道 ID Rx/Tx d 长度 数据
-                        formatted_line = f"   {timestamp:.6f} 1  {can_id:<15} Tx   d {data_length} {data}\n"#   Length = 475789 BitCount = 123 ID = {can_id_dec}x\n"
-                        f_out.write(formatted_line)
-                except Exception as e:
-                    print(f"Error processing line: {line.strip()}")
-                    print(f"Error details: {str(e)}")
-
-# 使用示例
-input_file = "P_D2701_nav.asc"
-output_file = input_file.replace(".asc", "_converted.asc")
-convert_can_dump_to_asc(input_file, output_file)
\ No newline at end of file
+"""
+candump 文本 -> Vector ASC
+
+输入每行一帧，例如：
+     (1745775054.129569)  can0  18FEE61C   [8]  5B 00 00 00 1D FC 00 00
+按块读取（BLOCK_SIZE），整块在字节层面按行切分、每行 bytes.split 一次，不解码为 str；
+CAN ID、长度和每一秒的时间戳前缀都只转换一次并缓存，输出先在内存中拼接，每块只写一次。
+时间戳按整数计算，不经过 float，不会有舍入误差。
+无法解析的行只计数（保留前几行作为示例），最后汇总打印一次。
+大文件可指定 workers，按行切分为多段在进程池中并行转换。
+
+FrameFilter 按 ID（单个 ID 或区间，包含 / 排除）和时间窗口筛选帧：
+转换时先按 ID 判断（结果随 ID 缓存），被排除的帧不再解析时间戳和数据；时间窗口按整秒判断，只有窗口边界所在的秒逐帧比较。
+bus_statistics 单次遍历统计每个 ID 的帧数、周期、抖动、丢帧和总线负载。
+"""
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+BLOCK_SIZE = 16 << 20
+ERROR_SAMPLES = 5
+MIN_SHARD_SIZE = 8 << 20  # 每段至少 8MB，文件太小时不值得开进程
+
+ASC_HEADER = (b"date Mon Jan 1 00:00:00.000 2024\n"
+              b"base hex  timestamps absolute\n"
+              b"internal events logged\n"
+              b"// version 13.0.0\n"
+              b"// Measurement UUID: 523f8d33-0ca4-4251-914f-79b28bfed7a9\n"
+              b"0.000000 Start of measurement\n")
+
+_UNSET = object()  # 新的一秒，时间戳前缀尚未计算
+
+
+def _id_range(item):
+    """ID、(起, 止) 或 '18FEF31C' / '200-2FF'（十六进制）-> (起, 止) 闭区间"""
+    if isinstance(item, str):
+        lo, _, hi = item.strip().partition('-')
+        return int(lo, 16), int(hi or lo, 16)
+    if isinstance(item, (tuple, list)):
+        return int(item[0]), int(item[1])
+    return int(item), int(item)
+
+
+class FrameFilter:
+    """
+    :param include: 只保留的 ID，元素为 ID、(起, 止) 闭区间或十六进制字符串（'200'、'200-2FF'）；None 表示全部
+    :param exclude: 排除的 ID，格式同 include，优先于 include
+    :param start, end: 时间窗口 [start, end)，单位秒，与 candump 中的时间戳相同（未减 epoch_offset）
+    """
+
+    def __init__(self, include=None, exclude=None, start=None, end=None):
+        self.include = None if include is None else [_id_range(item) for item in include]
+        self.exclude = [_id_range(item) for item in exclude or []]
+        self.start_us = None if start is None else round(float(start) * 1000000)
+        self.end_us = None if end is None else round(float(end) * 1000000)
+
+    def accept_id(self, can_id):
+        if self.include is not None and not any(lo <= can_id <= hi for lo, hi in self.include):
+            return False
+        return not any(lo <= can_id <= hi for lo, hi in self.exclude)
+
+    def accept_time(self, us):
+        return (self.start_us is None or us >= self.start_us) and (self.end_us is None or us < self.end_us)
+
+    def second_span(self, seconds):
+        """整秒 [seconds, seconds + 1) 与时间窗口的关系：True 全在窗口内，False 全在窗口外，None 需逐帧判断"""
+        lo, hi = seconds * 1000000, (seconds + 1) * 1000000
+        if (self.start_us is not None and hi <= self.start_us) or (self.end_us is not None and lo >= self.end_us):
+            return False
+        if (self.start_us is None or lo >= self.start_us) and (self.end_us is None or hi <= self.end_us):
+            return True
+        return None
+
+    def mask(self, frames):
+        """帧数组（见 can_log）中符合条件的帧"""
+        can_id = frames['can_id']
+        keep = np.ones(len(can_id), dtype=bool)
+        if self.include is not None:
+            keep &= np.any([(can_id >= lo) & (can_id <= hi) for lo, hi in self.include], axis=0)
+        for lo, hi in self.exclude:
+            keep &= (can_id < lo) | (can_id > hi)
+        if self.start_us is not None:
+            keep &= frames['timestamp_us'] >= self.start_us
+        if self.end_us is not None:
+            keep &= frames['timestamp_us'] < self.end_us
+        return keep
+
+
+def _format_time(us):
+    """整数微秒 -> b'秒.微秒'"""
+    if us < 0:
+        return b'-%d.%06d' % divmod(-us, 1000000)
+    return b'%d.%06d' % divmod(us, 1000000)
+
+
+def _id_text(can_id, frame_filter=None):
+    """标准帧 ID（3 位）原样输出，扩展帧 ID 加 x，左对齐到 15 列；被筛除的 ID 返回 b''"""
+    value = int(can_id, 16)  # 校验是十六进制，否则抛 ValueError
+    if frame_filter is not None and not frame_filter.accept_id(value):
+        return b''
+    return b'%-15s' % (can_id if len(can_id) == 3 else can_id + b'x')
+
+
+def _length_text(length):
+    """b'[8]' -> b'8'"""
+    if length[:1] != b'[' or length[-1:] != b']':
+        raise ValueError(f"bad length {length!r}")
+    return b'%d' % int(length[1:-1])
+
+
+def _new_state(offset_us, frame_filter=None):
+    return {'offset_us': offset_us, 'filter': frame_filter, 'last_seconds': None, 'prefix': _UNSET, 'span': True,
+            'ids': {}, 'lengths': {}, 'filtered': 0, 'errors': 0, 'samples': []}
+
+
+def _convert_lines(lines, state, output):
+    """
+    转换一批行，结果追加到 output
+    :param state: 见 _new_state，跨块复用
+    """
+    offset_us = state['offset_us']
+    frame_filter = state['filter']
+    last_seconds = state['last_seconds']
+    prefix = state['prefix']
+    span = state['span']
+    ids = state['ids']
+    lengths = state['lengths']
+    filtered = 0
+    append = output.append
+    for line in lines:
+        # (秒.小数) 接口 ID [长度] 数据
+        parts = line.split(None, 4)
+        try:
+            if len(parts) == 5:
+                stamp, _, can_id, length, data = parts
+            else:
+                stamp, _, can_id, length = parts
+                data = b''
+            # 先按 ID 筛选，被排除的帧不再解析其它字段
+            id_text = ids.get(can_id)
+            if id_text is None:
+                id_text = ids[can_id] = _id_text(can_id, frame_filter)
+            if not id_text:
+                filtered += 1
+                continue
+            if stamp[:1] != b'(' or stamp[-1:] != b')':
+                raise ValueError(f"bad timestamp {stamp!r}")
+            seconds, _, fraction = stamp[1:-1].partition(b'.')
+            if seconds != last_seconds:
+                span = True if frame_filter is None else frame_filter.second_span(int(seconds))
+                prefix = _UNSET
+                last_seconds = seconds
+            if span is not True:
+                if span is False or not frame_filter.accept_time(
+                        int(seconds) * 1000000 + int((fraction + b'000000')[:6])):
+                    filtered += 1
+                    continue
+            if prefix is _UNSET:
+                if offset_us is None:
+                    offset_us = state['offset_us'] = int(seconds) * 1000000
+                # 同一秒内的帧共用时间戳的整数部分：偏移为整秒且结果非负时直接拼接原始的 6 位小数
+                whole, rest = divmod(offset_us, 1000000)
+                relative = int(seconds) - whole
+                prefix = b'%d.' % relative if rest == 0 and relative >= 0 else None
+            if prefix is not None and len(fraction) == 6 and fraction.isdigit():
+                time_text = prefix + fraction
+            else:
+                # 小数不足 6 位补 0、超过 6 位截断；偏移不是整秒或结果为负时按整数微秒计算
+                us = int(seconds) * 1000000 + int((fraction + b'000000')[:6])
+                time_text = _format_time(us - offset_us)
+            length_text = lengths.get(length)
+            if length_text is None:
+                length_text = lengths[length] = _length_text(length)
+        except ValueError:
+            stripped = line.strip()
+            if stripped and not stripped.startswith(b';'):  # 跳过空行和注释行
+                state['errors'] += 1
+                if len(state['samples']) < ERROR_SAMPLES:
+                    state['samples'].append(stripped)
+            continue
+        # 转换为标准ASC格式：时间戳 通道 ID Rx/Tx d 长度 数据
+        append(b'   %s 1  %s Tx   d %s %s\n' % (time_text, id_text, length_text, data.rstrip()))
+    state['last_seconds'] = last_seconds
+    state['prefix'] = prefix
+    state['span'] = span
+    state['filtered'] += filtered
+
+
+def _convert_range(input_file, output_file, start, end, offset_us, block_size=BLOCK_SIZE, header=b'',
+                   frame_filter=None):
+    """
+    转换 input_file 的字节区间 [start, end)（起止均在行首）并写入 output_file
+    :return: {'frames', 'filtered', 'errors', 'samples', 'offset_us'}
+    """
+    state = _new_state(offset_us, frame_filter)
+    frames = 0
+    with open(input_file, 'rb') as f_in, open(output_file, 'wb') as f_out:
+        f_out.write(header)
+        f_in.seek(start)
+        remaining = end - start
+        remainder = b''
+        while True:
+            block = f_in.read(min(block_size, remaining))
+            remaining -= len(block)
+            if not block and not remainder:
+                break
+            lines = (remainder + block).split(b'\n')
+            # 最后一段可能是不完整的行，留到下一块；区间结束时全部处理
+            remainder = lines.pop() if block else b''
+            output = []
+            _convert_lines(lines, state, output)
+            f_out.write(b''.join(output))
+            frames += len(output)
+    return {'frames': frames, 'filtered': state['filtered'], 'errors': state['errors'], 'samples': state['samples'],
+            'offset_us': state['offset_us']}
+
+
+def _line_ranges(input_file, count):
+    """把文件按字节均分为 count 段，切分点对齐到下一行行首"""
+    size = os.path.getsize(input_file)
+    bounds = [0]
+    with open(input_file, 'rb') as f:
+        for i in range(1, count):
+            f.seek(max(size * i // count, bounds[-1]))
+            f.readline()
+            pos = f.tell()
+            if pos >= size:
+                break
+            if pos > bounds[-1]:
+                bounds.append(pos)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _first_offset(input_file, frame_filter=None):
+    """第一个输出帧时间戳的整数秒（微秒），用于 epoch_offset='auto' 时各分片使用相同的偏移"""
+    state = _new_state(None, frame_filter)
+    with open(input_file, 'rb') as f:
+        for line in f:
+            _convert_lines([line], state, [])
+            if state['offset_us'] is not None:
+                break
+    return state['offset_us']
+
+
+def convert_can_dump_to_asc(input_file, output_file, epoch_offset='auto', workers=1, block_size=BLOCK_SIZE,
+                            frame_filter=None):
+    """
+    :param epoch_offset: 从时间戳中减去的秒数；'auto' 取第一个输出帧时间戳的整数秒（该帧从 0.xxxxxx 开始）
+    :param workers: 进程数；大于 1 时文件按行切分为多段并行转换，再按顺序拼接
+    :param block_size: 每次读取的字节数
+    :param frame_filter: FrameFilter，None 则转换全部帧
+    :return: {'frames': 转换的帧数, 'filtered': 被筛除的帧数, 'errors': 无法解析的行数, 'epoch_offset': 实际使用的偏移(秒)}
+    """
+    offset_us = None if epoch_offset == 'auto' else round(float(epoch_offset) * 1000000)
+    size = os.path.getsize(input_file)
+    shard_count = max(1, min(workers, size // MIN_SHARD_SIZE))
+    if shard_count == 1:
+        results = [_convert_range(input_file, output_file, 0, size, offset_us, block_size, ASC_HEADER, frame_filter)]
+    else:
+        if offset_us is None:
+            offset_us = _first_offset(input_file, frame_filter)
+        ranges = _line_ranges(input_file, shard_count)
+        part_files = [f"{output_file}.part{i}" for i in range(len(ranges))]
+        try:
+            with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+                results = list(executor.map(_convert_range, [input_file] * len(ranges), part_files,
+                                            [start for start, _ in ranges], [end for _, end in ranges],
+                                            [offset_us] * len(ranges), [block_size] * len(ranges),
+                                            [b''] * len(ranges), [frame_filter] * len(ranges)))
+            with open(output_file, 'wb') as f_out:
+                f_out.write(ASC_HEADER)
+                for part_file in part_files:
+                    with open(part_file, 'rb') as f_part:
+                        shutil.copyfileobj(f_part, f_out, block_size)
+        finally:
+            for part_file in part_files:
+                if os.path.exists(part_file):
+                    os.remove(part_file)
+
+    errors = sum(r['errors'] for r in results)
+    if errors:
+        print(f"{input_file}: {errors} lines could not be parsed, e.g.:")
+        for sample in [s for r in results for s in r['samples']][:ERROR_SAMPLES]:
+            print(f"    {sample.decode(errors='replace')}")
+    offset_us = results[0]['offset_us'] if offset_us is None else offset_us
+    return {'frames': sum(r['frames'] for r in results), 'filtered': sum(r['filtered'] for r in results),
+            'errors': errors,
+            'epoch_offset': None if offset_us is None else offset_us / 1000000}
+
+
+# ---------------- 总线统计 ----------------
+
+STAT_COLUMNS = [('can_id', np.uint32), ('extended', bool), ('frames', np.int64), ('mean_period_ms', np.float64),
+                ('jitter_ms', np.float64), ('max_gap_ms', np.float64), ('missing', np.int64),
+                ('load_percent', np.float64)]
+
+
+def frame_bits(dlc, extended):
+    """每帧占用的位数：标准帧 47 + 8 * DLC，扩展帧 67 + 8 * DLC（含帧间隔，不含位填充）"""
+    return np.where(extended, 67, 47) + 8 * dlc.astype(np.int64)
+
+
+def bus_statistics(input_file, frame_filter=None, bitrate=500000, gap_factor=1.5):
+    """
+    单次遍历统计每个 ID 的帧数、周期和负载，不需要先转换为 ASC
+    名义周期取相邻两帧间隔的中位数，间隔超过 gap_factor 倍名义周期时按 round(间隔 / 名义周期) - 1 计丢帧；
+    负载不含位填充，实际值略高
+    :param input_file: candump 文本或 .canb
+    :param frame_filter: FrameFilter，只统计符合条件的帧
+    :param bitrate: 总线波特率（bit/s）
+    :return: {'table': 每个 ID 一行的列 dict, 'frames': 帧数, 'duration_s': 时长, 'bus_load': 总线负载 %}
+    """
+    from can_log import select_frames
+    from can_store import iter_can_frames
+
+    intervals, last, counts, bits = {}, {}, {}, {}
+    t_min, t_max = None, None
+    start_us, end_us = (frame_filter.start_us, frame_filter.end_us) if frame_filter else (None, None)
+    for frames in iter_can_frames(input_file, start_us, end_us):
+        if frame_filter is not None:
+            frames = select_frames(frames, frame_filter.mask(frames))
+        if not len(frames['timestamp_us']):
+            continue
+        stamps = frames['timestamp_us']
+        t_min = stamps.min() if t_min is None else min(t_min, stamps.min())
+        t_max = stamps.max() if t_max is None else max(t_max, stamps.max())
+        # 按 ID 稳定排序，每个 ID 一段（保持时间顺序），与上一块该 ID 的最后一帧相接
+        keys = frames['can_id'].astype(np.int64) | (frames['extended'].astype(np.int64) << 32)
+        order = np.argsort(keys, kind='stable')
+        keys, stamps = keys[order], stamps[order]
+        sizes = frame_bits(frames['dlc'][order], frames['extended'][order])
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        segment_bits = np.add.reduceat(sizes, starts)
+        for lo, hi, segment_bit in zip(starts, np.r_[starts[1:], len(keys)], segment_bits):
+            key = int(keys[lo])
+            segment = stamps[lo:hi]
+            previous = last.get(key)
+            intervals.setdefault(key, []).append(np.diff(segment) if previous is None
+                                                 else np.diff(segment, prepend=previous))
+            last[key] = segment[-1]
+            counts[key] = counts.get(key, 0) + hi - lo
+            bits[key] = bits.get(key, 0) + int(segment_bit)
+
+    keys = sorted(counts)
+    duration_s = (t_max - t_min) / 1e6 if keys else 0.0
+    capacity = bitrate * duration_s
+    rows = []
+    for key in keys:
+        diffs = np.concatenate(intervals[key]) / 1000.0
+        if len(diffs):
+            nominal = np.median(diffs)
+            gaps = diffs[diffs > gap_factor * nominal] if nominal > 0 else diffs[:0]
+            period = (diffs.mean(), diffs.std(), diffs.max(), int(np.sum(np.rint(gaps / nominal) - 1)))
+        else:
+            period = (np.nan, np.nan, np.nan, 0)
+        load = 100.0 * bits[key] / capacity if capacity else np.nan
+        rows.append((key & 0xFFFFFFFF, bool(key >> 32), counts[key]) + period + (load,))
+    table = {name: np.array([row[i] for row in rows], dtype=dtype) for i, (name, dtype) in enumerate(STAT_COLUMNS)}
+    total_bits = sum(bits.values())
+    return {'table': table, 'frames': int(table['frames'].sum()), 'duration_s': duration_s,
+            'bus_load': 100.0 * total_bits / capacity if capacity else float('nan')}
+
+
+def print_statistics(statistics):
+    table = statistics['table']
+    print(f"{'id':>10}{'frames':>10}{'period(ms)':>12}{'jitter(ms)':>12}{'max gap(ms)':>13}{'missing':>9}{'load%':>8}")
+    for i in range(len(table['can_id'])):
+        can_id = f"{table['can_id'][i]:08X}" if table['extended'][i] else f"{table['can_id'][i]:03X}"
+        print(f"{can_id:>10}{table['frames'][i]:>10}{table['mean_period_ms'][i]:>12.3f}{table['jitter_ms'][i]:>12.3f}"
+              f"{table['max_gap_ms'][i]:>13.3f}{table['missing'][i]:>9}{table['load_percent'][i]:>8.2f}")
+    print(f"{statistics['frames']} frames in {statistics['duration_s']:.3f}s, bus load {statistics['bus_load']:.2f}%")
+
+
+if __name__ == "__main__":
+    # 使用示例
+    input_file = "P_D2701_nav.asc"
+    output_file = input_file.replace(".asc", "_converted.asc")
+    # 原来固定减去 1742452373，现在默认以第一帧为 0；需要与旧输出对齐时指定 epoch_offset=1742452373
+    print(convert_can_dump_to_asc(input_file, output_file))
+    # 只转换导航报文，并统计各 ID 的周期与总线负载
+    nav_filter = FrameFilter(include=['18FEE61C', '18FEE71C', '18FEF31C'])
+    print(convert_can_dump_to_asc(input_file, input_file.replace(".asc", "_nav.asc"), frame_filter=nav_filter))
+    print_statistics(bus_statistics(input_file))
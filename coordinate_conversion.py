@@ -1,31 +1,145 @@
+"""
+雷达点云 极坐标 -> 直角坐标
+
+角度约定与原脚本一致：
+    azimuth   方位角(度)，0~360，顺时针为正（转换时取负，350° 与 -10° 等价，不需要单独处理 0/360 跨越）
+    elevation 天顶角(度)，90 为水平
+    range     距离(米)
+x 向前，y 向左，z 向上。可同时把雷达坐标系下的点用外参转换到车辆坐标系。
+
+一帧点云（数万个点）整列一次计算，float32 / float64 可选，
+PolarConverter 复用内部缓冲区，并可把结果直接写入调用方预先分配的 (N, 3) 数组。
+"""
 import math
-azimuth_list = [0.7, 0.3, 0.8, 0.2, 359.8]
-elevation_list = [90.2, 90.2, 89.7, 89.7, 89.7]
-range_list = [43.0, 42.1, 40.8, 40.8, 40.8]
-
-
-for azimuth, elevation, range in zip(azimuth_list, elevation_list, range_list):
-    if azimuth < 180:
-        m_azimuth = - azimuth * math.pi / 180.0
-    else:
-        m_azimuth = (360.0 - azimuth) * math.pi / 180.0
-
-    # if azimuth < 180:
-    #     m_azimuth = azimuth * math.pi / 180.0
-    # else:
-    #     m_azimuth = (azimuth - 360.0) * math.pi / 180.0
-
-    m_elevation = (90.0 - elevation) * math.pi / 180.0
-
-    x = range * math.cos(m_elevation) * math.cos(m_azimuth)
-    y = range * math.cos(m_elevation) * math.sin(m_azimuth)
-    z = range * math.sin(m_elevation)
-    print(f'x: {x}, y: {y}, z: {z}')
-
-# echo "-0.00154847 -0.0000597069" | cs2cs +proj=longlat +datum=WGS84 +to +proj=utm +zone=30 +datum=WGS84
-# echo "-0.00130053 -0.00302225" | cs2cs +proj=longlat +datum=WGS84 +to +proj=utm +zone=30 +datum=WGS84
-x=44.796974
-y=0.121964
-z=-0.860096
-dist = math.sqrt(x**2 + y**2 + z**2)
-print(f'dist: {dist}')
\ No newline at end of file
+import numpy as np
+
+
+class Extrinsics:
+    """传感器外参：车辆坐标 = rotation @ 传感器坐标 + translation"""
+
+    def __init__(self, rotation=None, translation=(0.0, 0.0, 0.0)):
+        self.rotation = np.eye(3) if rotation is None else np.asarray(rotation, dtype=np.float64)
+        self.translation = np.asarray(translation, dtype=np.float64)
+
+    @classmethod
+    def from_euler(cls, yaw=0.0, pitch=0.0, roll=0.0, x=0.0, y=0.0, z=0.0):
+        """
+        由安装角（度，按 Z-Y-X 即 yaw-pitch-roll 顺序）和安装位置（米）构造
+        """
+        cy, sy = math.cos(math.radians(yaw)), math.sin(math.radians(yaw))
+        cp, sp = math.cos(math.radians(pitch)), math.sin(math.radians(pitch))
+        cr, sr = math.cos(math.radians(roll)), math.sin(math.radians(roll))
+        rotation = np.array([
+            [cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr],
+            [sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr],
+            [-sp,     cp * sr,                cp * cr],
+        ])
+        return cls(rotation, (x, y, z))
+
+
+class PolarConverter:
+    """
+    批量极坐标转换，用法：
+        converter = PolarConverter(Extrinsics.from_euler(yaw=1.5, x=3.6, z=0.5), dtype=np.float32)
+        points = converter.convert(azimuth, elevation, range_)        # (N, 3)
+        converter.convert(azimuth, elevation, range_, out=buffer)     # 写入预分配的数组
+    """
+
+    def __init__(self, extrinsics=None, dtype=np.float64, clockwise=True, zenith=True):
+        """
+        :param extrinsics: Extrinsics，None 则输出雷达坐标系
+        :param dtype: 计算和输出的精度，np.float32 / np.float64
+        :param clockwise: 方位角顺时针为正（原脚本的约定）；False 为逆时针
+        :param zenith: elevation 为天顶角（90 为水平）；False 为仰角（0 为水平）
+        """
+        self.dtype = np.dtype(dtype)
+        self.extrinsics = extrinsics
+        self.clockwise = clockwise
+        self.zenith = zenith
+        if extrinsics is not None:
+            self.rotation = extrinsics.rotation.astype(self.dtype)
+            self.translation = extrinsics.translation.astype(self.dtype)
+        self._scratch = np.empty((4, 0), dtype=self.dtype)
+
+    def _buffers(self, count):
+        """四个连续的临时缓冲区，点数超过容量时才重新分配"""
+        if self._scratch.shape[1] < count:
+            self._scratch = np.empty((4, count), dtype=self.dtype)
+        return [self._scratch[i, :count] for i in range(4)]
+
+    def convert(self, azimuth, elevation, range_, out=None):
+        """
+        :param azimuth, elevation, range_: 长度为 N 的数组（度、度、米）
+        :param out: 预分配的 (N, 3) 数组，dtype 与转换器一致；None 则新建
+        :return: (N, 3) 的 x, y, z
+        """
+        dtype = self.dtype
+        azimuth = np.asarray(azimuth, dtype=dtype)
+        elevation = np.asarray(elevation, dtype=dtype)
+        range_ = np.asarray(range_, dtype=dtype)
+        count = len(range_)
+        if out is None:
+            out = np.empty((count, 3), dtype=dtype)
+        elif out.shape != (count, 3) or out.dtype != dtype:
+            raise ValueError(f"out must be a ({count}, 3) {dtype} array, got {out.shape} {out.dtype}")
+
+        az, el, horizontal, tmp = self._buffers(count)
+        np.radians(azimuth, out=az)
+        if self.clockwise:
+            np.negative(az, out=az)
+        np.radians(elevation, out=el)
+        if self.zenith:
+            np.subtract(dtype.type(math.pi / 2), el, out=el)
+
+        # 水平投影距离 r*cos(el)
+        np.cos(el, out=horizontal)
+        horizontal *= range_
+        # 先算雷达坐标系下的 x, y, z，放入 az / horizontal / el 所在的缓冲区，避免额外分配
+        np.sin(el, out=el)
+        el *= range_                                       # z
+        np.sin(az, out=tmp)
+        tmp *= horizontal                                  # y
+        np.cos(az, out=az)
+        az *= horizontal                                   # x
+        x, y, z = az, tmp, el
+
+        if self.extrinsics is None:
+            out[:, 0] = x
+            out[:, 1] = y
+            out[:, 2] = z
+            return out
+
+        # 同一遍中应用外参：out = R @ p + t
+        R, t = self.rotation, self.translation
+        for i in range(3):
+            column = out[:, i]
+            np.multiply(x, R[i, 0], out=horizontal)
+            column[:] = horizontal
+            np.multiply(y, R[i, 1], out=horizontal)
+            column += horizontal
+            np.multiply(z, R[i, 2], out=horizontal)
+            column += horizontal
+            column += t[i]
+        return out
+
+
+def polar_to_cartesian(azimuth, elevation, range_, extrinsics=None, dtype=np.float64, out=None):
+    """一次性转换，见 PolarConverter.convert"""
+    return PolarConverter(extrinsics, dtype).convert(azimuth, elevation, range_, out)
+
+
+if __name__ == "__main__":
+    azimuth_list = [0.7, 0.3, 0.8, 0.2, 359.8]
+    elevation_list = [90.2, 90.2, 89.7, 89.7, 89.7]
+    range_list = [43.0, 42.1, 40.8, 40.8, 40.8]
+
+    for x, y, z in polar_to_cartesian(azimuth_list, elevation_list, range_list):
+        print(f'x: {x}, y: {y}, z: {z}')
+
+    # echo "-0.00154847 -0.0000597069" | cs2cs +proj=longlat +datum=WGS84 +to +proj=utm +zone=30 +datum=WGS84
+    # echo "-0.00130053 -0.00302225" | cs2cs +proj=longlat +datum=WGS84 +to +proj=utm +zone=30 +datum=WGS84
+    x=44.796974
+    y=0.121964
+    z=-0.860096
+    dist = math.sqrt(x**2 + y**2 + z**2)
+    print(f'dist: {dist}')
@@ -1,13 +1,105 @@
-from pyproj import CRS, Geod, Transformer
+from functools import lru_cache
 import numpy as np
 
+import geodesy
+
 # 参考点经纬度
 base_lat, base_lon, base_alt = 36.5653323, 119.1605849, 0
 
+# 下面的转换均由 geodesy（纯 NumPy）计算，与 pyproj 的差异在微米以下；
+# 需要其它坐标系时可用 get_transformer 获取 pyproj 转换器
+
+
+# ---------------- pyproj 转换器缓存 ----------------
+# 创建 CRS / Transformer 的耗时远大于单点转换，按 (源, 目标, 椭球, 中央子午线) 缓存复用
+
+# pyproj 中对应的椭球名
+_PROJ_ELLPS = {'CGCS2000': 'GRS80', 'Beijing54': 'krass'}
+
+
+def _crs(name, ellps, central_meridian):
+    """
+    :param name: 'wgs84'（经纬度）/ 'wgs84_3d'（经纬度+椭球高）/ 'ecef'（地心地固）/ 'gauss'（高斯投影）
+    """
+    from pyproj import CRS
+
+    if name == 'wgs84':
+        return CRS.from_epsg(4326)
+    if name == 'wgs84_3d':
+        return CRS.from_epsg(4979)
+    if name == 'ecef':
+        return CRS.from_epsg(4978)
+    if name == 'gauss':
+        return CRS(proj='tmerc', ellps=_PROJ_ELLPS.get(ellps, ellps), lat_0=0, lon_0=central_meridian, x_0=500000, k=1)
+    raise ValueError(f"unknown coordinate system: {name}")
+
+
+@lru_cache(maxsize=64)
+def get_transformer(src, dst, ellps='WGS84', central_meridian=None):
+    """
+    获取（缓存的）pyproj Transformer，坐标顺序为 (经度, 纬度)
+    :param src: 源坐标系，见 _crs
+    :param dst: 目标坐标系
+    :param ellps: 高斯投影的椭球体('WGS84'/'CGCS2000'/'Beijing54')
+    :param central_meridian: 高斯投影的中央子午线(度)
+    """
+    from pyproj import Transformer
+
+    return Transformer.from_crs(_crs(src, ellps, central_meridian), _crs(dst, ellps, central_meridian), always_xy=True)
+
+
+def _output(values, scalar):
+    """标量输入返回 float，数组输入返回 ndarray"""
+    if scalar:
+        return tuple(float(np.ravel(v)[0]) for v in values)
+    return tuple(values)
+
+
+class LocalFrame:
+    """
+    以 (lat0, lon0, alt0) 为原点的 ENU (East-North-Up) 局部坐标系
+    原点的 ECEF 坐标和旋转矩阵只在创建时计算一次，转换函数均支持 NumPy 数组
+    """
+
+    def __init__(self, lat0=base_lat, lon0=base_lon, alt0=base_alt, ellps='WGS84'):
+        self.lat0, self.lon0, self.alt0 = lat0, lon0, alt0
+        self.ellps = ellps
+        self.origin = np.array(geodesy.geodetic_to_ecef(lon0, lat0, alt0, ellps))
+        # ECEF -> ENU 的旋转矩阵，ENU -> ECEF 为其转置
+        self.rotation = geodesy.enu_rotation(lat0, lon0)
+
+    def ecef_to_enu(self, x, y, z):
+        diff = np.array([np.asarray(x, dtype=float) - self.origin[0],
+                         np.asarray(y, dtype=float) - self.origin[1],
+                         np.asarray(z, dtype=float) - self.origin[2]])
+        return tuple(np.tensordot(self.rotation, diff, axes=1))
+
+    def enu_to_ecef(self, e, n, u):
+        enu = np.array([np.asarray(e, dtype=float), np.asarray(n, dtype=float), np.asarray(u, dtype=float)])
+        dx, dy, dz = np.tensordot(self.rotation.T, enu, axes=1)
+        return self.origin[0] + dx, self.origin[1] + dy, self.origin[2] + dz
+
+    def to_enu(self, lon, lat, alt=0):
+        """WGS84 (经纬度+高程) -> ENU"""
+        x, y, z = geodesy.geodetic_to_ecef(lon, lat, alt, self.ellps)
+        return self.ecef_to_enu(x, y, z)
+
+    def to_wgs84(self, e, n, u=0):
+        """ENU -> WGS84，返回 (lon, lat, alt)"""
+        x, y, z = self.enu_to_ecef(e, n, np.broadcast_to(u, np.shape(e)))
+        return geodesy.ecef_to_geodetic(x, y, z, self.ellps)
+
+
+@lru_cache(maxsize=16)
+def get_local_frame(lat0, lon0, alt0):
+    """获取（缓存的）LocalFrame"""
+    return LocalFrame(lat0, lon0, alt0)
+
+
 def enu_to_wgs84(e, n, u, lat0=base_lat, lon0=base_lon, alt0=base_alt):
     """
     ENU (East-North-Up) 局部坐标转 WGS84 (经纬度+高程)
-    :param e: 东向坐标（米）
+    :param e: 东向坐标（米），可以是数组
     :param n: 北向坐标（米）
     :param u: 天向坐标（米）
     :param lat0: 原点纬度
@@ -15,33 +107,13 @@ def enu_to_wgs84(e, n, u, lat0=base_lat, lon0=base_lon, alt0=base_alt):
     :param alt0: 原点高程
     :return: (lon, lat, alt) 经度、纬度、高程
     """
-    # 1. 原点WGS84 → ECEF
-    transformer = Transformer.from_crs("epsg:4979", "epsg:4978", always_xy=True)
-    x0, y0, z0 = transformer.transform(lon0, lat0, alt0)
-
-    # 2. ENU → ECEF
-    lam = np.radians(lon0)
-    phi = np.radians(lat0)
-    R = np.array([
-        [-np.sin(lam),              -np.sin(phi)*np.cos(lam),  np.cos(phi)*np.cos(lam)],
-        [ np.cos(lam),              -np.sin(phi)*np.sin(lam),  np.cos(phi)*np.sin(lam)],
-        [           0,                        np.cos(phi),              np.sin(phi)]
-    ])
-    enu = np.array([e, n, u])
-    dx, dy, dz = R @ enu
-    x = x0 + dx
-    y = y0 + dy
-    z = z0 + dz
-
-    # 3. ECEF → WGS84
-    transformer_back = Transformer.from_crs("epsg:4978", "epsg:4979", always_xy=True)
-    lon, lat, alt = transformer_back.transform(x, y, z)
-    return lon, lat, alt
+    lon, lat, alt = get_local_frame(lat0, lon0, alt0).to_wgs84(e, n, u)
+    return _output((lon, lat, alt), np.ndim(e) == 0)
 
 def wgs84_to_enu(lon, lat, alt, lat0, lon0, alt0):
     """
     WGS84 (经纬度+高程) 转 ENU (East-North-Up) 局部坐标
-    :param lon: 目标点经度
+    :param lon: 目标点经度，可以是数组
     :param lat: 目标点纬度
     :param alt: 目标点高程
     :param lat0: 原点纬度
@@ -49,131 +121,113 @@ def wgs84_to_enu(lon, lat, alt, lat0, lon0, alt0):
     :param alt0: 原点高程
     :return: (e, n, u) 东北天坐标
     """
-    # 1. WGS84 -> ECEF
-    transformer = Transformer.from_crs("epsg:4979", "epsg:4978", always_xy=True)
-    x, y, z = transformer.transform(lon, lat, alt)
-    x0, y0, z0 = transformer.transform(lon0, lat0, alt0)
-
-    # 2. ECEF -> ENU
-    # 计算旋转矩阵
-    lam = np.radians(lon0)
-    phi = np.radians(lat0)
-    R = np.array([
-        [-np.sin(lam),              np.cos(lam),             0],
-        [-np.sin(phi)*np.cos(lam), -np.sin(phi)*np.sin(lam), np.cos(phi)],
-        [np.cos(phi)*np.cos(lam),  np.cos(phi)*np.sin(lam),  np.sin(phi)]
-    ])
-    diff = np.array([x - x0, y - y0, z - z0])
-    enu = R @ diff
-    return enu[0], enu[1], enu[2]
+    e, n, u = get_local_frame(lat0, lon0, alt0).to_enu(lon, lat, alt)
+    return _output((e, n, u), np.ndim(lon) == 0)
+
+
+def gauss_zone(lon, zone_width=6):
+    """
+    经度所在的投影带
+    :param lon: 经度(度)，可以是数组
+    :param zone_width: 分带宽度(3或6度)
+    :return: (带号, 中央子午线经度)
+    """
+    lon = np.asarray(lon, dtype=float)
+    if zone_width == 6:
+        zone_number = np.where(lon >= 0, np.floor((lon + 6) / 6), np.trunc((lon + 6) / 6) + 1).astype(np.int64)
+        curv = zone_number * 6 - 3
+    else:  # 3度带
+        zone_number = np.trunc((lon + 1.5) / 3 + 0.5).astype(np.int64)
+        curv = zone_number * 3
+    return zone_number, curv
 
 
 def wgs84_to_gauss(lon, lat, zone_width=6, ellps='WGS84'):
     """
     将经纬度转换为高斯坐标（带带号）
-    :param lon: 经度(度)
+    :param lon: 经度(度)，可以是数组
     :param lat: 纬度(度)
     :param zone_width: 分带宽度(3或6度)
     :param ellps: 椭球体('WGS84'/'CGCS2000'/'Beijing54')
     :return: x_with_zone, y, curv: 带带号的x坐标(如20500001.23表示20带500001.23米), y坐标(米), 中央子午线经度(度)
     """
+    scalar = np.ndim(lon) == 0
+    lon = np.atleast_1d(np.asarray(lon, dtype=float))
+    lat = np.atleast_1d(np.asarray(lat, dtype=float))
     # 计算中央子午线
-    if zone_width == 6:
-        zone_number = int((lon + 6) / 6) if lon >=0 else int((lon + 6) / 6) + 1
-        curv = zone_number * 6 - 3
-    else:  # 3度带
-        zone_number = int((lon + 1.5) / 3 + 0.5)
-        curv = zone_number * 3
-    
-    # 创建坐标系
-    wgs84 = CRS.from_epsg(4326)
-    gauss_crs = CRS(
-        proj='tmerc',
-        ellps=ellps,
-        lat_0=0,
-        lon_0=curv,
-        x_0=500000,
-        k=1
-    )
-    
-    # 执行转换
-    transformer = Transformer.from_crs(wgs84, gauss_crs, always_xy=True)
-    x, y = transformer.transform(lon, lat)
-    
+    zone_number, curv = gauss_zone(lon, zone_width)
+
+    x, y = geodesy.gauss_forward(lon, lat, curv, ellps)
+
     # 添加带号(6度带前补2位，3度带前补1位)
     x_with_zone = zone_number * 1000000 + x
-    
+
+    if scalar:
+        return float(x_with_zone[0]), float(y[0]), int(curv[0])
     return x_with_zone, y, curv
 
 def gauss_to_wgs84(x_with_zone, y, curv=None, ellps='WGS84'):
     """
     将带带号的高斯坐标转换为经纬度
-    :param x_with_zone: 带带号的x坐标(如20500000表示20带500000米)
+    :param x_with_zone: 带带号的x坐标(如20500000表示20带500000米)，可以是数组
     :param y: y坐标
-    :param central_meridian: 中央子午线
+    :param curv: 中央子午线，None 时按带号计算；可以是数组，NaN 的元素按带号计算
     :param ellps: 椭球体模型
     :return: lon, lat: 经纬度(度)
     """
+    scalar = np.ndim(x_with_zone) == 0
+    x_with_zone = np.atleast_1d(np.asarray(x_with_zone, dtype=float))
+    y = np.atleast_1d(np.asarray(y, dtype=float))
+
     # 解析带号和实际x坐标
-    if x_with_zone > 10000000:  # 6度带
-        zone_number = int(x_with_zone // 1000000)
-        x = x_with_zone % 1000000
-        auto_curv = zone_number * 6 - 3  # 6度带公式
-    else:  # 3度带
-        zone_number = int(x_with_zone // 100000)
-        x = x_with_zone % 100000
-        auto_curv = zone_number * 3
-    
+    six_degree = x_with_zone > 10000000
+    zone_number = np.where(six_degree, x_with_zone // 1000000, x_with_zone // 100000).astype(np.int64)
+    x = np.where(six_degree, x_with_zone % 1000000, x_with_zone % 100000)
+    auto_curv = np.where(six_degree, zone_number * 6 - 3, zone_number * 3)
+
     # 使用手动指定的中央子午线或自动计算的
-    curv = curv if curv is not None else auto_curv
-    
-    # 创建坐标系
-    wgs84 = CRS.from_epsg(4326)
-    gauss_crs = CRS(
-        proj='tmerc',
-        ellps=ellps,
-        lat_0=0,
-        lon_0=curv,
-        x_0=500000,
-        k=1
-    )
-    
-    # 执行转换
-    transformer = Transformer.from_crs(gauss_crs, wgs84, always_xy=True)
-    lon, lat = transformer.transform(x, y)
-    
-    return lon, lat
-
-def gauss_to_enu(x, y, central_meridian, ellps='WGS84'):
-    lon, lat = gauss_to_wgs84(x, y, central_meridian)
-    e,n,u = wgs84_to_enu(lon, lat, 0, base_lat, base_lon, base_alt)
-    return e,n,u
-
-def enu_to_gauss(e, n, u):
-    lon, lat, alt = enu_to_wgs84(e, n, u)
+    if curv is None:
+        curv = auto_curv
+    else:
+        curv = np.broadcast_to(np.asarray(curv, dtype=float), x.shape)
+        curv = np.where(np.isnan(curv), auto_curv, curv)  # 数组中缺失（NaN）的按带号计算
+
+    lon, lat = geodesy.gauss_inverse(x, y, curv, ellps)
+    return _output((lon, lat), scalar)
+
+def gauss_to_enu(x, y, central_meridian, ellps='WGS84', lat0=base_lat, lon0=base_lon, alt0=base_alt):
+    """带带号的高斯坐标 -> ENU，支持数组（整条路径一次转换）"""
+    lon, lat = gauss_to_wgs84(x, y, central_meridian, ellps)
+    e, n, u = wgs84_to_enu(lon, lat, 0, lat0, lon0, alt0)
+    return e, n, u
+
+def enu_to_gauss(e, n, u, lat0=base_lat, lon0=base_lon, alt0=base_alt):
+    """ENU -> 带带号的高斯坐标，支持数组"""
+    lon, lat, alt = enu_to_wgs84(e, n, u, lat0, lon0, alt0)
     x, y, central_meridian = wgs84_to_gauss(lon, lat)
     return x, y, central_meridian
 
-x, y, central_meridian = enu_to_gauss(100, -160, 0)
-print(x, y, central_meridian)
+if __name__ == "__main__":
+    x, y, central_meridian = enu_to_gauss(100, -160, 0)
+    print(x, y, central_meridian)
 
-x, y, central_meridian = enu_to_gauss(100, -280, 0)
-print(x, y, central_meridian)
+    x, y, central_meridian = enu_to_gauss(100, -280, 0)
+    print(x, y, central_meridian)
 
-x, y, central_meridian = enu_to_gauss(230, -160, 0)
-print(x, y, central_meridian)
+    x, y, central_meridian = enu_to_gauss(230, -160, 0)
+    print(x, y, central_meridian)
 
-x, y, central_meridian = enu_to_gauss(230, -280, 0)
-print(x, y, central_meridian)
+    x, y, central_meridian = enu_to_gauss(230, -280, 0)
+    print(x, y, central_meridian)
 
-lon, lat, alt = enu_to_wgs84(10, 10, 0, base_lat, base_lon, base_alt)
-print(lon, lat, alt)
+    lon, lat, alt = enu_to_wgs84(10, 10, 0, base_lat, base_lon, base_alt)
+    print(lon, lat, alt)
 
-e_back,n_back, u_back = wgs84_to_enu(lon, lat, 0, base_lat, base_lon, base_alt)
-print(e_back,n_back, u_back)
+    e_back,n_back, u_back = wgs84_to_enu(lon, lat, 0, base_lat, base_lon, base_alt)
+    print(e_back,n_back, u_back)
 
-x, y, central_meridian = wgs84_to_gauss(lon, lat)
-print(x, y, central_meridian)
+    x, y, central_meridian = wgs84_to_gauss(lon, lat)
+    print(x, y, central_meridian)
 
-lon_back, lat_back = gauss_to_wgs84(20500006.2584,4048272.8532,119.15978492)
-print(lon_back, lat_back)
\ No newline at end of file
+    lon_back, lat_back = gauss_to_wgs84(20500006.2584,4048272.8532,119.15978492)
+    print(lon_back, lat_back)
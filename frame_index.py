@@ -0,0 +1,188 @@
+"""
+感知日志的帧索引：按时间戳或 seq 随机访问，不需要转换整个文件
+
+索引保存在日志旁的 <日志>.fidx.npy 中，每帧一条定长记录：
+    offset     帧起点的字节位置
+    end        帧终点（分隔符行之后，即下一帧的起点）
+    seq        header.seq
+    stamp      header.stamp
+    sensor_ts  meta.sensor_timestamp_us
+缺失值为 MISSING_INT。索引以 mmap 方式打开，查找只做二分，
+找到后只对命中的帧所在的字节区间做解析。
+"""
+import os
+import numpy as np
+
+from log_parser import (MISSING_INT, SEPARATOR, open_buffer, iter_frame_spans, find_value,
+                        iter_buffer_lines, parse_frames, concat_tables)
+
+INDEX_SUFFIX = '.fidx.npy'
+INDEX_DTYPE = np.dtype([
+    ('offset', '<i8'),
+    ('end', '<i8'),
+    ('seq', '<i8'),
+    ('stamp', '<i8'),
+    ('sensor_ts', '<i8'),
+])
+
+
+def index_filename(log_filename):
+    return log_filename + INDEX_SUFFIX
+
+
+def _int_value(buffer, key, start, end):
+    raw = find_value(buffer, key, start, end)
+    if raw is None:
+        return MISSING_INT
+    try:
+        return int(raw)
+    except ValueError:
+        return MISSING_INT
+
+
+def scan_frames(buffer, start=0, end=None):
+    """
+    扫描 buffer[start:end]，返回每帧的索引记录（只查找三个字段，不解析帧内容）
+    :return: INDEX_DTYPE 结构化数组
+    """
+    if end is None:
+        end = len(buffer)
+    records = []
+    for frame_start, frame_end in iter_frame_spans(buffer, SEPARATOR, start, end):
+        header = buffer.find(b'header {', frame_start, frame_end)
+        if header < 0 and buffer.find(b'{', frame_start, frame_end) < 0:
+            continue  # 只有程序输出等非数据行
+        # seq / stamp 只在 header 块内查找，避免匹配到其它块中的同名字段
+        header_end = buffer.find(b'}', header, frame_end) if header >= 0 else -1
+        if header_end < 0:
+            seq = stamp = MISSING_INT
+        else:
+            seq = _int_value(buffer, b'seq', header, header_end)
+            stamp = _int_value(buffer, b'stamp', header, header_end)
+        sensor_ts = _int_value(buffer, b'sensor_timestamp_us', frame_start, frame_end)
+        line_end = buffer.find(b'\n', frame_end, end)
+        records.append((frame_start, end if line_end < 0 else line_end + 1, seq, stamp, sensor_ts))
+    return np.array(records, dtype=INDEX_DTYPE)
+
+
+def build_frame_index(log_filename):
+    """
+    建立（或在日志末尾有新数据时补充）帧索引并保存到 <日志>.fidx.npy
+    :return: 索引文件路径
+    """
+    filename = index_filename(log_filename)
+    existing = None
+    start = 0
+    if os.path.exists(filename):
+        existing = np.load(filename)
+        if len(existing) and existing['end'][-1] <= os.path.getsize(log_filename):
+            start = int(existing['end'][-1])
+        else:
+            existing = None
+    with open_buffer(log_filename) as buffer:
+        records = scan_frames(buffer, start)
+    if existing is not None:
+        records = np.concatenate((existing, records))
+    # 写入临时文件再替换，其它进程不会读到写了一半的索引
+    temp_filename = filename + '.tmp.npy'
+    np.save(temp_filename, records)
+    os.replace(temp_filename, filename)
+    return filename
+
+
+class FrameIndex:
+    """
+    帧索引，用法：
+        with FrameIndex('vision_aeb_object.log') as index:
+            frames = index.frames_between_stamps(a, b)
+            frame = index.frame_by_seq(n)
+    """
+
+    def __init__(self, log_filename, rebuild=False):
+        """
+        :param log_filename: 日志文件路径；索引不存在或比日志旧时自动建立 / 补充
+        :param rebuild: True 时忽略已有索引重新建立
+        """
+        self.log_filename = log_filename
+        filename = index_filename(log_filename)
+        if rebuild and os.path.exists(filename):
+            os.remove(filename)
+        if not os.path.exists(filename) or os.path.getmtime(filename) < os.path.getmtime(log_filename):
+            build_frame_index(log_filename)
+        self.entries = np.load(filename, mmap_mode='r')
+        self._buffer_context = open_buffer(log_filename)
+        self.buffer = self._buffer_context.__enter__()
+        # 时间戳 / seq 单调时用二分查找，否则逐条比较
+        self._stamp_sorted = bool(np.all(np.diff(self.entries['stamp']) >= 0))
+        self._seq_sorted = bool(np.all(np.diff(self.entries['seq']) >= 0))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def close(self):
+        if self._buffer_context is not None:
+            self._buffer_context.__exit__(None, None, None)
+            self._buffer_context = None
+            self.buffer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def stamp_range(self, start_stamp, end_stamp):
+        """
+        header.stamp 在 [start_stamp, end_stamp] 内的帧
+        :return: 帧序号数组
+        """
+        stamps = self.entries['stamp']
+        if self._stamp_sorted:
+            return np.arange(np.searchsorted(stamps, start_stamp, 'left'),
+                             np.searchsorted(stamps, end_stamp, 'right'))
+        return np.flatnonzero((stamps >= start_stamp) & (stamps <= end_stamp))
+
+    def seq_index(self, seq):
+        """header.seq == seq 的帧序号，找不到返回 None"""
+        seqs = self.entries['seq']
+        if self._seq_sorted:
+            i = int(np.searchsorted(seqs, seq))
+            return i if i < len(seqs) and seqs[i] == seq else None
+        found = np.flatnonzero(seqs == seq)
+        return int(found[0]) if len(found) else None
+
+    def _runs(self, indices):
+        """把帧序号合并为连续的字节区间 [(start, end)]"""
+        runs = []
+        for i in indices:
+            start, end = int(self.entries['offset'][i]), int(self.entries['end'][i])
+            if runs and runs[-1][1] == start:
+                runs[-1] = (runs[-1][0], end)
+            else:
+                runs.append((start, end))
+        return runs
+
+    def frames(self, indices):
+        """解析指定的帧为 dict 列表（见 log_parser.parse_frames）"""
+        result = []
+        for start, end in self._runs(indices):
+            result.extend(parse_frames(iter_buffer_lines(self.buffer, start, end)))
+        return result
+
+    def table(self, indices, schema):
+        """
+        按 schema 解析指定的帧
+        :param schema: LogSchema
+        :return: {列名: ndarray}，与 schema.read 的输出相同
+        """
+        tables = [schema.extract(self.buffer, start, end) for start, end in self._runs(indices)]
+        if not tables:
+            tables = [schema.extract(b'')]
+        return schema.to_columns(concat_tables(tables))
+
+    def frames_between_stamps(self, start_stamp, end_stamp):
+        return self.frames(self.stamp_range(start_stamp, end_stamp))
+
+    def frame_by_seq(self, seq):
+        i = self.seq_index(seq)
+        return None if i is None else self.frames([i])[0]
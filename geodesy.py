@@ -0,0 +1,223 @@
+"""
+纯 NumPy 实现的大地测量计算（不依赖 pyproj），所有函数支持数组输入，整列一次计算：
+    大地坐标（经纬度+椭球高）<-> ECEF 地心地固坐标
+    ECEF <-> ENU 局部坐标
+    高斯-克吕格投影（横轴墨卡托）正算 / 反算
+
+ECEF -> 大地坐标使用 Heikkinen 闭合公式（无迭代）；
+高斯投影使用 Krüger 级数展开到 n^6（Karney 2011），在 6 度带内误差远小于 1mm。
+角度单位均为度，长度单位为米。
+"""
+import numpy as np
+
+
+class Ellipsoid:
+    """参考椭球，a 为长半轴，rf 为扁率倒数"""
+
+    def __init__(self, name, a, rf):
+        self.name = name
+        self.a = a
+        self.f = 1.0 / rf
+        self.b = a * (1 - self.f)
+        self.e2 = self.f * (2 - self.f)            # 第一偏心率平方
+        self.ep2 = self.e2 / (1 - self.e2)         # 第二偏心率平方
+        self.e = np.sqrt(self.e2)
+
+        # 高斯投影的 Krüger 级数系数
+        n = self.f / (2 - self.f)
+        n2, n3, n4, n5, n6 = n ** 2, n ** 3, n ** 4, n ** 5, n ** 6
+        self.A = a / (1 + n) * (1 + n2 / 4 + n4 / 64 + n6 / 256)
+        self.alpha = np.array([
+            n / 2 - 2 * n2 / 3 + 5 * n3 / 16 + 41 * n4 / 180 - 127 * n5 / 288 + 7891 * n6 / 37800,
+            13 * n2 / 48 - 3 * n3 / 5 + 557 * n4 / 1440 + 281 * n5 / 630 - 1983433 * n6 / 1935360,
+            61 * n3 / 240 - 103 * n4 / 140 + 15061 * n5 / 26880 + 167603 * n6 / 181440,
+            49561 * n4 / 161280 - 179 * n5 / 168 + 6601661 * n6 / 7257600,
+            34729 * n5 / 80640 - 3418889 * n6 / 1995840,
+            212378941 * n6 / 319334400,
+        ])
+        self.beta = np.array([
+            n / 2 - 2 * n2 / 3 + 37 * n3 / 96 - n4 / 360 - 81 * n5 / 512 + 96199 * n6 / 604800,
+            n2 / 48 + n3 / 15 - 437 * n4 / 1440 + 46 * n5 / 105 - 1118711 * n6 / 3870720,
+            17 * n3 / 480 - 37 * n4 / 840 - 209 * n5 / 4480 + 5569 * n6 / 90720,
+            4397 * n4 / 161280 - 11 * n5 / 504 - 830251 * n6 / 7257600,
+            4583 * n5 / 161280 - 108847 * n6 / 3991680,
+            20648693 * n6 / 638668800,
+        ])
+
+    def __repr__(self):
+        return f"Ellipsoid({self.name!r}, a={self.a}, rf={1 / self.f})"
+
+
+ELLIPSOIDS = {
+    'WGS84': Ellipsoid('WGS84', 6378137.0, 298.257223563),
+    'CGCS2000': Ellipsoid('CGCS2000', 6378137.0, 298.257222101),
+    'Beijing54': Ellipsoid('Beijing54', 6378245.0, 298.3),  # 克拉索夫斯基椭球
+}
+
+
+def get_ellipsoid(ellps):
+    """:param ellps: 椭球名（'WGS84'/'CGCS2000'/'Beijing54'）或 Ellipsoid"""
+    return ellps if isinstance(ellps, Ellipsoid) else ELLIPSOIDS[ellps]
+
+
+# ---------------- 大地坐标 <-> ECEF ----------------
+
+def geodetic_to_ecef(lon, lat, alt=0.0, ellps='WGS84'):
+    """经度、纬度(度)、椭球高(米) -> ECEF (x, y, z)"""
+    ell = get_ellipsoid(ellps)
+    lam = np.radians(lon)
+    phi = np.radians(lat)
+    sin_phi = np.sin(phi)
+    cos_phi = np.cos(phi)
+    N = ell.a / np.sqrt(1 - ell.e2 * sin_phi ** 2)  # 卯酉圈曲率半径
+    x = (N + alt) * cos_phi * np.cos(lam)
+    y = (N + alt) * cos_phi * np.sin(lam)
+    z = (N * (1 - ell.e2) + alt) * sin_phi
+    return x, y, z
+
+
+def ecef_to_geodetic(x, y, z, ellps='WGS84'):
+    """ECEF -> 经度、纬度(度)、椭球高(米)，Heikkinen 闭合公式"""
+    ell = get_ellipsoid(ellps)
+    a, b, e2, ep2 = ell.a, ell.b, ell.e2, ell.ep2
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    z = np.asarray(z, dtype=float)
+
+    p2 = x ** 2 + y ** 2
+    p = np.sqrt(p2)
+    F = 54 * b ** 2 * z ** 2
+    G = p2 + (1 - e2) * z ** 2 - e2 * (a ** 2 - b ** 2)
+    c = e2 ** 2 * F * p2 / G ** 3
+    s = np.cbrt(1 + c + np.sqrt(c ** 2 + 2 * c))
+    k = s + 1 + 1 / s
+    P = F / (3 * k ** 2 * G ** 2)
+    Q = np.sqrt(1 + 2 * e2 ** 2 * P)
+    r0 = -P * e2 * p / (1 + Q) + np.sqrt(np.maximum(
+        a ** 2 / 2 * (1 + 1 / Q) - P * (1 - e2) * z ** 2 / (Q * (1 + Q)) - P * p2 / 2, 0))
+    U = np.sqrt((p - e2 * r0) ** 2 + z ** 2)
+    V = np.sqrt((p - e2 * r0) ** 2 + (1 - e2) * z ** 2)
+    z0 = b ** 2 * z / (a * V)
+
+    alt = U * (1 - b ** 2 / (a * V))
+    lat = np.degrees(np.arctan2(z + ep2 * z0, p))
+    lon = np.degrees(np.arctan2(y, x))
+    return lon, lat, alt
+
+
+# ---------------- ECEF <-> ENU ----------------
+
+def enu_rotation(lat0, lon0):
+    """ECEF -> ENU 的旋转矩阵（ENU -> ECEF 为其转置）"""
+    lam = np.radians(lon0)
+    phi = np.radians(lat0)
+    return np.array([
+        [-np.sin(lam),               np.cos(lam),              0],
+        [-np.sin(phi) * np.cos(lam), -np.sin(phi) * np.sin(lam), np.cos(phi)],
+        [np.cos(phi) * np.cos(lam),  np.cos(phi) * np.sin(lam),  np.sin(phi)],
+    ])
+
+
+def ecef_to_enu(x, y, z, lat0, lon0, alt0=0.0, ellps='WGS84'):
+    """ECEF -> 以 (lat0, lon0, alt0) 为原点的 ENU (e, n, u)"""
+    x0, y0, z0 = geodetic_to_ecef(lon0, lat0, alt0, ellps)
+    R = enu_rotation(lat0, lon0)
+    dx = np.asarray(x, dtype=float) - x0
+    dy = np.asarray(y, dtype=float) - y0
+    dz = np.asarray(z, dtype=float) - z0
+    e = R[0, 0] * dx + R[0, 1] * dy
+    n = R[1, 0] * dx + R[1, 1] * dy + R[1, 2] * dz
+    u = R[2, 0] * dx + R[2, 1] * dy + R[2, 2] * dz
+    return e, n, u
+
+
+def enu_to_ecef(e, n, u, lat0, lon0, alt0=0.0, ellps='WGS84'):
+    """以 (lat0, lon0, alt0) 为原点的 ENU -> ECEF (x, y, z)"""
+    x0, y0, z0 = geodetic_to_ecef(lon0, lat0, alt0, ellps)
+    R = enu_rotation(lat0, lon0)
+    e = np.asarray(e, dtype=float)
+    n = np.asarray(n, dtype=float)
+    u = np.asarray(u, dtype=float)
+    x = x0 + R[0, 0] * e + R[1, 0] * n + R[2, 0] * u
+    y = y0 + R[0, 1] * e + R[1, 1] * n + R[2, 1] * u
+    z = z0 + R[1, 2] * n + R[2, 2] * u
+    return x, y, z
+
+
+def geodetic_to_enu(lon, lat, alt, lat0, lon0, alt0=0.0, ellps='WGS84'):
+    x, y, z = geodetic_to_ecef(lon, lat, alt, ellps)
+    return ecef_to_enu(x, y, z, lat0, lon0, alt0, ellps)
+
+
+def enu_to_geodetic(e, n, u, lat0, lon0, alt0=0.0, ellps='WGS84'):
+    x, y, z = enu_to_ecef(e, n, u, lat0, lon0, alt0, ellps)
+    return ecef_to_geodetic(x, y, z, ellps)
+
+
+# ---------------- 高斯-克吕格投影 ----------------
+
+def _harmonics(coefficients, xi, eta):
+    """
+    Σ c_j sin(2jξ)cosh(2jη) 与 Σ c_j cos(2jξ)sinh(2jη)
+    即复数 ζ = ξ + iη 时 Σ c_j sin(2jζ) 的实部和虚部，用 Clenshaw 递推只需计算一次 sin / cos
+    """
+    zeta2 = 2 * (np.asarray(xi, dtype=float) + 1j * np.asarray(eta, dtype=float))
+    c2 = 2 * np.cos(zeta2)
+    b1 = b2 = 0
+    for c in coefficients[::-1]:
+        b1, b2 = c + c2 * b1 - b2, b1
+    d = b1 * np.sin(zeta2)
+    return d.real, d.imag
+
+
+def gauss_forward(lon, lat, central_meridian, ellps='WGS84', false_easting=500000.0, k0=1.0):
+    """
+    高斯投影正算：经纬度(度) -> (x 东向, y 北向)，x 不含带号
+    :param central_meridian: 中央子午线经度(度)，可以是与 lon 同形状的数组
+    """
+    ell = get_ellipsoid(ellps)
+    phi = np.radians(lat)
+    lam = np.radians(np.asarray(lon, dtype=float) - central_meridian)
+
+    # 等角纬度 tan(χ)
+    sin_phi = np.sin(phi)
+    t = np.sinh(np.arctanh(sin_phi) - ell.e * np.arctanh(ell.e * sin_phi))
+    xi_p = np.arctan2(t, np.cos(lam))
+    eta_p = np.arctanh(np.sin(lam) / np.sqrt(1 + t ** 2))
+
+    d_xi, d_eta = _harmonics(ell.alpha, xi_p, eta_p)
+    x = false_easting + k0 * ell.A * (eta_p + d_eta)
+    y = k0 * ell.A * (xi_p + d_xi)
+    return x, y
+
+
+def gauss_inverse(x, y, central_meridian, ellps='WGS84', false_easting=500000.0, k0=1.0):
+    """
+    高斯投影反算：(x 东向, y 北向) -> 经纬度(度)，x 不含带号
+    :param central_meridian: 中央子午线经度(度)，可以是与 x 同形状的数组
+    """
+    ell = get_ellipsoid(ellps)
+    xi = np.asarray(y, dtype=float) / (k0 * ell.A)
+    eta = (np.asarray(x, dtype=float) - false_easting) / (k0 * ell.A)
+
+    d_xi, d_eta = _harmonics(ell.beta, xi, eta)
+    xi_p = xi - d_xi
+    eta_p = eta - d_eta
+
+    sinh_eta = np.sinh(eta_p)
+    cos_xi = np.cos(xi_p)
+    tau_p = np.sin(xi_p) / np.sqrt(sinh_eta ** 2 + cos_xi ** 2)  # 等角纬度的正切
+    lam = np.arctan2(sinh_eta, cos_xi)
+
+    # 由等角纬度求大地纬度：牛顿迭代，2 次即收敛到双精度
+    e, e2 = ell.e, ell.e2
+    tau = tau_p.copy()
+    for _ in range(2):
+        sigma = np.sinh(e * np.arctanh(e * tau / np.sqrt(1 + tau ** 2)))
+        tau_i = tau * np.sqrt(1 + sigma ** 2) - sigma * np.sqrt(1 + tau ** 2)
+        tau = tau + (tau_p - tau_i) / np.sqrt(1 + tau_i ** 2) * \
+            (1 + (1 - e2) * tau ** 2) / ((1 - e2) * np.sqrt(1 + tau ** 2))
+
+    lat = np.degrees(np.arctan(tau))
+    lon = central_meridian + np.degrees(lam)
+    return lon, lat
@@ -0,0 +1,333 @@
+"""
+IMU 信号处理：重采样、滤波、积分、静态零偏、Allan 方差、时间戳间断检测
+
+输入为 process_figure.read_imu 的列（或导出的 IMU 表格），全部按整列计算，不逐样本循环：
+    detect_gaps        时间戳间断、重复、回退，按相邻间隔的中位数估计标称周期
+    resample           按固定频率线性插值到均匀时间网格，落在间断内的网格点为 NaN
+    moving_average     滑动平均（累加和相减，任意窗口都是 O(N)），NaN 不参与平均
+    lowpass            零相位低通，FFT 后乘以 Butterworth 幅频响应再逆变换
+    integrate          梯形累积积分（角速度 -> 角度，加速度 -> 速度）
+    static_bias        用滑动标准差找出静止段，统计各轴均值（陀螺零偏）与标准差
+    allan_deviation    重叠 Allan 偏差：对累积和（角度 / 速度）做二阶差分，分段相减后用点积求平方和，
+                       3000 万个样本、50 个 tau 单轴约 4 秒
+加速度、角速度的单位与日志相同（示例日志为 g、rad/s），tau 单位为秒。
+"""
+import os
+import numpy as np
+
+from sensor_sync import Stream
+from table_io import read_columns, write_columns
+
+ACC_AXES = ['accx', 'accy', 'accz']
+GYRO_AXES = ['gyrox', 'gyroy', 'gyroz']
+AXES = ACC_AXES + GYRO_AXES
+GAP_FACTOR = 1.5        # 间隔超过标称周期的该倍数记为间断
+ALLAN_POINTS = 50       # 默认的 tau 个数（对数均匀，取整后去重）
+ALLAN_CHUNK = 1 << 14   # Allan 方差分段计算的样本数（128 KB 的缓冲区）
+STATIONARY_WINDOW_S = 1.0
+GYRO_STATIONARY_STD = 0.01  # 静止判定：窗口内角速度模长的标准差上限
+ACC_STATIONARY_STD = 0.02   # 静止判定：窗口内加速度模长的标准差上限
+
+
+def imu_time_us(columns):
+    """
+    IMU 列的时间（int64 微秒）与按时间排序后的行号，时间列按 sensor_sync.TIME_COLUMNS 自动识别
+    :return: (time_us, rows)
+    """
+    stream = Stream('imu', columns)
+    return stream.time_us, stream.rows
+
+
+def _fill_nan(values):
+    """NaN 按相邻的有效值线性插值（两端取最近的有效值），FFT / 累积和不能有 NaN"""
+    values = np.asarray(values, dtype=np.float64)
+    missing = np.isnan(values)
+    if not missing.any():
+        return values
+    if missing.all():
+        raise ValueError("no valid samples")
+    index = np.arange(len(values))
+    values = values.copy()
+    values[missing] = np.interp(index[missing], index[~missing], values[~missing])
+    return values
+
+
+# ---------------- 时间戳 ----------------
+
+def detect_gaps(time_us, factor=GAP_FACTOR):
+    """
+    时间戳间断检测
+    :param time_us: 按文件顺序的 int64 微秒时间戳
+    :return: {'period_us': 标称周期, 'rate_hz': 标称频率, 'duplicates': 重复时间戳数, 'backwards': 回退次数,
+              'gaps': {'start_us', 'end_us', 'duration_us', 'missing'} 每个间断一行，missing 为估计的缺失样本数}
+    """
+    time_us = np.asarray(time_us, dtype=np.int64)
+    steps = np.diff(time_us)
+    backwards = int((steps < 0).sum())
+    if backwards:
+        time_us = np.sort(time_us, kind='stable')
+        steps = np.diff(time_us)
+    duplicates = int((steps == 0).sum())
+    positive = steps[steps > 0]
+    period_us = float(np.median(positive)) if len(positive) else np.nan
+    gap = np.flatnonzero(steps > factor * period_us) if len(positive) else np.zeros(0, dtype=np.int64)
+    duration = steps[gap]
+    return {
+        'period_us': period_us,
+        'rate_hz': 1e6 / period_us if len(positive) else np.nan,
+        'duplicates': duplicates,
+        'backwards': backwards,
+        'gaps': {
+            'start_us': time_us[gap],
+            'end_us': time_us[gap + 1],
+            'duration_us': duration,
+            'missing': (np.rint(duration / period_us) - 1).astype(np.int64) if len(gap) else duration,
+        },
+    }
+
+
+def resample(columns, rate_hz, names=AXES, max_gap_us=None):
+    """
+    按固定频率线性插值到均匀时间网格
+    :param rate_hz: 输出频率
+    :param names: 插值的列
+    :param max_gap_us: 相邻样本间隔超过该值时，其间的网格点为 NaN；None 为标称周期的 GAP_FACTOR 倍
+    :return: {'timestamp_us': 网格时间, 列名: float64}
+    """
+    time_us, rows = imu_time_us(columns)
+    if len(time_us) < 2:
+        raise ValueError("need at least two samples to resample")
+    time_us, first = np.unique(time_us, return_index=True)  # 重复时间戳取第一个
+    rows = rows[first]
+    period_us = 1e6 / rate_hz
+    grid = time_us[0] + np.rint(np.arange(int((time_us[-1] - time_us[0]) / period_us) + 1) * period_us).astype(np.int64)
+    if max_gap_us is None:
+        max_gap_us = GAP_FACTOR * np.median(np.diff(time_us))
+    # 网格点两侧的原始样本间隔过大即落在间断内
+    right = np.minimum(np.searchsorted(time_us, grid, side='left'), len(time_us) - 1)
+    left = np.maximum(right - 1, 0)
+    in_gap = (time_us[right] - time_us[left] > max_gap_us) & (time_us[right] != grid)
+
+    offset = (time_us - time_us[0]).astype(np.float64)
+    grid_offset = (grid - time_us[0]).astype(np.float64)
+    result = {'timestamp_us': grid}
+    for name in names:
+        values = np.asarray(columns[name], dtype=np.float64)[rows]
+        valid = ~np.isnan(values)
+        resampled = np.interp(grid_offset, offset[valid], values[valid]) if valid.any() else np.full(len(grid), np.nan)
+        resampled[in_gap] = np.nan
+        result[name] = resampled
+    return result
+
+
+# ---------------- 滤波 / 积分 ----------------
+
+def moving_average(values, window):
+    """
+    居中的滑动平均，两端窗口截断；NaN 不参与平均，窗口内全为 NaN 时结果为 NaN
+    先减去均值再做累积和，几千万个样本也不会因大数相减损失精度
+    :param window: 窗口样本数
+    """
+    values = np.asarray(values, dtype=np.float64)
+    count = len(values)
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return values.copy()
+    mean = values[valid].mean()
+    sums = np.concatenate(([0.0], np.cumsum(np.where(valid, values - mean, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(valid)))
+    first = np.arange(count) - window // 2
+    lo = np.clip(first, 0, count)
+    hi = np.clip(first + window, 0, count)
+    n = counts[hi] - counts[lo]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(n > 0, (sums[hi] - sums[lo]) / n + mean, np.nan)
+
+
+def lowpass(values, rate_hz, cutoff_hz, order=4):
+    """
+    零相位低通：两端各镜像延拓 rate_hz / cutoff_hz 个周期以减小 FFT 的环绕效应，
+    频域乘以 order 阶 Butterworth 的幅频响应 1 / sqrt(1 + (f / fc) ^ 2n)
+    NaN 先按相邻有效值插值，输出中仍为 NaN
+    """
+    values = np.asarray(values, dtype=np.float64)
+    missing = np.isnan(values)
+    filled = _fill_nan(values)
+    count = len(filled)
+    pad = min(count - 1, int(np.ceil(4 * rate_hz / cutoff_hz)))
+    extended = np.concatenate((filled[pad:0:-1], filled, filled[-2:-pad - 2:-1]))
+    length = 1 << int(np.ceil(np.log2(len(extended))))  # 2 的幂，FFT 最快
+    spectrum = np.fft.rfft(extended, length)
+    frequency = np.fft.rfftfreq(length, 1.0 / rate_hz)
+    spectrum *= 1.0 / np.sqrt(1.0 + (frequency / cutoff_hz) ** (2 * order))
+    result = np.fft.irfft(spectrum, length)[pad:pad + count]
+    result[missing] = np.nan
+    return result
+
+
+def integrate(values, time_us):
+    """梯形累积积分，第一个样本为 0，时间单位为秒（rad/s -> rad，m/s^2 -> m/s）"""
+    values = _fill_nan(values)
+    seconds = (np.asarray(time_us, dtype=np.int64) - time_us[0]) / 1e6
+    result = np.zeros(len(values))
+    np.cumsum((values[1:] + values[:-1]) * 0.5 * np.diff(seconds), out=result[1:])
+    return result
+
+
+# ---------------- 零偏 / 噪声 ----------------
+
+def moving_std(values, window):
+    """居中的滑动标准差，基于两次滑动平均"""
+    centered = values - np.nanmean(values)
+    mean = moving_average(centered, window)
+    return np.sqrt(np.maximum(moving_average(centered ** 2, window) - mean ** 2, 0.0))
+
+
+def stationary_mask(columns, window, gyro_std=GYRO_STATIONARY_STD, acc_std=ACC_STATIONARY_STD):
+    """
+    静止样本：窗口内角速度模长、加速度模长的滑动标准差都低于阈值
+    :param window: 窗口样本数
+    """
+    gyro = np.sqrt(sum(np.asarray(columns[name], dtype=np.float64) ** 2 for name in GYRO_AXES))
+    acc = np.sqrt(sum(np.asarray(columns[name], dtype=np.float64) ** 2 for name in ACC_AXES))
+    return (moving_std(gyro, window) < gyro_std) & (moving_std(acc, window) < acc_std)
+
+
+def static_bias(columns, rate_hz, window_s=STATIONARY_WINDOW_S, **thresholds):
+    """
+    静止段的各轴统计：角速度均值即陀螺零偏；加速度均值含重力，acc_norm 为均值向量的模长（静止时应为 1 g）
+    :param thresholds: gyro_std / acc_std，见 stationary_mask
+    :return: {'samples', 'stationary', 'stationary_ratio', '<轴>_bias', '<轴>_std', 'acc_norm'}
+    """
+    window = max(int(round(window_s * rate_hz)), 2)
+    mask = stationary_mask(columns, window, **thresholds)
+    result = {'samples': len(mask), 'stationary': int(mask.sum()),
+              'stationary_ratio': float(mask.mean()) if len(mask) else np.nan}
+    for name in AXES:
+        values = np.asarray(columns[name], dtype=np.float64)[mask]
+        result[f'{name}_bias'] = float(np.nanmean(values)) if len(values) else np.nan
+        result[f'{name}_std'] = float(np.nanstd(values)) if len(values) else np.nan
+    result['acc_norm'] = float(np.sqrt(sum(result[f'{name}_bias'] ** 2 for name in ACC_AXES)))
+    if not result['stationary']:
+        print(f"no stationary samples (window {window_s}s), bias is NaN")
+    return result
+
+
+def allan_taus(count, rate_hz, points=ALLAN_POINTS):
+    """对数均匀的平均样本数 m（1 ~ (count - 1) // 2，取整去重）"""
+    largest = (count - 1) // 2
+    if largest < 1:
+        return np.zeros(0, dtype=np.int64)
+    return np.unique(np.rint(np.logspace(0, np.log10(largest), points)).astype(np.int64))
+
+
+def allan_deviation(values, rate_hz, taus=None, points=ALLAN_POINTS):
+    """
+    重叠 Allan 偏差
+        theta = cumsum(y) / rate，AVAR(m) = sum((theta[i+2m] - 2 theta[i+m] + theta[i]) ^ 2) / (2 tau^2 (N - 2m))
+    按 ALLAN_CHUNK 个样本分段计算：两次相减写入可放进 CPU 缓存的缓冲区，平方和用点积（BLAS），
+    不产生与数据等长的临时数组，几千万个样本时比整列计算快一倍以上
+    :param values: 均匀采样的数据（先用 resample），NaN 按相邻有效值插值
+    :param taus: 平均时间（秒），None 为 allan_taus
+    :return: (tau 秒, Allan 偏差, 每个 tau 的项数)
+    """
+    values = _fill_nan(values)
+    tau0 = 1.0 / rate_hz
+    theta = np.concatenate(([0.0], np.cumsum(values - values.mean()))) * tau0
+    count = len(theta)
+    if taus is None:
+        m = allan_taus(len(values), rate_hz, points)
+    else:
+        m = np.unique(np.rint(np.asarray(taus) / tau0).astype(np.int64))
+        m = m[(m >= 1) & (m <= (count - 1) // 2)]
+    first = np.empty(ALLAN_CHUNK)
+    second = np.empty(ALLAN_CHUNK)
+    deviation = np.empty(len(m))
+    terms = count - 2 * m
+    for i, step in enumerate(m):
+        total = 0.0
+        for start in range(0, terms[i], ALLAN_CHUNK):
+            n = min(ALLAN_CHUNK, terms[i] - start)
+            middle = theta[start + step:start + step + n]
+            e = np.subtract(theta[start + 2 * step:start + 2 * step + n], middle, out=first[:n])
+            e -= np.subtract(middle, theta[start:start + n], out=second[:n])
+            total += np.dot(e, e)
+        tau = step * tau0
+        deviation[i] = np.sqrt(total / (2.0 * tau * tau * terms[i]))
+    return m * tau0, deviation, terms
+
+
+def noise_parameters(taus, deviation):
+    """
+    由 Allan 偏差曲线估计噪声参数
+        random_walk        白噪声（角度 / 速度随机游走），斜率约 -1/2 的一段上 adev * sqrt(tau) 的中位数，即 tau = 1s 处的值
+        bias_instability   零偏不稳定性，曲线最低点 / 0.664
+    :return: {'random_walk', 'bias_instability', 'bias_instability_tau'}
+    """
+    result = {'random_walk': np.nan, 'bias_instability': np.nan, 'bias_instability_tau': np.nan}
+    valid = deviation > 0
+    taus, deviation = taus[valid], deviation[valid]
+    if len(taus) < 2:
+        return result
+    slope = np.gradient(np.log(deviation), np.log(taus))
+    white = np.abs(slope + 0.5) < 0.15
+    if white.any():
+        result['random_walk'] = float(np.median(deviation[white] * np.sqrt(taus[white])))
+    lowest = int(np.argmin(deviation))
+    result['bias_instability'] = float(deviation[lowest] / 0.664)
+    result['bias_instability_tau'] = float(taus[lowest])
+    return result
+
+
+# ---------------- 整个文件 ----------------
+
+def read_imu_columns(filename):
+    """IMU 原始日志（.log，按 process_figure.read_imu 解析）或导出的表格"""
+    if filename.endswith('.log'):
+        from process_figure import read_imu
+        return read_imu(filename)
+    return read_columns(filename)
+
+
+def analyze_imu(filename, output_filename=None, rate_hz=None, points=ALLAN_POINTS, axes=AXES):
+    """
+    间断检测 -> 重采样到标称频率 -> 静态零偏 -> 各轴 Allan 偏差与噪声参数
+    :param rate_hz: 重采样频率，None 为按时间戳估计的标称频率
+    :param output_filename: Allan 偏差表（tau_s + 各轴），格式由扩展名决定（见 table_io）
+    :return: {'gaps': detect_gaps 的结果, 'bias': static_bias 的结果, 'allan': 表, 'noise': {轴: noise_parameters}}
+    """
+    columns = read_imu_columns(filename)
+    time_us, rows = imu_time_us(columns)
+    gaps = detect_gaps(time_us[np.argsort(rows)])  # 按文件顺序，才能统计回退
+    rate_hz = rate_hz or gaps['rate_hz']
+    uniform = resample(columns, rate_hz, axes)
+    bias = static_bias(uniform, rate_hz)
+
+    allan = {}
+    noise = {}
+    for name in axes:
+        taus, deviation, _ = allan_deviation(uniform[name], rate_hz, points=points)
+        allan['tau_s'] = taus
+        allan[f'{name}_adev'] = deviation
+        noise[name] = noise_parameters(taus, deviation)
+    if output_filename:
+        write_columns(output_filename, allan)
+    return {'gaps': gaps, 'bias': bias, 'allan': allan, 'noise': noise}
+
+
+def print_analysis(result):
+    gaps = result['gaps']
+    print(f"rate {gaps['rate_hz']:.2f} Hz, {len(gaps['gaps']['start_us'])} gaps "
+          f"({int(gaps['gaps']['missing'].sum())} samples missing), "
+          f"{gaps['duplicates']} duplicate / {gaps['backwards']} backward timestamps")
+    bias = result['bias']
+    print(f"stationary {bias['stationary']}/{bias['samples']} samples, |acc| {bias['acc_norm']:.5f}")
+    print(f"{'axis':<8}{'bias':>14}{'std':>14}{'random walk':>14}{'bias inst.':>14}{'at tau(s)':>11}")
+    for name, noise in result['noise'].items():
+        print(f"{name:<8}{bias[f'{name}_bias']:>14.6g}{bias[f'{name}_std']:>14.6g}{noise['random_walk']:>14.6g}"
+              f"{noise['bias_instability']:>14.6g}{noise['bias_instability_tau']:>11.4g}")
+
+
+if __name__ == "__main__":
+    log = 'example/imu_250305_frontback.log'
+    print_analysis(analyze_imu(log, os.path.splitext(os.path.basename(log))[0] + '_allan.csv'))
@@ -0,0 +1,174 @@
+"""
+感知 pipeline 时延分析
+
+从日志中只提取 header / meta 字段（话题 pipeline_meta，每帧一行），全部用 NumPy 整列计算：
+    latency   pipeline_finish_timestamp_us - pipeline_start_timestamp_us
+    age       header.stamp（ns）- sensor_timestamp_us，传感器数据到发布的时间
+    interval  相邻两帧 header.stamp 之差，jitter 为其标准差，gaps 为超过 1.5 倍中位数的间隔数
+    dropped   按 header.seq 判断的丢帧数，seq_resets 为 seq 变小的次数
+              同一话题相邻帧的 seq 步长不一定是 1（如每帧 +6），以 seq 步长的中位数为一帧
+sensor_timestamp_us 与 header.stamp 不在同一时钟下（如雷达为 UTC 时间）时 age 超出 ±AGE_LIMIT_MS，记为缺失。
+按 文件 × instance_name × version_tag 分组输出 p50 / p95 / p99 / max（单位 ms），
+同一文件有多组时额外输出一行 instance_name 为 * 的汇总（只汇总时延和跳帧，不计算帧间隔）。
+不同软件版本的日志放在一起分析即可按 version_tag 对比性能回归。
+"""
+import os
+import numpy as np
+
+from log_parser import MISSING_INT
+from log_schema import get_topic
+from table_io import write_columns, columns_from_rows
+
+PERCENTILES = (50, 95, 99)
+AGE_LIMIT_MS = 60 * 1000  # 超出该范围的 age 视为两个时间戳不在同一时钟下
+
+
+def _ms(values_us):
+    return values_us.astype(np.float64) / 1000.0
+
+
+def frame_metrics(columns):
+    """
+    逐帧时延（ms），缺失为 NaN
+    :param columns: pipeline_meta 话题的列
+    :return: (latency, age)
+    """
+    stamp = columns['stamp']
+    sensor = columns['sensor_timestamp_us']
+    start = columns['pipeline_start_timestamp_us']
+    finish = columns['pipeline_finish_timestamp_us']
+    latency = np.where((start != MISSING_INT) & (finish != MISSING_INT), _ms(finish - start), np.nan)
+    age = np.where((stamp != MISSING_INT) & (sensor != MISSING_INT), _ms(stamp // 1000 - sensor), np.nan)
+    age[np.abs(age) > AGE_LIMIT_MS] = np.nan
+    return latency, age
+
+
+def summarize(values, name):
+    """
+    分位数统计，忽略 NaN
+    :return: {name_p50, name_p95, name_p99, name_max}
+    """
+    values = values[~np.isnan(values)]
+    result = {}
+    if len(values):
+        for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+            result[f'{name}_p{p}'] = float(v)
+        result[f'{name}_max'] = float(values.max())
+    else:
+        for p in PERCENTILES:
+            result[f'{name}_p{p}'] = np.nan
+        result[f'{name}_max'] = np.nan
+    return result
+
+
+def sequence_metrics(stamp, seq):
+    """
+    帧间隔与跳帧，按 stamp 排序后计算
+    :return: {interval_p50 ... interval_max, jitter, gaps, dropped, seq_resets}
+    """
+    valid = stamp != MISSING_INT
+    order = np.argsort(stamp[valid], kind='stable')
+    stamp = stamp[valid][order]
+    seq = seq[valid][order]
+
+    intervals = np.diff(stamp) / 1e6  # ns -> ms
+    result = summarize(intervals, 'interval')
+    result['jitter'] = float(intervals.std()) if len(intervals) else np.nan
+    result['gaps'] = int((intervals > 1.5 * np.median(intervals)).sum()) if len(intervals) else 0
+
+    seq = seq[seq != MISSING_INT]
+    steps = np.diff(seq)
+    forward = steps[steps > 0]
+    if len(forward):
+        stride = np.median(forward)
+        missed = np.rint(forward / stride) - 1
+        result['dropped'] = int(missed[missed > 0].sum())
+    else:
+        result['dropped'] = 0  # seq 未赋值（如恒为 0）
+    result['seq_resets'] = int((steps < 0).sum())
+    return result
+
+
+def _group_keys(columns):
+    """(instance_name, version_tag) 分组，返回 (组名列表, 每帧的组号)"""
+    keys = np.array([f'{a or ""}\x00{b or ""}' for a, b in zip(columns['instance_name'], columns['version_tag'])],
+                    dtype=object)
+    names, inverse = np.unique(keys, return_inverse=True)
+    return [tuple(name.split('\x00')) for name in names], inverse
+
+
+def analyze_columns(columns, log_name=''):
+    """
+    对一个文件的 pipeline_meta 列计算统计
+    :return: 报告行（dict）列表
+    """
+    latency, age = frame_metrics(columns)
+    groups, inverse = _group_keys(columns)
+    rows = []
+    for g, (instance, version) in enumerate(groups):
+        mask = inverse == g
+        row = {'file': log_name, 'instance_name': instance, 'version_tag': version, 'frames': int(mask.sum())}
+        row.update(summarize(latency[mask], 'latency'))
+        row.update(summarize(age[mask], 'age'))
+        row.update(sequence_metrics(columns['stamp'][mask], columns['seq'][mask]))
+        rows.append(row)
+    if len(rows) > 1:
+        # 多个 instance / version 混在一个文件中时的汇总，帧间隔在组间没有意义
+        row = {'file': log_name, 'instance_name': '*', 'version_tag': '*', 'frames': len(latency)}
+        row.update(summarize(latency, 'latency'))
+        row.update(summarize(age, 'age'))
+        row.update(summarize(np.array([]), 'interval'))
+        row['jitter'] = np.nan
+        row['gaps'] = sum(r['gaps'] for r in rows)
+        row['dropped'] = sum(r['dropped'] for r in rows)
+        row['seq_resets'] = sum(r['seq_resets'] for r in rows)
+        rows.append(row)
+    return rows
+
+
+def analyze_log(log_filename, workers=1):
+    """解析日志的 header / meta 字段并统计，返回报告行列表"""
+    columns = get_topic('pipeline_meta').read(log_filename, workers)
+    return analyze_columns(columns, os.path.basename(log_filename))
+
+
+REPORT_COLUMNS = (['file', 'instance_name', 'version_tag', 'frames']
+                  + [f'{name}_{stat}' for name in ('latency', 'age', 'interval')
+                     for stat in [f'p{p}' for p in PERCENTILES] + ['max']]
+                  + ['jitter', 'gaps', 'dropped', 'seq_resets'])
+
+
+def latency_report(log_filenames, output_filename=None, workers=1):
+    """
+    生成时延报告，打印到控制台，并可写出为文件
+    :param log_filenames: 日志文件列表
+    :param output_filename: 报告文件（.csv / .parquet / .feather / .npz），None 则只打印
+    :return: 报告行列表
+    """
+    rows = []
+    for log_filename in log_filenames:
+        rows.extend(analyze_log(log_filename, workers))
+    print_report(rows)
+    if output_filename:
+        write_columns(output_filename, columns_from_rows([[row[name] for name in REPORT_COLUMNS] for row in rows],
+                                                         REPORT_COLUMNS))
+    return rows
+
+
+def print_report(rows):
+    """控制台输出：每组一行，时间单位 ms"""
+    print(f"{'file':<32}{'instance / version':<48}{'frames':>7}"
+          f"{'lat p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'age p50':>10}{'p99':>9}"
+          f"{'int p50':>9}{'jitter':>8}{'gaps':>6}{'dropped':>9}")
+    for row in rows:
+        group = f"{row['instance_name'] or '-'} / {row['version_tag'] or '-'}"
+        print(f"{row['file']:<32}{group:<48}{row['frames']:>7}"
+              f"{row['latency_p50']:>9.2f}{row['latency_p95']:>9.2f}{row['latency_p99']:>9.2f}{row['latency_max']:>9.2f}"
+              f"{row['age_p50']:>10.2f}{row['age_p99']:>9.2f}"
+              f"{row['interval_p50']:>9.2f}{row['jitter']:>8.2f}{row['gaps']:>6}{row['dropped']:>9}")
+
+
+if __name__ == "__main__":
+    import glob
+
+    latency_report(sorted(glob.glob('example/*_object*.log')), 'latency_report.csv')
@@ -0,0 +1,93 @@
+"""
+增量转换的断点索引
+
+每个输出文件旁边保存一个 <输出文件>.ckpt.json，记录对应日志已处理到的位置：
+    日志文件大小、mtime、开头 64KB 的哈希
+    已解析到的字节位置（最后一个完整帧之后）及其之前 4KB 的哈希
+    已处理的帧数、输出行数、最后一帧的时间戳
+    输出文件大小、话题名与输出列
+再次转换时：
+    日志大小、mtime、开头哈希均未变化 -> 直接跳过
+    日志只在末尾追加了数据（开头与断点前的哈希不变）-> 只解析断点之后的新帧并追加到输出
+    其它情况（日志被改写、输出被改动、输出列变化）-> 从头重新转换
+"""
+import os
+import json
+import hashlib
+
+from log_parser import open_buffer
+
+CHECKPOINT_SUFFIX = '.ckpt.json'
+HEAD_BYTES = 1 << 16  # 用于判断文件是否被改写的开头字节数
+TAIL_BYTES = 1 << 12  # 断点之前参与校验的字节数
+
+
+def checkpoint_filename(output_filename):
+    return output_filename + CHECKPOINT_SUFFIX
+
+
+def load_checkpoint(output_filename):
+    """读取断点索引，不存在或损坏时返回 None"""
+    try:
+        with open(checkpoint_filename(output_filename), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_checkpoint(output_filename, state):
+    """先写临时文件再替换，中途中断不会留下损坏的索引"""
+    filename = checkpoint_filename(output_filename)
+    with open(filename + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(filename + '.tmp', filename)
+
+
+def _sha1(buffer, start, end):
+    return hashlib.sha1(buffer[start:end]).hexdigest()
+
+
+def file_state(log_filename, offset, stat=None):
+    """
+    记录日志文件的状态
+    :param offset: 已解析到的字节位置
+    :param stat: 解析前的 os.stat 结果，默认为当前状态
+    """
+    stat = stat or os.stat(log_filename)
+    with open_buffer(log_filename) as buffer:
+        head_size = min(len(buffer), HEAD_BYTES)
+        tail_start = max(0, offset - TAIL_BYTES)
+        return {
+            'log': os.path.abspath(log_filename),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'head_size': head_size,
+            'head_sha1': _sha1(buffer, 0, head_size),
+            'offset': offset,
+            'tail_start': tail_start,
+            'tail_sha1': _sha1(buffer, tail_start, offset),
+        }
+
+
+def is_unchanged(state, log_filename):
+    """日志大小、mtime 和开头哈希都与上次相同"""
+    stat = os.stat(log_filename)
+    if stat.st_size != state['size'] or stat.st_mtime_ns != state['mtime_ns']:
+        return False
+    with open_buffer(log_filename) as buffer:
+        return _sha1(buffer, 0, state['head_size']) == state['head_sha1']
+
+
+def resume_offset(state, log_filename):
+    """
+    日志只在末尾追加时返回可以继续解析的字节位置，否则返回 None（需要从头转换）
+    """
+    offset = state['offset']
+    if os.path.getsize(log_filename) < offset:
+        return None
+    with open_buffer(log_filename) as buffer:
+        if len(buffer) < state['head_size'] or _sha1(buffer, 0, state['head_size']) != state['head_sha1']:
+            return None
+        if _sha1(buffer, state['tail_start'], offset) != state['tail_sha1']:
+            return None
+    return offset
@@ -0,0 +1,245 @@
+"""
+实时跟随（follow）模式：在日志写入过程中持续读取新帧，并以滚动窗口实时绘图
+
+LogFollower 记录已读取到的文件位置，每次 poll 只读取新增的字节，
+解析其中完整的帧，末尾不完整的帧留到下次；内存占用只与一次新增的数据量有关。
+日志轮转（原文件被改名、重新创建，或被截断）时自动切换到新文件从头读取。
+
+RollingPlot 只保留最近 window_seconds 内的数据（且不超过 max_points 个点），
+刷新时只重画数据点（blit），坐标范围变化时才整体重画。
+"""
+import os
+import time
+import numpy as np
+
+from log_parser import SEPARATOR, find_separator
+from table_io import is_missing
+
+READ_BYTES = 64 << 20  # 每次 poll 最多读取的字节数，积压更多时分多次读取
+
+
+class LogFollower:
+    """按 schema 增量解析一个正在写入的日志文件"""
+
+    def __init__(self, log_filename, schema, from_start=False):
+        """
+        :param log_filename: 日志文件路径（可以暂时不存在）
+        :param schema: LogSchema，如 log_schema.get_topic('vision_object')
+        :param from_start: True 从文件开头读取；False 从当前末尾开始，只读取之后写入的帧
+        """
+        self.log_filename = log_filename
+        self.schema = schema
+        self.from_start = from_start
+        self.file = None
+        self.inode = None
+        self.offset = 0
+        self.pending = b''  # 已读取但还不完整的帧
+        self.synced = True  # False 表示 pending 从帧中间开始，需要先对齐到下一个分隔符
+
+    def _open(self, from_start):
+        try:
+            self.file = open(self.log_filename, 'rb')
+        except FileNotFoundError:
+            return False
+        self.inode = os.fstat(self.file.fileno()).st_ino
+        self.pending = b''
+        if from_start:
+            self.offset = 0
+            self.synced = True
+        else:
+            self.offset = self.file.seek(0, os.SEEK_END)
+            self.synced = self.offset == 0
+        return True
+
+    def _check_rotation(self):
+        """
+        检查日志是否被轮转：路径指向了新文件（改名后重新创建）或文件被截断
+        :return: 改名轮转时返回旧文件的剩余内容，否则返回 None
+        """
+        try:
+            stat = os.stat(self.log_filename)
+        except FileNotFoundError:
+            return None  # 轮转过程中文件暂时不存在，继续读旧文件
+        if stat.st_ino != self.inode:
+            # 旧文件改名后句柄仍然有效，先把剩余内容读完
+            self.file.seek(self.offset)
+            rest = self.file.read()
+            self.file.close()
+            self.file = None
+            print(f"{self.log_filename} rotated, reopening")
+            return rest
+        if stat.st_size < self.offset:
+            print(f"{self.log_filename} truncated, reading from start")
+            self.offset = 0
+            self.pending = b''
+            self.synced = True
+        return None
+
+    def _read(self):
+        """:return: (新读取的数据, 是否为轮转前旧文件的最后内容)"""
+        if self.file is None:
+            # 首次打开按 from_start，轮转后的新文件总是从头读取
+            if not self._open(self.from_start or self.inode is not None):
+                return b'', False
+        rest = self._check_rotation()
+        if rest is not None:
+            return rest, True
+        self.file.seek(self.offset)
+        data = self.file.read(READ_BYTES)
+        self.offset += len(data)
+        return data, False
+
+    def poll(self):
+        """
+        读取并解析新写入的完整帧
+        :return: {列名: ndarray}（schema 的输出列，长表），没有新帧时返回 None
+        """
+        data, rotated = self._read()
+        if rotated:
+            # 旧文件已写完，补一个分隔符让最后一帧也被解析
+            data += b'\n' + SEPARATOR + b'\n'
+        elif not data:
+            return None
+        buffer = self.pending + data
+        if not self.synced:
+            # 从文件中间开始读取时，第一个分隔符之前是半帧，丢弃
+            found = find_separator(buffer, SEPARATOR)
+            if found is None:
+                self.pending = buffer[buffer.rfind(b'\n') + 1:]
+                return None
+            buffer = buffer[found[1]:]
+            self.synced = True
+        table = self.schema.extract(buffer)
+        self.pending = b'' if rotated else buffer[table.end_offset:]
+        if not table.frame_count:
+            return None
+        return self.schema.to_columns(table)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class RollingPlot:
+    """滚动窗口散点图：每个字段一个子图，横轴为相对最新一帧的时间（秒）"""
+
+    def __init__(self, stamp, fields=('location_x', 'track_id'), window_seconds=10.0,
+                 max_points=20000, stamp_scale=1e-9, title=None):
+        """
+        :param stamp: 时间戳列名
+        :param fields: 需要绘制的列
+        :param window_seconds: 显示最近多少秒
+        :param max_points: 每列最多保留的点数（环形缓冲上限）
+        :param stamp_scale: 时间戳换算为秒的系数，纳秒为 1e-9
+        """
+        self.stamp = stamp
+        self.fields = list(fields)
+        self.window_seconds = window_seconds
+        self.max_points = max_points
+        self.stamp_scale = stamp_scale
+        self.data = {name: np.empty(0) for name in [stamp] + self.fields}
+
+        import matplotlib.pyplot as plt  # 只跟随不绘图（LogFollower）时不加载 matplotlib
+        self.figure, axes = plt.subplots(len(self.fields), 1, sharex=True, figsize=(10, 3 * len(self.fields)), squeeze=False)
+        self.axes = list(axes[:, 0])
+        self.lines = []
+        for ax, name in zip(self.axes, self.fields):
+            line, = ax.plot([], [], '.', animated=True)
+            ax.set_ylabel(name)
+            ax.set_ylim(0, 1)
+            ax.grid()
+            self.lines.append(line)
+        self.axes[0].set_xlim(-window_seconds, 0)
+        self.axes[-1].set_xlabel('time (s)')
+        if title:
+            self.figure.suptitle(title)
+
+        self.background = None
+        self.figure.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event):
+        """整体重画（包括窗口缩放）后重新缓存背景"""
+        self.background = self.figure.canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_lines()
+
+    def _draw_lines(self):
+        for ax, line in zip(self.axes, self.lines):
+            ax.draw_artist(line)
+
+    def push(self, columns):
+        """追加新数据，只保留窗口内且最多 max_points 个点"""
+        keep = ~is_missing(columns[self.stamp])
+        for name in self.data:
+            column = np.asarray(columns[name])
+            values = column.astype(np.float64)
+            values[is_missing(column)] = np.nan
+            self.data[name] = np.concatenate((self.data[name], values[keep]))[-self.max_points:]
+        # 丢弃窗口之外的旧数据
+        stamps = self.data[self.stamp]
+        if len(stamps):
+            recent = stamps >= stamps.max() - self.window_seconds / self.stamp_scale
+            if not recent.all():
+                self.data = {name: column[recent] for name, column in self.data.items()}
+
+    def update(self):
+        """刷新画面：坐标范围不变时只 blit 数据点，否则整体重画"""
+        stamps = self.data[self.stamp]
+        redraw = self.background is None
+        if len(stamps):
+            x = (stamps - stamps.max()) * self.stamp_scale
+            visible = x >= -self.window_seconds
+            for ax, line, name in zip(self.axes, self.lines, self.fields):
+                y = self.data[name][visible]
+                line.set_data(x[visible], y)
+                y = y[~np.isnan(y)]
+                if len(y):
+                    low, high = ax.get_ylim()
+                    if y.min() < low or y.max() > high:
+                        margin = max((y.max() - y.min()) * 0.1, 1.0)
+                        ax.set_ylim(min(low, y.min() - margin), max(high, y.max() + margin))
+                        redraw = True
+
+        canvas = self.figure.canvas
+        if redraw:
+            canvas.draw()  # draw_event 中重新缓存背景并画出数据点
+        else:
+            canvas.restore_region(self.background)
+            self._draw_lines()
+        canvas.blit(self.figure.bbox)
+        canvas.flush_events()
+
+    def is_open(self):
+        import matplotlib.pyplot as plt
+        return plt.fignum_exists(self.figure.number)
+
+
+def follow(log_filename, schema, fields=('location_x', 'track_id'), refresh_hz=5.0, window_seconds=10.0,
+           from_start=False, duration=None):
+    """
+    跟随正在写入的日志，实时滚动绘图，关闭窗口或 Ctrl+C 结束
+    :param schema: LogSchema
+    :param refresh_hz: 每秒刷新次数
+    :param window_seconds: 显示最近多少秒的数据
+    :param from_start: True 先显示文件中已有的数据；False 只显示之后写入的帧
+    :param duration: 运行多少秒后自动结束，None 为一直运行
+    """
+    follower = LogFollower(log_filename, schema, from_start)
+    plot = RollingPlot(schema.stamp, fields, window_seconds, title=os.path.basename(log_filename))
+    import matplotlib.pyplot as plt
+    plt.show(block=False)
+    interval = 1.0 / refresh_hz
+    deadline = None if duration is None else time.monotonic() + duration
+    try:
+        while plot.is_open() and (deadline is None or time.monotonic() < deadline):
+            started = time.monotonic()
+            columns = follower.poll()
+            if columns is not None:
+                plot.push(columns)
+            plot.update()
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        follower.close()
+    return plot
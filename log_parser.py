@@ -0,0 +1,636 @@
+"""
+感知日志（protobuf 文本格式）流式解析器
+
+日志由 ------------------ 分隔成若干帧，每帧是 protobuf 文本格式：
+    header {
+      seq: 0
+      stamp: 3310904425468
+      frame_id: "enu"
+    }
+    objects: []
+本模块逐行读取日志，一遍扫描直接构造出每一帧的 dict，按帧以生成器的方式返回，
+不再把整块文本改写成 JSON 字符串再交给 json.loads。
+
+重复字段（relevant_frames、objects 等）不会互相覆盖：iter_frames 中收集为 Repeated，
+extract_table 则把每个目标写入列式帧表（FrameTable），一个目标一行。
+
+文件以 mmap 方式打开，帧边界（------------------ / IMU 日志的 ---）直接在字节缓冲区上查找，
+每次只切出一帧处理，几十 GB 的日志内存占用也保持不变。
+"""
+import os
+import math
+import mmap
+from array import array
+from bisect import bisect_left
+from functools import partial
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+
+SEPARATOR = b'------------------'
+
+
+class Repeated(list):
+    """重复字段（同一层级中出现多次的 key，或者 `key: []`）"""
+
+
+def parse_scalar(raw):
+    """
+    解析 `key: value` 中的 value
+    :param raw: 去掉首尾空白的 value（bytes）
+    :return: int / float / str，`[]` 返回空的 Repeated
+    """
+    if raw[:1] == b'"':
+        # 日志中的字符串没有转义（如 reserved_infos 里嵌入的 JSON），只去掉最外层引号
+        if len(raw) > 1 and raw[-1:] == b'"':
+            raw = raw[1:-1]
+        else:
+            raw = raw[1:]
+        return raw.decode('utf-8', 'replace')
+    if raw == b'[]':
+        return Repeated()
+    if b'.' not in raw:
+        try:
+            return int(raw)
+        except ValueError:
+            pass
+    try:
+        return float(raw)
+    except ValueError:
+        return raw.decode('utf-8', 'replace')
+
+
+def _put(node, key, value):
+    """写入字段，重复出现的 key 收集为 Repeated 而不是覆盖"""
+    if key in node:
+        old = node[key]
+        if type(old) is Repeated:
+            old.append(value)
+        else:
+            node[key] = Repeated((old, value))
+    else:
+        node[key] = value
+
+
+def parse_frames(lines):
+    """
+    把日志行流解析为帧
+    :param lines: 可迭代的日志行（bytes），通常是以 'rb' 打开的文件对象
+    :return: 生成器，每遇到一个分隔符返回一帧 dict；文件末尾没有分隔符的不完整帧会被丢弃
+    """
+    root = node = {}
+    stack = []
+    for line in lines:
+        s = line.strip()
+        if not s:
+            continue
+        if s == SEPARATOR:
+            if root:
+                yield root
+            root = node = {}
+            stack = []
+        elif s[-1] == 0x7b:  # 'name {'
+            key = s[:-1].rstrip(b' :').decode()
+            child = {}
+            if key in node:
+                _put(node, key, child)
+            else:
+                node[key] = child
+            stack.append(node)
+            node = child
+        elif s == b'}':
+            if stack:
+                node = stack.pop()
+        else:
+            key, sep, value = s.partition(b':')
+            if sep:
+                key = key.rstrip().decode()
+                value = parse_scalar(value.strip())
+                if key in node:
+                    _put(node, key, value)
+                else:
+                    node[key] = value
+            # 既不是字段也不是块的行（日志开头的程序输出等）直接跳过
+
+
+def iter_frames(log_filename):
+    """
+    逐帧读取日志文件
+    :param log_filename: 日志文件路径
+    :return: 生成器，每次返回一帧 dict
+    """
+    with open(log_filename, 'rb') as log_file:
+        yield from parse_frames(log_file)
+
+
+def last(value, default=None):
+    """重复字段取最后一个元素（与旧版 json.loads 遇到重复 key 时的覆盖行为一致）"""
+    if type(value) is Repeated:
+        return value[-1] if value else default
+    return value
+
+
+# ---------------- mmap 缓冲区扫描 ----------------
+
+@contextmanager
+def open_buffer(filename):
+    """以只读 mmap 方式打开文件，不把文件读入内存；空文件返回 b''"""
+    with open(filename, 'rb') as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # 空文件不能 mmap
+            yield b''
+            return
+        try:
+            yield buffer
+        finally:
+            buffer.close()
+
+
+def find_separator(buffer, separator=SEPARATOR, start=0, end=None):
+    """
+    在 buffer[start:end] 中查找下一个独占一行的分隔符
+    :param buffer: bytes 或 mmap
+    :param separator: 分隔符，感知日志为 ------------------，IMU 日志为 ---
+    :return: (分隔符行起点, 下一行起点)，找不到返回 None
+    """
+    if end is None:
+        end = len(buffer)
+    pos = start
+    while True:
+        i = buffer.find(separator, pos, end)
+        if i < 0:
+            return None
+        line_start = buffer.rfind(b'\n', 0, i) + 1
+        line_end = buffer.find(b'\n', i, end)
+        if line_end < 0:
+            line_end = end
+        # 分隔符所在行除空白外不能有其它内容（--- 不能匹配到 ------------------ 中间）
+        if not buffer[line_start:i].strip() and not buffer[i + len(separator):line_end].strip():
+            return line_start, min(line_end + 1, end)
+        pos = i + len(separator)
+
+
+def iter_frame_spans(buffer, separator=SEPARATOR, start=0, end=None):
+    """
+    按分隔符切分 buffer，只返回偏移不拷贝数据
+    :return: 生成器，每帧返回 (帧起点, 帧终点)；末尾没有分隔符的不完整帧不返回
+    """
+    if end is None:
+        end = len(buffer)
+    pos = start
+    while True:
+        found = find_separator(buffer, separator, pos, end)
+        if found is None:
+            return
+        yield pos, found[0]
+        pos = found[1]
+
+
+def find_value(buffer, key, start=0, end=None):
+    """
+    在 buffer[start:end] 中查找位于行首（可有缩进）的 `key: value`，只返回 value 的原始字节
+    :return: 去掉首尾空白的 value（bytes），找不到返回 None
+    """
+    if end is None:
+        end = len(buffer)
+    pattern = key + b':'
+    pos = start
+    while True:
+        i = buffer.find(pattern, pos, end)
+        if i < 0:
+            return None
+        line_start = buffer.rfind(b'\n', 0, i) + 1
+        if i == start or not buffer[max(line_start, start):i].strip():
+            line_end = buffer.find(b'\n', i, end)
+            if line_end < 0:
+                line_end = end
+            return buffer[i + len(pattern):line_end].strip()
+        pos = i + len(pattern)
+
+
+def iter_buffer_lines(buffer, start=0, end=None):
+    """逐行返回 buffer[start:end] 中的行（不含换行符）"""
+    if end is None:
+        end = len(buffer)
+    find = buffer.find
+    pos = start
+    while pos < end:
+        nl = find(b'\n', pos, end)
+        if nl < 0:
+            nl = end
+        yield buffer[pos:nl]
+        pos = nl + 1
+
+
+def _skip_block(lines):
+    """
+    跳过不需要的子块：只看行尾是否为 '{' 或 '}'，不做解析和解码
+    字符串值总是带引号，行尾不会是括号
+    """
+    depth = 1
+    for line in lines:
+        c = line.rstrip()[-1:]
+        if c == b'{':
+            depth += 1
+        elif c == b'}':
+            depth -= 1
+            if not depth:
+                return
+
+
+# ---------------- 列式帧表 ----------------
+
+MISSING_INT = -2 ** 63  # 整数列的缺失值（浮点列用 NaN，字符串列用 None）
+
+
+def _new_column(typecode):
+    """typecode: 'q' int64 / 'd' float64 / 's' 字符串"""
+    return [] if typecode == 's' else array(typecode)
+
+
+def missing_value(typecode):
+    """列类型对应的缺失值"""
+    if typecode == 'q':
+        return MISSING_INT
+    if typecode == 'd':
+        return math.nan
+    return None
+
+
+def _convert(raw, typecode):
+    """按列类型转换 value，转换失败返回缺失值"""
+    try:
+        if typecode == 'q':
+            try:
+                return int(raw)
+            except ValueError:
+                return int(float(raw))
+        if typecode == 'd':
+            return float(raw)
+    except ValueError:
+        return missing_value(typecode)
+    return parse_scalar(raw) if raw[:1] == b'"' else raw.decode('utf-8', 'replace')
+
+
+class FrameTable:
+    """
+    列式存储的帧数据：帧级字段每帧一个值，目标级字段（重复的目标块）每个目标一个值
+    frame_columns / object_columns: {列名: array.array（字符串列为 list）}
+    object_frame: 每个目标所属的帧序号（从 0 开始，单调不减）
+    end_offset: 已解析到的字节位置（最后一个完整帧的分隔符行之后），增量解析从这里继续
+    """
+
+    def __init__(self, frame_fields, object_fields):
+        """
+        :param frame_fields: [(列名, 路径元组, typecode)]，如 ('timestamp_ns', ('header', 'stamp'), 'q')
+        :param object_fields: [(列名, 相对目标块的路径元组, typecode)]
+        """
+        self.frame_fields = list(frame_fields)
+        self.object_fields = list(object_fields)
+        self.frame_columns = {name: _new_column(typecode) for name, _, typecode in self.frame_fields}
+        self.object_columns = {name: _new_column(typecode) for name, _, typecode in self.object_fields}
+        self.object_frame = array('q')
+        self.frame_count = 0
+        self.end_offset = 0
+
+    @property
+    def object_count(self):
+        return len(self.object_frame)
+
+    def object_offsets(self):
+        """CSR 偏移：第 i 帧的目标为 [offsets[i], offsets[i + 1])"""
+        offsets = array('q', [0]) * (self.frame_count + 1)
+        for frame_index in self.object_frame:
+            offsets[frame_index + 1] += 1
+        for i in range(self.frame_count):
+            offsets[i + 1] += offsets[i]
+        return offsets
+
+    def frame_objects(self, frame_index):
+        """第 frame_index 帧的目标序号范围"""
+        return range(bisect_left(self.object_frame, frame_index),
+                     bisect_left(self.object_frame, frame_index + 1))
+
+    def frame_rows(self, blank=''):
+        """按帧输出行（list），缺失值替换为 blank"""
+        return _rows(self.frame_fields, self.frame_columns, self.frame_count, blank)
+
+    def object_rows(self, blank=''):
+        """按目标输出行（list），缺失值替换为 blank"""
+        return _rows(self.object_fields, self.object_columns, self.object_count, blank)
+
+    def add_column(self, name, typecode, values, level='frame'):
+        """
+        追加一列（如由已提取的列计算得到的列）
+        :param level: 'frame' 帧级列（每帧一个值）或 'object' 目标级列（每个目标一个值）
+        """
+        column = _new_column(typecode)
+        column.extend(values)
+        if level == 'object':
+            self.object_fields.append((name, None, typecode))
+            self.object_columns[name] = column
+        else:
+            self.frame_fields.append((name, None, typecode))
+            self.frame_columns[name] = column
+
+    def long_columns(self):
+        """
+        展开为长表（NumPy 列）：每个目标一行，帧级列按所属帧重复；
+        没有目标的帧保留一行，目标列为缺失值
+        :return: {列名: ndarray}，第一列 frame_index 为所属帧序号
+        """
+        import numpy as np
+
+        frames, objects, object_frame = self.to_numpy()
+        counts = np.bincount(object_frame, minlength=self.frame_count)
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        rows_per_frame = np.maximum(counts, 1)
+        row_starts = np.cumsum(rows_per_frame) - rows_per_frame
+        row_frame = np.repeat(np.arange(self.frame_count), rows_per_frame)
+
+        # 每行对应的目标序号，没有目标的帧为 -1
+        object_index = np.arange(self.object_count)
+        row_object = np.full(len(row_frame), -1, dtype=np.int64)
+        row_object[row_starts[object_frame] + object_index - offsets[object_frame]] = object_index
+        has_object = row_object >= 0
+
+        columns = {'frame_index': row_frame}
+        for name, column in frames.items():
+            columns[name] = column[row_frame]
+        for name, _, typecode in self.object_fields:
+            column = objects[name]
+            expanded = np.full(len(row_frame), missing_value(typecode), dtype=column.dtype)
+            expanded[has_object] = column[row_object[has_object]]
+            columns[name] = expanded
+        return columns
+
+    def take_frames(self, order):
+        """
+        按帧序号列表重排帧（目标随所属帧一起移动）
+        :param order: 新表中第 i 帧对应的原帧序号
+        :return: 新的 FrameTable
+        """
+        result = FrameTable(self.frame_fields, self.object_fields)
+        offsets = self.object_offsets()
+        for name, column in self.frame_columns.items():
+            result.frame_columns[name].extend([column[i] for i in order])
+        objects = [j for i in order for j in range(offsets[i], offsets[i + 1])]
+        for name, column in self.object_columns.items():
+            result.object_columns[name].extend([column[j] for j in objects])
+        result.object_frame.extend(new_index for new_index, i in enumerate(order)
+                                   for _ in range(offsets[i], offsets[i + 1]))
+        result.frame_count = len(order)
+        result.end_offset = self.end_offset
+        return result
+
+    def sort_frames(self, name):
+        """按帧级列 name 稳定排序，已经有序时直接返回自身"""
+        column = self.frame_columns[name]
+        if all(a <= b for a, b in zip(column, column[1:])):
+            return self
+        return self.take_frames(sorted(range(self.frame_count), key=column.__getitem__))
+
+    def to_numpy(self):
+        """
+        转为 NumPy 数组（数值列零拷贝）
+        :return: (帧级列 dict, 目标级列 dict, object_frame)
+        """
+        import numpy as np
+
+        def convert(fields, columns):
+            result = {}
+            for name, _, typecode in fields:
+                column = columns[name]
+                if typecode == 's':
+                    result[name] = np.array(column, dtype=object)
+                else:
+                    result[name] = np.frombuffer(column, dtype=np.int64 if typecode == 'q' else np.float64)
+            return result
+
+        return (convert(self.frame_fields, self.frame_columns),
+                convert(self.object_fields, self.object_columns),
+                np.frombuffer(self.object_frame, dtype=np.int64))
+
+
+def _rows(fields, columns, count, blank):
+    values = []
+    for name, _, typecode in fields:
+        column = columns[name]
+        if typecode == 'q':
+            values.append([blank if v == MISSING_INT else v for v in column])
+        elif typecode == 'd':
+            values.append([blank if v != v else v for v in column])
+        else:
+            values.append([blank if v is None else v for v in column])
+    if not values:
+        return [[] for _ in range(count)]
+    return [list(row) for row in zip(*values)]
+
+
+def _bytes_path(path):
+    return tuple(key.encode() for key in path)
+
+
+class TablePlan:
+    """
+    编译后的提取计划：字段按所在块路径分组，并预先算好需要进入的块，
+    同一组字段只编译一次，解析每一行时只做 dict / set 查找
+    """
+
+    def __init__(self, frame_fields, object_path, object_fields):
+        """
+        :param frame_fields: 帧级字段，见 FrameTable
+        :param object_path: 目标块的路径元组，如 ('objects',) 或
+                            ('lidar_perception_objects', 'lidar_perception_object_data')；
+                            没有目标级字段时为 None
+        :param object_fields: 目标级字段（路径相对目标块）
+        """
+        self.frame_fields = list(frame_fields)
+        self.object_fields = list(object_fields)
+        self.object_key = None if object_path is None else _bytes_path(object_path)
+
+        # 每个块路径下需要提取的字段：{块路径: {字段名: (是否目标列, 列名, typecode)}}
+        self.fields_at = {}
+        for name, path, typecode in self.frame_fields:
+            path = _bytes_path(path)
+            self.fields_at.setdefault(path[:-1], {})[path[-1]] = (False, name, typecode)
+        for name, path, typecode in self.object_fields:
+            path = self.object_key + _bytes_path(path)
+            self.fields_at.setdefault(path[:-1], {})[path[-1]] = (True, name, typecode)
+        # 需要进入的块：所有字段路径及目标块路径的前缀，其余子块直接跳过
+        self.prefixes = {()}
+        for path in list(self.fields_at) + ([self.object_key] if self.object_key else []):
+            for i in range(1, len(path) + 1):
+                self.prefixes.add(path[:i])
+
+
+def extract_table(buffer, plan, start=0, end=None):
+    """
+    一遍扫描日志，直接把需要的字段写入列式帧表，不为嵌套消息构造 dict，
+    帧边界在缓冲区上直接查找，与字段无关的子块只看括号跳过，只有被提取的字段才会解码
+    :param buffer: 日志内容（bytes 或 mmap）
+    :param plan: TablePlan
+    :param start, end: 只解析 buffer[start:end]
+    :return: FrameTable
+    """
+    if end is None:
+        end = len(buffer)
+    table = FrameTable(plan.frame_fields, plan.object_fields)
+    table.end_offset = start
+    object_key = plan.object_key
+    fields_at = plan.fields_at
+    prefixes = plan.prefixes
+
+    frame_columns = table.frame_columns
+    object_columns = table.object_columns
+    object_defaults = [(object_columns[name], missing_value(typecode)) for name, _, typecode in table.object_fields]
+    object_frame = table.object_frame
+
+    frame_end = None
+    for frame_start, frame_end in iter_frame_spans(buffer, SEPARATOR, start, end):
+        path = ()
+        stack = []
+        current = fields_at.get(path)
+        pending = {}
+        seen = False
+
+        # 每次只切出一帧，内存占用与文件大小无关
+        lines = iter(buffer[frame_start:frame_end].split(b'\n'))
+        for line in lines:
+            s = line.strip()
+            if not s:
+                continue
+            if s[-1] == 0x7b:  # 'name {'
+                seen = True
+                child = path + (s[:-1].rstrip(b' :'),)
+                if child in prefixes:
+                    stack.append(path)
+                    path = child
+                    current = fields_at.get(path)
+                    if path == object_key:
+                        object_frame.append(table.frame_count)
+                        for column, missing in object_defaults:
+                            column.append(missing)
+                else:
+                    _skip_block(lines)
+            elif s == b'}':
+                if stack:
+                    path = stack.pop()
+                    current = fields_at.get(path)
+            else:
+                key, sep, value = s.partition(b':')
+                if sep:
+                    seen = True
+                    if current:
+                        target = current.get(key.rstrip())
+                        if target:
+                            is_object, name, typecode = target
+                            value = _convert(value.strip(), typecode)
+                            if is_object:
+                                # 目标字段只会出现在目标块内，写入当前（最后一个）目标
+                                object_columns[name][-1] = value
+                            else:
+                                pending[name] = value
+
+        # 只有程序输出等非数据行的“帧”（如日志开头）不计入
+        if seen:
+            for name, _, typecode in table.frame_fields:
+                frame_columns[name].append(pending.get(name, missing_value(typecode)))
+            table.frame_count += 1
+
+    if frame_end is not None:
+        # 最后一个分隔符行之后，末尾不完整的帧留到下次解析
+        line_end = buffer.find(b'\n', frame_end, end)
+        table.end_offset = end if line_end < 0 else line_end + 1
+    return table
+
+
+def read_table(log_filename, plan, start=0):
+    """
+    读取日志文件（mmap）为列式帧表
+    :param plan: TablePlan
+    :param start: 从该字节位置开始解析（必须是帧起点，如上次的 end_offset）
+    """
+    with open_buffer(log_filename) as buffer:
+        return extract_table(buffer, plan, start)
+
+
+def concat_tables(tables):
+    """按顺序拼接多个字段相同的 FrameTable，帧序号依次顺延"""
+    result = FrameTable(tables[0].frame_fields, tables[0].object_fields)
+    for table in tables:
+        for name, column in table.frame_columns.items():
+            result.frame_columns[name].extend(column)
+        for name, column in table.object_columns.items():
+            result.object_columns[name].extend(column)
+        base = result.frame_count
+        result.object_frame.extend(base + i for i in table.object_frame)
+        result.frame_count += table.frame_count
+        result.end_offset = table.end_offset
+    return result
+
+
+# ---------------- 按字节区间分片并行解析 ----------------
+
+MIN_SHARD_SIZE = 8 << 20  # 每个分片至少 8MB，文件太小时不值得开进程
+
+
+def shard_ranges(log_filename, shard_count, start=0):
+    """
+    把日志文件按字节均分，并把每个切分点对齐到下一个分隔符之后，保证帧不会被切断
+    :param start: 只切分 start 之后的部分
+    :return: [(start, end)] 字节区间，首尾相接覆盖 [start, 文件末尾)
+    """
+    size = os.path.getsize(log_filename)
+    bounds = [start]
+    with open_buffer(log_filename) as buffer:
+        for i in range(1, shard_count):
+            pos = start + (size - start) * i // shard_count
+            if pos <= bounds[-1]:
+                continue
+            found = find_separator(buffer, SEPARATOR, pos)
+            if found is None or found[1] >= size:
+                break
+            bounds.append(found[1])
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _run_shard(log_filename, func, byte_range):
+    with open_buffer(log_filename) as buffer:
+        return func(buffer, *byte_range)
+
+
+def map_shards(log_filename, func, workers=None, start=0):
+    """
+    把日志切分为若干分片，在进程池中对每个分片执行 func
+    :param log_filename: 日志文件路径
+    :param func: func(buffer, start, end) -> 结果，必须可以被 pickle（模块级函数或 functools.partial）
+    :param workers: 进程数，默认为 CPU 核数
+    :param start: 只处理 start 之后的部分
+    :return: 按文件顺序排列的各分片结果
+    """
+    workers = workers or os.cpu_count() or 1
+    shard_count = max(1, min(workers, (os.path.getsize(log_filename) - start) // MIN_SHARD_SIZE))
+    ranges = shard_ranges(log_filename, shard_count, start)
+    if len(ranges) == 1:
+        return [_run_shard(log_filename, func, ranges[0])]
+    with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+        return list(executor.map(partial(_run_shard, log_filename, func), ranges))
+
+
+def _extract_range(plan, buffer, start, end):
+    return extract_table(buffer, plan, start, end)
+
+
+def read_table_sharded(log_filename, plan, workers=None, sort_by=None, start=0):
+    """
+    多进程分片读取日志为列式帧表
+    :param plan: TablePlan
+    :param workers: 进程数，默认为 CPU 核数
+    :param sort_by: 合并后按该帧级列稳定排序（如 'timestamp_ns'），None 则保持文件顺序
+    :param start: 从该字节位置开始解析
+    """
+    func = partial(_extract_range, plan)
+    table = concat_tables(map_shards(log_filename, func, workers, start))
+    return table.sort_frames(sort_by) if sort_by else table
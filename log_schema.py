@@ -0,0 +1,348 @@
+"""
+日志字段提取的声明式描述（话题注册表）
+
+每个话题用一个 LogSchema 描述：话题名 + 需要导出的字段路径，例如
+    ('timestamp_ns', 'header.stamp', 'q')
+    ('track_id', 'objects[].track_info.track_id', 'q')
+    ('IsAEBActive', 'header.frame_id>cm.IsAEBActive', 'q')
+路径以 '.' 分隔；带 [] 的段为重复的目标块，每个目标导出一行；
+'>' 之后是字符串字段中内嵌 JSON 的路径（如 aeb 日志的 frame_id）。
+类型：'q' int64、'd' float64、's' 字符串，省略时为 'd'。
+
+LogSchema 在创建时编译为 TablePlan，解析时只进入包含所需字段的块，其余子块直接跳过。
+新增话题只需要 register_topic(LogSchema(...))，不需要再写解析代码。
+"""
+import os
+import json
+import numpy as np
+
+from log_parser import MISSING_INT, TablePlan, missing_value, extract_table, read_table, read_table_sharded
+from log_checkpoint import load_checkpoint, save_checkpoint, file_state, is_unchanged, resume_offset
+from table_io import open_sink, is_missing, sink_filename, append_columns
+
+TOPICS = {}
+
+
+def _parse_field(field):
+    """字段描述统一为 (列名, 路径, typecode)"""
+    if isinstance(field, str):
+        return field, field, 'd'
+    if len(field) == 2:
+        return field[0], field[1], 'd'
+    return tuple(field)
+
+
+def _json_value(data, path, typecode):
+    """从解码后的 JSON 中按路径取值并转换类型"""
+    value = data
+    for key in path:
+        if not isinstance(value, dict):
+            return missing_value(typecode)
+        value = value.get(key)
+    if value is None:
+        return missing_value(typecode)
+    try:
+        if typecode == 'q':
+            return int(value)
+        if typecode == 'd':
+            return float(value)
+    except (TypeError, ValueError):
+        return missing_value(typecode)
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+class LogSchema:
+    """一个话题的字段提取描述，创建时编译，可重复用于任意多个日志文件"""
+
+    def __init__(self, topic, fields, derived=(), columns=None, required=(), stamp=None):
+        """
+        :param topic: 话题名，如 'vision_object'
+        :param fields: 字段列表，每项为 (列名, 路径, typecode)、(列名, 路径) 或 路径字符串
+        :param derived: [(列名, func(columns) -> ndarray)]，由已提取的列计算的派生列
+        :param columns: 输出列顺序，默认为 fields 之后接 derived
+        :param required: 这些列缺失的行不输出；内嵌 JSON 的原字段以路径为列名（如 'header.frame_id'），解码失败视为缺失
+        :param stamp: 帧时间戳所在的列名，多进程分片合并时按它排序
+        """
+        self.topic = topic
+        self.derived = list(derived)
+        self.required = list(required)
+        self.stamp = stamp
+
+        frame_fields = []
+        object_fields = []
+        object_path = None
+        self.json_fields = []  # [(是否目标列, 原始字符串列名, [(列名, JSON 路径, typecode)])]
+        json_sources = {}
+        names = []
+
+        for field in fields:
+            name, path, typecode = _parse_field(field)
+            names.append(name)
+            text_path, _, json_path = path.partition('>')
+
+            segments = text_path.split('.')
+            field_object_path = None
+            for i, segment in enumerate(segments):
+                if segment.endswith('[]'):
+                    field_object_path = tuple(segments[:i]) + (segment[:-2],)
+                    segments = segments[i + 1:]
+                    break
+            if any(segment.endswith('[]') for segment in segments):
+                raise ValueError(f"{topic}: only one repeated block is supported in {path}")
+            if field_object_path is not None:
+                if object_path is not None and object_path != field_object_path:
+                    raise ValueError(f"{topic}: all object fields must share one repeated block, got {path}")
+                object_path = field_object_path
+            is_object = field_object_path is not None
+            target = object_fields if is_object else frame_fields
+
+            if json_path:
+                # 内嵌 JSON 的字符串字段先作为隐藏的字符串列提取，解析完成后再统一解码
+                source = json_sources.get(text_path)
+                if source is None:
+                    source = (is_object, text_path, [])
+                    json_sources[text_path] = source
+                    self.json_fields.append(source)
+                    target.append((source[1], tuple(segments), 's'))
+                source[2].append((name, tuple(json_path.split('.')), typecode))
+            else:
+                target.append((name, tuple(segments), typecode))
+
+        self.names = names + [name for name, _ in self.derived]
+        self.columns = list(columns) if columns else list(self.names)
+        self.plan = TablePlan(frame_fields, object_path, object_fields)
+
+    def read_table(self, log_filename, workers=1, start=0):
+        """
+        读取日志为 FrameTable（未展开、未计算派生列）
+        :param workers: > 1 时多进程分片解析，合并后按 stamp 列排序
+        :param start: 从该字节位置开始解析
+        """
+        if workers > 1:
+            table = read_table_sharded(log_filename, self.plan, workers=workers, sort_by=self.stamp, start=start)
+        else:
+            table = read_table(log_filename, self.plan, start)
+        self._decode_json(table)
+        return table
+
+    def extract(self, buffer, start=0, end=None):
+        """解析内存中的日志内容 buffer[start:end]（bytes 或 mmap）为 FrameTable，末尾不完整的帧不解析"""
+        table = extract_table(buffer, self.plan, start, end)
+        self._decode_json(table)
+        return table
+
+    def _decode_json(self, table):
+        for is_object, source, targets in self.json_fields:
+            raw = (table.object_columns if is_object else table.frame_columns)[source]
+            values = [[] for _ in targets]
+            for i, text in enumerate(raw):
+                data = None
+                if text is not None:
+                    try:
+                        data = json.loads(text)
+                    except json.JSONDecodeError as e:
+                        print(f"Error decoding JSON: {e}")
+                        # 解码失败视为缺失，可以在 required 中用原字段路径过滤
+                        raw[i] = None
+                for column, (_, path, typecode) in zip(values, targets):
+                    column.append(_json_value(data, path, typecode))
+            for column, (name, _, typecode) in zip(values, targets):
+                table.add_column(name, typecode, column, 'object' if is_object else 'frame')
+
+    def to_columns(self, table):
+        """FrameTable 展开为长表并计算派生列，返回按输出顺序排列的 {列名: ndarray}"""
+        columns = table.long_columns()
+        for name, func in self.derived:
+            columns[name] = func(columns)
+        if self.required:
+            keep = np.ones(len(columns['frame_index']), dtype=bool)
+            for name in self.required:
+                keep &= ~is_missing(columns[name])
+            if not keep.all():
+                columns = {name: column[keep] for name, column in columns.items()}
+        return {name: columns[name] for name in self.columns}
+
+    def read(self, log_filename, workers=1):
+        """读取日志为 {列名: ndarray}（长表，每个目标一行）"""
+        return self.to_columns(self.read_table(log_filename, workers))
+
+    def write(self, log_filename, output_filename, workers=1, incremental=False):
+        """
+        解析日志并写出
+        :param output_filename: 输出文件，格式由扩展名决定（.csv / .parquet / .feather / .npz）
+        :param incremental: True 时按输出文件旁的断点索引增量转换，见 update
+        """
+        if incremental:
+            self.update(log_filename, output_filename, workers)
+            return
+        columns = self.read(log_filename, workers)
+        with open_sink(output_filename, self.columns) as sink:
+            sink.write(columns)
+
+    def update(self, log_filename, output_filename, workers=1):
+        """
+        增量转换（断点索引见 log_checkpoint）：日志未变化时跳过，
+        只在末尾追加了数据时只解析新帧并追加到输出，否则从头转换
+        :return: 本次新写出的行数
+        """
+        output_filename = sink_filename(output_filename)
+        # 解析前记录大小和 mtime：解析期间日志继续增长时，下次不会被误判为未变化
+        stat = os.stat(log_filename)
+        state = load_checkpoint(output_filename)
+        offset = None
+        if state is not None and os.path.exists(output_filename) and self._same_output(state, output_filename):
+            if is_unchanged(state, log_filename):
+                print(f"{log_filename} is up to date, skipped")
+                return 0
+            offset = resume_offset(state, log_filename)
+
+        if offset is None:
+            table = self.read_table(log_filename, workers)
+            columns = self.to_columns(table)
+            with open_sink(output_filename, self.columns) as sink:
+                sink.write(columns)
+            frame_count = row_count = 0
+            last_stamp = None
+        else:
+            table = self.read_table(log_filename, workers, start=offset)
+            columns = self.to_columns(table)
+            if len(columns[self.columns[0]]):
+                append_columns(output_filename, columns)
+            frame_count, row_count, last_stamp = state['frame_count'], state['row_count'], state['last_stamp']
+
+        rows = len(columns[self.columns[0]])
+        if self.stamp in table.frame_columns and table.frame_count:
+            last_stamp = table.frame_columns[self.stamp][-1]
+        state = file_state(log_filename, table.end_offset, stat)
+        state.update({
+            'frame_count': frame_count + table.frame_count,
+            'row_count': row_count + rows,
+            'last_stamp': last_stamp,
+            'topic': self.topic,
+            'columns': self.columns,
+            'output_size': os.path.getsize(output_filename),
+        })
+        save_checkpoint(output_filename, state)
+        return rows
+
+    def _same_output(self, state, output_filename):
+        """输出列与上次相同，且输出文件在上次转换后没有被改动"""
+        return (state.get('topic') == self.topic and state.get('columns') == self.columns
+                and state.get('output_size') == os.path.getsize(output_filename))
+
+
+def register_topic(schema):
+    """注册话题，已存在时覆盖"""
+    TOPICS[schema.topic] = schema
+    return schema
+
+
+def get_topic(topic):
+    return TOPICS[topic]
+
+
+# 按日志内容识别话题：(特征字节串, 话题)，按顺序匹配，较具体的放在前面
+TOPIC_SIGNATURES = [
+    (b'lidar_perception_objects', 'radar_object'),
+    (b'vision_aeb_objects', 'vision_aeb_object'),
+    (b'aeb_switch', 'aeb_stat'),
+    (b'objects {', 'vision_object'),
+]
+DETECT_BYTES = 1 << 20
+
+
+def detect_topic(log_filename, head_bytes=DETECT_BYTES):
+    """
+    读取日志开头，按 TOPIC_SIGNATURES 判断话题
+    :return: 话题名，无法识别返回 None
+    """
+    with open(log_filename, 'rb') as f:
+        head = f.read(head_bytes)
+    for signature, topic in TOPIC_SIGNATURES:
+        if signature in head:
+            return topic
+    return None
+
+
+def pipeline_latency(columns):
+    """pipeline_timestamp_us = finish - start，任一缺失时为缺失"""
+    start = columns['pipeline_start_timestamp_us']
+    finish = columns['pipeline_finish_timestamp_us']
+    return np.where((start != MISSING_INT) & (finish != MISSING_INT), finish - start, MISSING_INT)
+
+
+# ---------------- 内置话题 ----------------
+
+PIPELINE_FIELDS = [
+    ('timestamp_ns', 'header.stamp', 'q'),
+    ('sensor_timestamp_us', 'meta.sensor_timestamp_us', 'q'),
+    ('pipeline_start_timestamp_us', 'meta.pipeline_start_timestamp_us', 'q'),
+    ('pipeline_finish_timestamp_us', 'meta.pipeline_finish_timestamp_us', 'q'),
+]
+PIPELINE_COLUMNS = ['timestamp_ns', 'sensor_timestamp_us', 'pipeline_start_timestamp_us',
+                    'pipeline_finish_timestamp_us', 'pipeline_timestamp_us']
+
+
+def vision_schema(object_name, topic=None):
+    """视觉目标话题，object_name 为目标字段名（objects / vision_aeb_objects）"""
+    return LogSchema(
+        topic or object_name,
+        PIPELINE_FIELDS + [
+            ('available', 'available', 'q'),
+            ('camera_source', f'{object_name}[].camera_source.value', 'q'),
+            ('track_id', f'{object_name}[].track_info.track_id', 'q'),
+            ('location_x', f'{object_name}[].location_bv.x', 'd'),
+        ],
+        derived=[('pipeline_timestamp_us', pipeline_latency)],
+        columns=PIPELINE_COLUMNS + ['available', 'camera_source', 'track_id', 'location_x'],
+        stamp='timestamp_ns',
+    )
+
+
+register_topic(LogSchema(
+    'aeb_stat',
+    [
+        ('stamp', 'header.stamp', 'q'),
+        ('aeb_switch', 'header.frame_id>aeb_switch', 'q'),
+        ('aeb_state', 'header.frame_id>aeb_state', 'q'),
+        ('aeb_direction', 'header.frame_id>aeb_direction', 'q'),
+        ('aeb_fcn_state', 'header.frame_id>aeb_fcn_state', 'q'),
+        ('IsAEBActive', 'header.frame_id>cm.IsAEBActive', 'q'),
+    ],
+    required=['stamp', 'header.frame_id'],
+    stamp='stamp',
+))
+
+register_topic(LogSchema(
+    'radar_object',
+    PIPELINE_FIELDS + [
+        ('available', 'lidar_perception_objects.available', 'q'),
+        ('camera_source', 'value', 'q'),  # not found
+        ('track_id', 'lidar_perception_objects.lidar_perception_object_data[].track_id', 'q'),
+        ('location_x', 'lidar_perception_objects.lidar_perception_object_data[].position.x', 'd'),
+        ('location_y', 'lidar_perception_objects.lidar_perception_object_data[].position.y', 'd'),
+        ('location_z', 'lidar_perception_objects.lidar_perception_object_data[].position.z', 'd'),
+    ],
+    derived=[('pipeline_timestamp_us', pipeline_latency)],
+    columns=PIPELINE_COLUMNS + ['available', 'camera_source', 'track_id', 'location_x', 'location_y', 'location_z'],
+    stamp='timestamp_ns',
+))
+
+register_topic(vision_schema('objects', 'vision_object'))
+register_topic(vision_schema('vision_aeb_objects', 'vision_aeb_object'))
+
+# 各感知话题共有的 header / meta 字段，每帧一行，用于时延分析（见 latency_analysis）
+register_topic(LogSchema(
+    'pipeline_meta',
+    [
+        ('seq', 'header.seq', 'q'),
+        ('stamp', 'header.stamp', 'q'),
+        ('sensor_timestamp_us', 'meta.sensor_timestamp_us', 'q'),
+        ('pipeline_start_timestamp_us', 'meta.pipeline_start_timestamp_us', 'q'),
+        ('pipeline_finish_timestamp_us', 'meta.pipeline_finish_timestamp_us', 'q'),
+        ('algorithm_name', 'meta.algorithm_name', 's'),
+        ('instance_name', 'meta.instance_name', 's'),
+        ('version_tag', 'meta.version_tag', 's'),
+    ],
+    stamp='stamp',
+))
@@ -285,11 +285,14 @@ class PathDataViewer:
             lat0, lon0, alt0 = self.ref_point
             self.transformed_data = []
             
-            for row in self.original_data:
-                id_, x, y, head, curv, type_ = row
-                e, n, u = coordinates.gauss_to_enu(x, y, curv) 
-                print(x, y, curv)
-                self.transformed_data.append((id_, x, y, head, curv, type_, e, n, u))
+            # 整条路径一次转换
+            if self.original_data:
+                _, xs, ys, _, curvs, _ = zip(*self.original_data)
+                curvs = np.array([np.nan if c is None else c for c in curvs], dtype=float)
+                es, ns, us = coordinates.gauss_to_enu(np.array(xs, dtype=float), np.array(ys, dtype=float), curvs)
+                for row, e, n, u in zip(self.original_data, es.tolist(), ns.tolist(), us.tolist()):
+                    id_, x, y, head, curv, type_ = row
+                    self.transformed_data.append((id_, x, y, head, curv, type_, e, n, u))
                 
             # 显示转换后的数据
             for row in self.transformed_data:
@@ -1,7 +1,6 @@
-from pdf2docx import Converter
-
-
 def pdf_to_word(pdf_path, word_path):
+    from pdf2docx import Converter  # 按需导入，只在转换时加载
+
     # 创建转换器对象
     cv = Converter(pdf_path)
 
@@ -13,8 +12,9 @@ def pdf_to_word(pdf_path, word_path):
     print(f"PDF已成功转换为Word文档：{word_path}")
 
 
-# 使用示例
-pdf_path = "example.pdf"  # 替换为你的PDF文件路径
-word_path = "output.docx"  # 输出的Word文件路径
-pdf_to_word(pdf_path, word_path)
+if __name__ == "__main__":
+    # 使用示例
+    pdf_path = "example.pdf"  # 替换为你的PDF文件路径
+    word_path = "output.docx"  # 输出的Word文件路径
+    pdf_to_word(pdf_path, word_path)
 
@@ -0,0 +1,155 @@
+"""
+大数据量曲线绘制
+
+plt.plot 把每个采样点都交给 Agg 光栅化，百万点级的序列要画几分钟，而且输出的图片每个像素列里叠了成百上千个点。
+这里在绘制前按像素列抽稀（M4）：x 轴按坐标轴的像素宽度分箱，每箱只保留第一个、最后一个、最小值、最大值四个点，
+折线经过这四个点画出的像素与画全部点相同（极值和箱间连线都保留），绘制耗时只与输出分辨率有关。
+x 不单调（如 x-y 轨迹）时无法按列分箱，改为按像素格压缩连续落在同一格内的点。
+NaN（传感器掉线等）不参与分箱，保留点之间原有 NaN 的地方插入一个 NaN，折线照常断开，与短序列原样绘制时一致。
+
+保存图片时直接使用 Figure + Agg 画布，不经过 pyplot：无需显示器，与当前 matplotlib 后端无关，
+也没有 pyplot 的全局图形列表，同一进程可连续绘制大量图片（见 FigureBatch）。
+matplotlib 只在创建图形时导入，decimate 只依赖 numpy。
+"""
+import numpy as np
+
+DPI = 300
+MARKER_SPACING_PX = 4  # 点间距（像素）不小于该值时才画圆点标记，更密的点画出来只是一团
+
+
+def _m4(bins, y):
+    """
+    bins 非递减（同一箱的点相邻），返回每箱第一个、最后一个、最小值、最大值的位置（升序、去重）
+    """
+    starts = np.flatnonzero(np.diff(bins)) + 1
+    starts = np.concatenate(([0], starts))
+    ends = np.concatenate((starts[1:], [len(bins)])) - 1
+    group = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(bins))))
+    position = np.arange(len(y))
+    # 每箱极值的位置：等于箱内极值的点中位置最小的一个
+    low = np.minimum.reduceat(np.where(y == np.minimum.reduceat(y, starts)[group], position, len(y)), starts)
+    high = np.minimum.reduceat(np.where(y == np.maximum.reduceat(y, starts)[group], position, len(y)), starts)
+    return np.unique(np.concatenate((starts, ends, low, high)))
+
+
+def _pixel_runs(x, y, width, height):
+    """x 不单调时：连续落在同一像素格内的点只保留首尾，返回保留点的位置"""
+    def cells(values, count):
+        low, high = values.min(), values.max()
+        scale = count / (high - low) if high > low else 0.0
+        return np.minimum(((values - low) * scale).astype(np.int64), count - 1)
+    cell = cells(x, width) * (height + 1) + cells(y, height)
+    change = np.flatnonzero(np.diff(cell)) + 1
+    return np.unique(np.concatenate(([0], change - 1, change, [len(cell) - 1])))
+
+
+def _break_gaps(x, y, source, valid):
+    """
+    抽稀后的相邻两点之间原来有 NaN（传感器掉线等）时插入一个 NaN 点，折线在此断开，与不抽稀时画法一致；
+    每两个保留点之间最多插入一个，点数仍与像素宽度成正比
+    :param source: 每个保留点在原序列中的下标
+    """
+    missing = np.cumsum(~valid)
+    gaps = np.flatnonzero(missing[source[1:]] != missing[source[:-1]]) + 1
+    if not len(gaps):
+        return x, y
+    return np.insert(x, gaps, np.nan), np.insert(y, gaps, np.nan)
+
+
+def decimate(y, x=None, width=2000, height=None):
+    """
+    按像素抽稀
+    :param y: 数值序列
+    :param x: 横坐标，None 则为下标
+    :param width: 绘图区的像素宽度（分箱数）
+    :param height: x 不单调时按 width x height 的像素格压缩，None 则与 width 相同
+    :return: (x, y)，点数不多于 4 * width 时原样返回，否则 x 单调时不超过 8 * width（含断开用的 NaN）；
+             x 或 y 为 NaN 处折线断开，与原样绘制一致
+    """
+    y = np.asarray(y, dtype=np.float64)
+    x = None if x is None else np.asarray(x, dtype=np.float64)
+    width = max(int(width), 1)
+    if len(y) <= 4 * width:
+        return (np.arange(len(y)) if x is None else x), y
+    valid = ~np.isnan(y) if x is None else ~(np.isnan(x) | np.isnan(y))
+    index = np.flatnonzero(valid)
+    if not len(index):
+        return np.zeros(0), np.zeros(0)
+    values = y[index]
+    if x is None:
+        bins = index * width // len(y)
+        position = index
+    else:
+        position = x[index]
+        if not (np.diff(position) >= 0).all():
+            keep = _pixel_runs(position, values, width, max(int(height or width), 1))
+            return _break_gaps(position[keep], values[keep], index[keep], valid)
+        scale = width / (position[-1] - position[0]) if position[-1] > position[0] else 0.0
+        bins = np.minimum(((position - position[0]) * scale).astype(np.int64), width - 1)
+    keep = _m4(bins, values)
+    return _break_gaps(position[keep].astype(np.float64), values[keep], index[keep], valid)
+
+
+def new_figure(figsize, dpi=DPI, interactive=False):
+    """
+    :param dpi: 图形的分辨率，决定抽稀的像素宽度，应与保存时一致
+    :param interactive: True 经 pyplot 创建（可 plt.show 查看，使用屏幕分辨率），否则为不经过 pyplot 的 Agg 图形
+    """
+    if interactive:
+        import matplotlib.pyplot as plt
+        return plt.figure(figsize=figsize)
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    figure = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(figure)
+    return figure
+
+
+def plot_line(axes, y, x=None, marker=None, **kwargs):
+    """
+    按坐标轴的像素宽度抽稀后画折线，点距不小于 MARKER_SPACING_PX 时才画 marker
+    :return: Line2D
+    """
+    extent = axes.get_window_extent()
+    x, y = decimate(y, x, extent.width, extent.height)
+    if marker is not None and len(y) * MARKER_SPACING_PX > extent.width:
+        marker = None
+    return axes.plot(x, y, marker=marker, **kwargs)[0]
+
+
+def save_figure(figure, filename, dpi=DPI):
+    """保存并释放图形"""
+    figure.savefig(filename, dpi=dpi, bbox_inches='tight')
+    if figure.canvas.manager is not None:  # 经 pyplot 创建的图形需从 pyplot 的图形列表中移除
+        import matplotlib.pyplot as plt
+        plt.close(figure)
+
+
+class FigureBatch:
+    """
+    同一进程中连续绘制多张同样大小的图片，复用一个 Agg 图形（每张图前清空），省去反复创建图形的开销
+
+        with FigureBatch((10, 5)) as batch:
+            for column in columns:
+                axes = batch.axes()
+                plot_line(axes, data[column])
+                batch.save(f'{column}.png')
+    """
+
+    def __init__(self, figsize, dpi=DPI):
+        self.dpi = dpi
+        self.figure = new_figure(figsize, dpi)
+
+    def axes(self, rows=1, columns=1):
+        """清空图形并创建子图，rows x columns 大于 1 时返回 axes 数组"""
+        self.figure.clear()
+        return self.figure.subplots(rows, columns)
+
+    def save(self, filename):
+        self.figure.savefig(filename, dpi=self.dpi, bbox_inches='tight')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.figure.clear()
@@ -1,70 +1,256 @@
-import re
-import datetime
-import pandas as pd
-import matplotlib.pyplot as plt
-
-def process_txt():
-    # 读取txt文件
-    file_path = 'data.txt'  # 替换为你的文件路径
-    msg_times = []
-    rcv_times = []
-    pos = []
-    ori = []
-
-    # 读取文件并解析数据
-    with open(file_path, 'r') as file:
-        lines = file.readlines()
-        for line in lines:
-            if "Msg" in line and "Rcv" in line:
-            # 解析 Msg time 和 Rcv time
-                msg_time_match = re.search(r'\[Msg time\]:\s*([\d\.]+)', line)
-                rcv_time_match = re.search(r'\[Rcv time\]:\s*(\d+)', line)
-
-                msg_time = datetime.datetime.utcfromtimestamp(float(msg_time_match.group(1)))
-                rcv_time = datetime.datetime.utcfromtimestamp(float(rcv_time_match.group(1)) / 1000)
-
-                msg_time = msg_time.strftime('%S.%f')[:-3]
-                rcv_time = rcv_time.strftime('%S.%f')[:-3]
-
-                msg_times.append(msg_time)  # 获取 Msg time
-                rcv_times.append(rcv_time)  # 获取 Rcv time
-
-            if "pos" in line:
-                # 解析 pos
-                pos_match = re.search(r'pos\[(.*?)\]', line)
-            if "ori" in line:
-                ori_match = re.search(r'ori\[(.*?)\]', line)
-
-                if pos_match and ori_match:
-                    # 解析 pos 和 ori
-                    pos_values = list(map(float, pos_match.group(1).split(',')))
-                    ori_values = list(map(float, ori_match.group(1).split(',')))
-
-                    pos.append(pos_values)  # 获取 pos
-                    ori.append(ori_values)  # 获取 ori
-            if len(pos) > 400:
-                break
-
-    # 将数据存储到 DataFrame 中
-    data = {
-        'Msg time': msg_times,
-        'Rcv time': rcv_times,
-        'Pos X': [p[0] for p in pos],
-        'Pos Y': [p[1] for p in pos],
-        'Pos Z': [p[2] for p in pos],
-        'Ori X': [o[0] for o in ori],
-        'Ori Y': [o[1] for o in ori],
-        'Ori Z': [o[2] for o in ori]
-    }
-
-    df = pd.DataFrame(data)
-
-    # 保存为 CSV 文件
-    output_path = 'output_data.csv'  # 你可以修改输出文件路径
-    df.to_csv(output_path, index=False)
+"""
+SimOne 位姿日志与 IMU 日志的解析和绘图
+
+两种日志都按块读入预先分配的缓冲区（_iter_buffers），在最后一条完整记录处截断，剩余部分与下一块拼接，
+内存只与块大小有关；块内按分隔符的位置整列定位字段，每个值取其后同一行内的第一段非空白字符（长度不限），
+各段拼接后一次 split 并整列转换为数值，不逐行调用 Python（见 _field_values）；
+行内没有值或无法转换的值记为缺失，读完后打印个数。
+"""
+import numpy as np
+from log_parser import MISSING_INT
+from table_io import open_sink
+
+BLOCK_SIZE = 16 << 20
+
+_PAD = 32  # 缓冲区前后各留出的换行符，向前比较字段名时不需要判断越界
+NEWLINE, SPACE, COLON, DASH, COMMA = ord('\n'), ord(' '), ord(':'), ord('-'), ord(',')
+LEFT_BRACKET, RIGHT_BRACKET = ord('['), ord(']')
+
+
+# ---------------- 按块读取与整列转换 ----------------
+
+def _text_numbers(tokens, dtype, counts=None):
+    """
+    bytes 列表 -> 数值，整列转换失败时逐个转换，无法转换的为缺失
+    :param counts: 指定时把无法转换的个数累加到 counts['invalid']
+    """
+    try:
+        return np.array(tokens, dtype=dtype)
+    except (ValueError, OverflowError):
+        missing = MISSING_INT if dtype == np.int64 else np.nan
+        values = []
+        for item in tokens:
+            try:
+                values.append(int(item) if dtype == np.int64 else float(item))
+            except (ValueError, OverflowError):
+                values.append(missing)
+        values = np.array(values, dtype=dtype)
+        if counts is not None:
+            counts['invalid'] += int(np.sum(values == missing) if dtype == np.int64 else np.isnan(values).sum())
+        return values
+
+
+def _blank_runs(buffer, end):
+    """
+    buffer[:end + 1] 中空白（<= 空格）的标记，以及空白 / 非空白交替处的下标
+    :return: (blank, changes)，每个块计算一次，供 _field_values 定位值的首尾
+    """
+    blank = buffer[:end + 1] <= SPACE
+    return blank, np.flatnonzero(blank[1:] != blank[:-1]) + 1
+
+
+def _gather(buffer, begin, stop):
+    """
+    buffer[begin:stop] 各段（段内没有空白）依次取出、以空格隔开后拆分，返回 bytes 列表，长度不限
+    """
+    if not len(begin):
+        return []
+    lengths = stop - begin + 1  # 每段连同之后的一个字节
+    heads = np.cumsum(lengths) - lengths  # 每段在输出中的起点
+    step = np.ones(heads[-1] + lengths[-1], dtype=np.int64)
+    step[0] = begin[0]
+    step[heads[1:]] = begin[1:] - stop[:-1]
+    text = buffer[np.cumsum(step)]
+    text[heads + lengths - 1] = SPACE
+    return text.tobytes().split()
+
+
+def _field_values(buffer, runs, limits, starts, dtype, counts):
+    """
+    每个起点之后、同一行内的第一段非空白字符整列转换为数值，值的长度和之前的空白数都不限
+    :param runs: _blank_runs 的返回值
+    :param limits: 值须在起点之后的第一个 limit 之前开始：buffer[:end + 1] 中换行符的下标（最后一行之后须有换行符），
+                   字段之间另有分隔符时也包含分隔符的下标
+    :param counts: 原地累加 'invalid'：起点之后没有值或无法转换的个数（为缺失）
+    :return: (values, found)，found 为 False 表示起点之后到 limit 之前没有值
+    """
+    blank, changes = runs
+    # 起点之后的第一个交替处：起点为空白时是值的开头，下一个交替处是值的结尾；否则起点就是值的开头
+    following = np.searchsorted(changes, starts, side='right')
+    following = np.minimum(following + blank[starts], len(changes) - 1)
+    begin = np.where(blank[starts], changes[following - 1], starts)
+    found = (begin >= starts) & (begin < limits[np.searchsorted(limits, starts)])
+    begin, stop = begin[found], changes[following[found]]
+    values = np.full(len(starts), MISSING_INT if dtype == np.int64 else np.nan, dtype=dtype)
+    values[found] = _text_numbers(_gather(buffer, begin, stop), dtype, counts)
+    counts['invalid'] += int(len(found) - found.sum())
+    return values, found
+
+
+def _matches(buffer, positions, literal):
+    """buffer 中从每个位置开始是否为 literal（bytes）"""
+    return np.all(buffer[positions[:, None] + np.arange(len(literal))] == np.frombuffer(literal, dtype=np.uint8),
+                  axis=1)
+
+
+def _iter_buffers(file_path, block_size, cut_position):
+    """
+    文件按块读入预先分配的缓冲区（前后各留 _PAD 个换行符），在最后一条完整记录之后截断，
+    之后的部分移到缓冲区开头与下一块拼接；单条记录超过缓冲区时按 2 倍扩大
+    :param cut_position: f(buffer, end) -> buffer[_PAD:end] 中最后一条记录的起点（行首），没有完整记录时为 None
+    :return: 逐块产出 (buffer, end)，buffer[_PAD:end] 为完整的记录；buffer 会被下一块复用
+    """
+    buffer = np.full(_PAD + 2 * block_size + _PAD, NEWLINE, dtype=np.uint8)
+    filled = 0
+    with open(file_path, 'rb') as f:
+        while True:
+            if _PAD + filled + block_size + _PAD > len(buffer):
+                grown = np.full(2 * len(buffer), NEWLINE, dtype=np.uint8)
+                grown[:_PAD + filled] = buffer[:_PAD + filled]
+                buffer = grown
+            count = f.readinto(memoryview(buffer)[_PAD + filled:_PAD + filled + block_size])
+            filled += count
+            end = _PAD + filled
+            buffer[end:end + _PAD] = NEWLINE
+            if count == 0:
+                if filled:
+                    yield buffer, end
+                return
+            cut = cut_position(buffer, end)
+            if cut is None or cut <= _PAD:
+                continue  # 缓冲区内还没有完整的记录
+            yield buffer, cut
+            # 最后一条记录（可能不完整）移到开头
+            remainder = buffer[cut:end].copy()
+            buffer[_PAD:_PAD + len(remainder)] = remainder
+            filled = len(remainder)
+
+
+# ---------------- SimOne 位姿 ----------------
+# 每条位姿为一行消息头 + pos / ori 两行：
+#   ----------[Msg time]:	1736323374.206364000	----------[Rcv time]:	1736323374229
+#   pos[12.0087,81.7853,1.43723]
+#   ori[0.00964828,-0.0202165,-1.24355]
+# 多线程输出会把行截断或混在一起（消息头只剩 [Rcv time]、pos 行丢了开头、单独一行接收时间等），
+# 因此以 [Rcv time] 为每条记录的起点，记录内取第一个完整的 pos / ori 行，缺少的字段为 NaN，不会与其它记录错位。
+# 时间为 float64 的 epoch 秒（Msg time 精确到约 0.2 us）。
+
+POSE_COLUMNS = ['Msg time', 'Rcv time', 'Pos X', 'Pos Y', 'Pos Z', 'Ori X', 'Ori Y', 'Ori Z']
+_TAG_LENGTH = len('[Rcv time]:')
+
+
+def _pose_cut(buffer, end):
+    """最后一个 [Rcv time] 所在行的行首"""
+    text = buffer[:end].tobytes()
+    position = text.rfind(b'[Rcv time]:', _PAD)
+    return None if position < 0 else text.rfind(b'\n', 0, position) + 1
+
+
+def _parse_poses(buffer, end, counts):
+    """
+    整列解析 buffer[_PAD:end] 中的位姿记录
+    :param counts: {'records': 记录数, 'incomplete': 缺少字段的记录数, 'invalid': 无法解析的值的个数}，原地累加
+    :return: {列名: ndarray}，列见 POSE_COLUMNS
+    """
+    text = buffer[:end]
+    newlines = np.flatnonzero(buffer[:end + 1] == NEWLINE)  # buffer[end] 为下一行行首或填充的换行符
+    brackets = np.flatnonzero(text[_PAD:] == LEFT_BRACKET) + _PAD
+    rcv = brackets[_matches(buffer, brackets, b'[Rcv time]')]  # 每条记录的起点
+    msg = brackets[_matches(buffer, brackets, b'[Msg time]')]
+    record_count = len(rcv)
+    columns = {name: np.full(record_count, np.nan) for name in POSE_COLUMNS}
+    if not record_count:
+        return columns
+
+    # [Msg time] 只取与 [Rcv time] 在同一行的
+    record = np.searchsorted(rcv, msg)
+    same_line = record < record_count
+    same_line[same_line] = (np.searchsorted(newlines, msg[same_line])
+                            == np.searchsorted(newlines, rcv[record[same_line]]))
+    incomplete = np.ones(record_count, dtype=bool)
+    incomplete[record[same_line]] = False
+
+    # pos / ori：行首为 pos[ / ori[，一行内恰好两个逗号，] 在第二个逗号之后，才是完整的行；每条记录取第一个完整的行
+    commas = np.flatnonzero(text == COMMA)
+    closes = np.flatnonzero(text == RIGHT_BRACKET)
+    fields = []
+    for head, names in ((b'\npos[', ('Pos X', 'Pos Y', 'Pos Z')), (b'\nori[', ('Ori X', 'Ori Y', 'Ori Z'))):
+        starts = brackets[_matches(buffer, brackets - 4, head)]
+        line_end = newlines[np.searchsorted(newlines, starts)]
+        comma = np.searchsorted(commas, starts)
+        close = np.searchsorted(closes, starts)
+        ok = (np.searchsorted(commas, line_end) - comma == 2) & (close < len(closes))
+        ok[ok] = (closes[close[ok]] < line_end[ok]) & (closes[close[ok]] > commas[comma[ok] + 1])
+        owner = np.searchsorted(rcv, starts, side='right') - 1  # 所属记录，第一条记录之前的行丢弃
+        ok &= owner >= 0
+        owner, first = np.unique(owner[ok], return_index=True)
+        starts, comma = starts[ok][first], comma[ok][first]
+        fields.append((names, owner, (starts + 1, commas[comma] + 1, commas[comma + 1] + 1)))
+        missing = np.ones(record_count, dtype=bool)
+        missing[owner] = False
+        incomplete |= missing
+
+    # 逗号和 ] 改为空格后，每个值都是起点之后的一段非空白字符（见 _field_values）
+    text[commas] = SPACE
+    text[closes] = SPACE
+    runs = _blank_runs(buffer, end)
+    received, _ = _field_values(buffer, runs, newlines, rcv + _TAG_LENGTH, np.int64, counts)  # 整数毫秒
+    columns['Rcv time'] = np.where(received == MISSING_INT, np.nan, received / 1000.0)
+    columns['Msg time'][record[same_line]] = _field_values(buffer, runs, newlines, msg[same_line] + _TAG_LENGTH,
+                                                           np.float64, counts)[0]
+    separators = np.sort(np.concatenate((newlines, commas, closes)))  # 空的值不取到下一个值
+    for names, owner, value_starts in fields:
+        for name, start in zip(names, value_starts):
+            columns[name][owner] = _field_values(buffer, runs, separators, start, np.float64, counts)[0]
+
+    counts['records'] += record_count
+    counts['incomplete'] += int(incomplete.sum())
+    return columns
+
+
+def iter_poses(file_path, block_size=BLOCK_SIZE):
+    """
+    按块流式解析 SimOne 位姿日志，缺少字段的记录数在读完后打印一次
+    :return: 逐块产出 {列名: ndarray}，列见 POSE_COLUMNS
+    """
+    counts = {'records': 0, 'incomplete': 0, 'invalid': 0}
+    for buffer, end in _iter_buffers(file_path, block_size, _pose_cut):
+        yield _parse_poses(buffer, end, counts)
+    if counts['incomplete']:
+        print(f"{file_path}: {counts['incomplete']} of {counts['records']} poses are incomplete "
+              f"(missing Msg time / pos / ori, filled with NaN)")
+    if counts['invalid']:
+        print(f"{file_path}: {counts['invalid']} pose values could not be parsed (empty or not a number, "
+              f"filled with NaN)")
+
+
+def read_poses(file_path):
+    """
+    解析 SimOne 位姿日志
+    :return: {列名: ndarray}，列见 POSE_COLUMNS，时间为 epoch 秒
+    """
+    parts = list(iter_poses(file_path))
+    if not parts:
+        return {name: np.zeros(0) for name in POSE_COLUMNS}
+    return {name: np.concatenate([part[name] for part in parts]) for name in POSE_COLUMNS}
 
+
+def process_txt(file_path='data.txt', output_path='output_data.csv'):
+    """
+    解析 SimOne 位姿日志并保存，逐块写出（.npz 除外，见 table_io）
+    :param file_path: 输入的 txt 文件路径
+    :param output_path: 输出文件，格式由扩展名决定（.csv / .parquet / .feather / .npz）
+    """
+    with open_sink(output_path, POSE_COLUMNS) as sink:
+        for columns in iter_poses(file_path):
+            sink.write(columns)
     print(f"Data has been saved to {output_path}")
+
+
 def write_figure_txt():
+    import matplotlib.pyplot as plt  # 按需导入，process_txt 等转换不加载 matplotlib
+    from plot_render import plot_line
+
     # 读取txt文件并解析数据
     file_path = '2.txt'  # 修改为你的文件路径
     x = []
@@ -78,8 +264,9 @@ def write_figure_txt():
             x.append(float(pos[0]))  # 获取 x 值
             y.append(float(pos[1]))  # 获取 y 值
 
-    # 创建图形并绘制
-    plt.plot(x, y, marker='o', linestyle='-', color='b', label='Path')
+    # 创建图形并绘制（连续落在同一像素内的点只画首尾，见 plot_render）
+    plt.figure()
+    plot_line(plt.gca(), y, x, marker='o', linestyle='-', color='b', label='Path')
 
     # 添加标题和标签
     plt.title('X and Y Plot')
@@ -94,68 +281,153 @@ def write_figure_txt():
     plt.grid(True)
     plt.show()
 
-if __name__ == "__main__":
-    # process_txt();
 
-    # 读取文件内容
-    with open('imu_250305_leftright.log', 'r') as file:
-        content = file.read()
-
-    # 正则表达式提取数据
-    pattern = re.compile(
-        r'timestamp_us: (\d+).*?'
-        r'accx: ([\d\.\-e]+).*?'
-        r'accy: ([\d\.\-e]+).*?'
-        r'accz: ([\d\.\-e]+).*?'
-        r'gyrox: ([\d\.\-e]+).*?'
-        r'gyroy: ([\d\.\-e]+).*?'
-        r'gyroz: ([\d\.\-e]+)',
-        re.DOTALL
-    )
-
-    matches = pattern.findall(content)
-
-    # 提取数据
-    timestamps = []
-    accx = []
-    accy = []
-    accz = []
-    gyrox = []
-    gyroy = []
-    gyroz = []
-
-    for match in matches:
-        timestamps.append(int(match[0]))
-        accx.append(float(match[1]))
-        accy.append(float(match[2]))
-        accz.append(float(match[3]))
-        gyrox.append(float(match[4]))
-        gyroy.append(float(match[5]))
-        gyroz.append(float(match[6]))
-
-    # 绘制图表
-    plt.figure(figsize=(12, 8))
+# IMU 帧以独占一行的 --- 分隔，每帧的字段：
+#   header.stamp.secs / nsecs、meta.timestamp_us、info.imu_data_basic.accx ... gyroz / temperature
+IMU_INT_KEYS = ['timestamp_us', 'secs', 'nsecs']
+IMU_FLOAT_KEYS = ['accx', 'accy', 'accz', 'gyrox', 'gyroy', 'gyroz', 'temperature']
+IMU_COLUMNS = ['timestamp_us', 'secs', 'nsecs', 'accx', 'accy', 'accz', 'gyrox', 'gyroy', 'gyroz', 'temperature']
+IMU_REQUIRED = ['timestamp_us', 'accx', 'accy', 'accz', 'gyrox', 'gyroy', 'gyroz']  # 缺少其中任一字段的帧跳过
+
+
+def _imu_separators(buffer):
+    """--- 分隔行的起点（行内只有 ---）"""
+    dashes = np.flatnonzero(buffer[:-3] == DASH)
+    return dashes[(buffer[dashes - 1] == NEWLINE) & (buffer[dashes + 1] == DASH) & (buffer[dashes + 2] == DASH)
+                  & (buffer[dashes + 3] <= SPACE)]
+
+
+def _key_rows(buffer, colons, last_bytes, name):
+    """
+    冒号之前为 name 的字段（name 之前为空白）的冒号序号
+    :param last_bytes: 每个冒号之前的一个字节，先按 name 的最后一个字符筛选
+    """
+    key = name.encode()
+    rows = np.flatnonzero(last_bytes == key[-1])
+    rows = rows[buffer[colons[rows] - len(key) - 1] <= SPACE]
+    return rows[_matches(buffer, colons[rows] - len(key), key)]
+
+
+def _imu_cut(buffer, end):
+    """最后一个 --- 行的行首"""
+    text = buffer[:end].tobytes()
+    position = text.rfind(b'\n---', _PAD - 1)
+    while position >= 0 and text[position + 4:position + 5] > b' ':
+        position = text.rfind(b'\n---', _PAD - 1, position)
+    return None if position < 0 else position + 1
+
+
+def _parse_imu_frames(buffer, end, counts):
+    """
+    整列解析 buffer[_PAD:end] 中的帧（end 为行首），不逐行调用 Python：
+    以冒号定位字段，按 --- 的位置二分查找得到字段所属的帧，冒号后的值见 _field_values。
+    帧内缺少某个字段时只影响这一帧，不会与下一帧错位
+    :param counts: {'invalid': 无法解析的值的个数}，原地累加
+    :return: {列名: ndarray}
+    """
+    separators = _imu_separators(buffer[:end + 3])
+    colons = np.flatnonzero(buffer[:end] == COLON)
+    colons = colons[colons >= _PAD]
+    newlines = np.flatnonzero(buffer[:end + 1] == NEWLINE)
+    runs = _blank_runs(buffer, end)
+    last_bytes = buffer[colons - 1]
+    frame_count = len(separators) + 1  # 第一个分隔符之前为第 0 帧
+
+    columns = {}
+    present = []
+    for keys, dtype, missing in ((IMU_INT_KEYS, np.int64, MISSING_INT), (IMU_FLOAT_KEYS, np.float64, np.nan)):
+        key_rows = [_key_rows(buffer, colons, last_bytes, name) for name in keys]
+        rows = np.concatenate(key_rows)
+        values, found = _field_values(buffer, runs, newlines, colons[rows] + 1, dtype, counts)
+        frames = np.searchsorted(separators, colons[rows])
+        offset = 0
+        for name, name_rows in zip(keys, key_rows):
+            part = slice(offset, offset + len(name_rows))
+            column = np.full(frame_count, missing, dtype=dtype)
+            column[frames[part]] = values[part]
+            columns[name] = column
+            if name in IMU_REQUIRED:
+                has = np.zeros(frame_count, dtype=bool)
+                has[frames[part][found[part]]] = True
+                present.append(has)
+            offset += len(name_rows)
+    keep = np.all(present, axis=0)
+    return {name: columns[name][keep] for name in IMU_COLUMNS}
+
+
+def iter_imu(file_path, block_size=BLOCK_SIZE):
+    """
+    按块流式解析 IMU 日志，在最后一个 --- 处截断，不完整的帧与下一块拼接（见 _iter_buffers）
+    内存只与块大小有关，与文件大小无关；无法解析的值在读完后打印个数
+    :return: 逐块产出 {列名: ndarray}，列见 IMU_COLUMNS
+    """
+    counts = {'invalid': 0}
+    for buffer, end in _iter_buffers(file_path, block_size, _imu_cut):
+        yield _parse_imu_frames(buffer, end, counts)
+    if counts['invalid']:
+        print(f"{file_path}: {counts['invalid']} IMU values could not be parsed (empty or not a number, "
+              f"written as missing)")
+
+
+def read_imu(file_path):
+    """
+    解析 IMU 日志（帧之间以 --- 分隔）
+    :return: {列名: ndarray}，列见 IMU_COLUMNS；整数列缺失为 MISSING_INT，浮点列缺失为 NaN
+    """
+    parts = list(iter_imu(file_path))
+    if not parts:
+        return {name: np.zeros(0, dtype=np.int64 if name in IMU_INT_KEYS else np.float64) for name in IMU_COLUMNS}
+    return {name: np.concatenate([part[name] for part in parts]) for name in IMU_COLUMNS}
+
+
+def process_imu(file_path, output_path):
+    """
+    解析 IMU 日志并保存，逐块写出（.npz 除外，见 table_io）
+    :param output_path: 输出文件，格式由扩展名决定（.csv / .parquet / .feather / .npz）
+    """
+    with open_sink(output_path, IMU_COLUMNS) as sink:
+        for columns in iter_imu(file_path):
+            sink.write(columns)
+    print(f"Data has been saved to {output_path}")
+
+
+def write_figure_imu(data, figure_path=None):
+    """
+    绘制加速度、角速度曲线，按像素抽稀后绘制（见 plot_render），长时间的 IMU 日志也只画几千个点
+    :param data: read_imu 的返回值
+    :param figure_path: 保存的图片路径，None 则显示窗口
+    """
+    from plot_render import new_figure, plot_line, save_figure
+
+    timestamps = data['timestamp_us']
+    figure = new_figure((12, 8), interactive=figure_path is None)
+    acc_axes, gyro_axes = figure.subplots(2, 1)
 
     # 绘制加速度数据
-    plt.subplot(2, 1, 1)
-    plt.plot(timestamps, accx, label='accx')
-    plt.plot(timestamps, accy, label='accy')
-    plt.plot(timestamps, accz, label='accz')
-    plt.xlabel('Timestamp (us)')
-    plt.ylabel('Acceleration')
-    plt.title('Acceleration over Time')
-    plt.legend()
+    for name in ('accx', 'accy', 'accz'):
+        plot_line(acc_axes, data[name], timestamps, label=name)
+    acc_axes.set_xlabel('Timestamp (us)')
+    acc_axes.set_ylabel('Acceleration')
+    acc_axes.set_title('Acceleration over Time')
+    acc_axes.legend()
 
     # 绘制角速度数据
-    plt.subplot(2, 1, 2)
-    plt.plot(timestamps, gyrox, label='gyrox')
-    plt.plot(timestamps, gyroy, label='gyroy')
-    plt.plot(timestamps, gyroz, label='gyroz')
-    plt.xlabel('Timestamp (us)')
-    plt.ylabel('Angular Velocity')
-    plt.title('Angular Velocity over Time')
-    plt.legend()
+    for name in ('gyrox', 'gyroy', 'gyroz'):
+        plot_line(gyro_axes, data[name], timestamps, label=name)
+    gyro_axes.set_xlabel('Timestamp (us)')
+    gyro_axes.set_ylabel('Angular Velocity')
+    gyro_axes.set_title('Angular Velocity over Time')
+    gyro_axes.legend()
+
+    figure.tight_layout()
+    if figure_path is None:
+        import matplotlib.pyplot as plt
+        plt.show()
+    else:
+        save_figure(figure, figure_path)
+
+
+if __name__ == "__main__":
+    # process_txt();
 
-    plt.tight_layout()
-    # plt.show()
-    plt.savefig( 'imu_leftright.png', dpi=300, bbox_inches='tight')
\ No newline at end of file
+    write_figure_imu(read_imu('imu_250305_leftright.log'), 'imu_leftright.png')
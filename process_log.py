@@ -1,191 +1,69 @@
 import os
-import csv
-import json
-import pandas as pd
-import matplotlib.pyplot as plt
-
-def process_log_file_aeb(log_file, csv_file):
-    with open(log_file, 'r') as log, open(csv_file, 'w', newline='') as csvfile:
-        csv_writer = csv.writer(csvfile)
-        csv_writer.writerow(['stamp', 'aeb_switch', 'aeb_state', 'aeb_direction', 'aeb_fcn_state', 'IsAEBActive'])  # 写入CSV文件的头部
-
-        # processing = False
-        stamp = None
-        frame_id_json = None
-
-        for line in log:
-            line = line.strip()
-
-            if line == "------------------":
-                if stamp is not None and frame_id_json is not None:
-                    try:
-                        frame_id_data = json.loads(frame_id_json)
-                        # print(frame_id_data)
-                        cm = frame_id_data.get('cm', {})
-
-                        csv_writer.writerow([
-                            stamp,
-                            frame_id_data.get('aeb_switch', ''),
-                            frame_id_data.get('aeb_state', ''),
-                            frame_id_data.get('aeb_direction', ''),
-                            frame_id_data.get('aeb_fcn_state', ''),
-                            cm.get('IsAEBActive', ''),
-                        ])
-                    except json.JSONDecodeError as e:
-                        print(f"Error decoding JSON: {e}")
-                
-                # processing = not processing
-                stamp = None
-                frame_id_json = None
-
-            else:
-                if line.startswith("stamp:"):
-                    stamp = line[len("stamp:"):].strip()
-                elif line.startswith("frame_id:"):
-                    frame_id_json = line[len("frame_id:"):].strip().strip('"')
-
-def process_log_file_radar(log_filename, csv_filename):
-    with open(log_filename, 'r') as log_file, open(csv_filename, 'w', newline='') as csv_file:
-        csv_writer = csv.writer(csv_file)
-        csv_writer.writerow(['timestamp_ns', 'sensor_timestamp_us', 'pipeline_start_timestamp_us', 'pipeline_finish_timestamp_us', 'pipeline_timestamp_us', 'available', 'camera_source', 'track_id', 'location_x', 'location_y', 'location_z'])  # 写入CSV头部
-
-        block = []
-        # within_block = False
-        
-        for line in log_file:
-            if "------------------" in line:
-                # if within_block:
-                block[len(block)-1] = block[len(block)-1][:-1]
-                json_str = '{' + ''.join(block) + '}'
-                try:
-                    json_obj = json.loads(json_str)
-                    # print(json.dumps(json_obj, indent=4))
-                    timestamp = json_obj.get('header',{}).get('stamp', '')
-                    sensor_timestamp = json_obj.get('meta',{}).get('sensor_timestamp_us', '')
-                    pipeline_start_timestamp = json_obj.get('meta',{}).get('pipeline_start_timestamp_us', '')
-                    pipeline_finish_timestamp = json_obj.get('meta',{}).get('pipeline_finish_timestamp_us', '')
-                    pipeline_timestamp = pipeline_finish_timestamp - pipeline_start_timestamp
-
-                    lidar_perception_objects = json_obj.get('lidar_perception_objects', {})
-                    available = lidar_perception_objects.get('available', '')
-
-                    value = json_obj.get('value', '')# not found
-
-                    lidar_perception_object_data = lidar_perception_objects.get('lidar_perception_object_data', {})
-                    if lidar_perception_object_data:
-                        track_id = lidar_perception_object_data.get('track_id', '')
-
-                        location_bv = lidar_perception_object_data.get('position', {})
-                        location_x = location_bv.get('x', '') if isinstance(location_bv, dict) else ''
-                        location_y = location_bv.get('y', '') if isinstance(location_bv, dict) else ''
-                        location_z = location_bv.get('z', '') if isinstance(location_bv, dict) else ''
-                    else:
-                        track_id = location_x = location_y = location_z = ''
-                    # print("available: ", available, "camera_source: ", value, "track_id: ", track_id, "location_x: ", location_x)
-
-                    csv_writer.writerow([timestamp, sensor_timestamp, pipeline_start_timestamp, pipeline_finish_timestamp, pipeline_timestamp, available, value, track_id, location_x, location_y, location_z])
-                except json.JSONDecodeError:
-                    print(f"Failed to decode JSON: {json_str}")
-                block = []
-                # within_block = not within_block
-            else:
-                line = line.strip()
-                if '{' in line:
-                    parts = line.split('{')
-                    parts[0] = '"' + parts[0].strip() + '":{'
-                    line = ''.join(parts)
-                elif ':' in line:
-                    parts = line.split(':', 1)
-                    parts[0] = '"' + parts[0].strip() + '":'
-                    line = ''.join(parts)
-
-                if not line.strip().endswith('{'):
-                    line += ','
-
-                if line.strip().startswith('}'):
-                    block[len(block)-1] = block[len(block)-1][:-1]
-                
-                block.append(line)
-
-def process_log_file_vision(log_filename, csv_filename, object_name):
-    with open(log_filename, 'r') as log_file, open(csv_filename, 'w', newline='') as csv_file:
-        csv_writer = csv.writer(csv_file)
-        csv_writer.writerow(['timestamp_ns', 'sensor_timestamp_us', 'pipeline_start_timestamp_us', 'pipeline_finish_timestamp_us', 'pipeline_timestamp_us', 'available', 'camera_source', 'track_id', 'location_x'])  # 写入CSV头部
-
-        block = []
-        # within_block = False
-        
-        for line in log_file:
-            if "------------------" in line:
-                # if within_block:
-                block[len(block)-1] = block[len(block)-1][:-1]
-                json_str = '{' + ''.join(block) + '}'
-                try:
-                    json_obj = json.loads(json_str)
-                    # print(json.dumps(json_obj, indent=4))
-                    timestamp = json_obj.get('header',{}).get('stamp', '')
-                    sensor_timestamp = json_obj.get('meta',{}).get('sensor_timestamp_us', '')
-                    pipeline_start_timestamp = json_obj.get('meta',{}).get('pipeline_start_timestamp_us', '')
-                    pipeline_finish_timestamp = json_obj.get('meta',{}).get('pipeline_finish_timestamp_us', '')
-                    pipeline_timestamp = pipeline_finish_timestamp - pipeline_start_timestamp
-
-                    available = json_obj.get('available', '')
-                    objects = json_obj.get(object_name, {})
-
-                    if objects:
-                        camera_source = objects.get('camera_source', {})
-                        value = camera_source.get('value', '')
-
-                        track_info = objects.get('track_info', {})
-                        track_id = track_info.get('track_id', '')
-
-                        location_bv = objects.get('location_bv', {})
-                        location_x = location_bv.get('x', '') if isinstance(location_bv, dict) else ''
-                    else:
-                        value = track_id = location_x = ''
-
-                    # print("available: ", available, "camera_source: ", value, "track_id: ", track_id, "location_x: ", location_x)
-
-                    csv_writer.writerow([timestamp, sensor_timestamp, pipeline_start_timestamp, pipeline_finish_timestamp, pipeline_timestamp, available, value, track_id, location_x])
-                except json.JSONDecodeError:
-                    print(f"Failed to decode JSON: {json_str}")
-                block = []
-                # within_block = not within_block
-            else:
-                line = line.strip()
-                if "reserved_infos" in line:
-                    continue
-                if '{' in line:
-                    parts = line.split('{')
-                    parts[0] = '"' + parts[0].strip() + '":{'
-                    line = ''.join(parts)
-                elif ':' in line:
-                    parts = line.split(':', 1)
-                    parts[0] = '"' + parts[0].strip() + '":'
-                    line = ''.join(parts)
-
-                if not line.strip().endswith('{'):
-                    line += ','
-
-                if line.strip().startswith('}'):
-                    block[len(block)-1] = block[len(block)-1][:-1]
-
-                block.append(line)
-
-def write_figure(csv_filename):
-    data = pd.read_csv(csv_filename)
+from log_schema import get_topic, vision_schema
+from table_io import read_columns
+from plot_render import FigureBatch, new_figure, plot_line, save_figure
+
+FIGURE_SIZE = (10, 5)
+
+# incremental=True：输出文件旁保存断点索引（<输出文件>.ckpt.json），日志未变化时跳过，
+# 日志末尾有新数据时只解析新帧并追加；传 False 则总是从头转换并覆盖输出
+def process_log_file_aeb(log_file, csv_file, workers=1, incremental=True):
+    get_topic('aeb_stat').write(log_file, csv_file, workers, incremental)
+
+def process_log_file_radar(log_filename, csv_filename, workers=1, incremental=True):
+    get_topic('radar_object').write(log_filename, csv_filename, workers, incremental)
+
+def process_log_file_vision(log_filename, csv_filename, object_name, workers=1, incremental=True):
+    # 长表：每个目标一行（帧级列重复），没有目标的帧输出一行、目标列留空
+    vision_schema(object_name).write(log_filename, csv_filename, workers, incremental)
+
+def follow_log_file(log_filename, topic='vision_object', refresh_hz=5.0, window_seconds=10.0, from_start=False):
+    """
+    实时跟随正在写入的日志（行车测试时监控），滚动显示 location_x / track_id
+    :param topic: 'vision_object' / 'vision_aeb_object' / 'radar_object'
+    :param refresh_hz: 每秒刷新次数
+    :param window_seconds: 显示最近多少秒的数据
+    :param from_start: True 先显示文件中已有的数据；False 只显示之后写入的帧
+    """
+    from log_follow import follow
+    follow(log_filename, get_topic(topic), refresh_hz=refresh_hz, window_seconds=window_seconds, from_start=from_start)
+
+def _draw_column(axes, data, column, figure_name):
+    plot_line(axes, data[column], marker='o')
+    axes.set_title(figure_name + '_' + column.replace('_', ''))
+    axes.set_ylabel('location' if column.startswith('location') else column)
+    axes.grid()
+
+def write_figure(csv_filename, figure_filename=None, column='location_x'):
+    """
+    :param figure_filename: 保存的图片路径，None 则只创建图形（在交互环境中查看）
+    :param column: 绘制的列，如 location_x / track_id
+    """
+    # 支持 .csv / .parquet / .feather / .npz，列式格式直接读取
+    # 按像素抽稀后绘制（见 plot_render），百万行的表也只画几千个点
+    data = read_columns(csv_filename)
     figure_name = os.path.splitext(os.path.basename(csv_filename))[0]
 
-    plt.figure(figsize=(10, 5))
-    plt.plot(data['location_x'], marker='o')
+    figure = new_figure(FIGURE_SIZE, interactive=figure_filename is None)
+    _draw_column(figure.subplots(), data, column, figure_name)
 
-    plt.title(figure_name + '_locationx')
-    plt.ylabel('location')
+    if figure_filename is not None:
+        save_figure(figure, figure_filename)
 
-    plt.grid()
-    # plt.show()
-
-    # plt.savefig(figure_name + '_locationx.png', dpi=300, bbox_inches='tight')
+def write_figures(csv_filename, figure_prefix, columns=('location_x', 'track_id')):
+    """
+    一张表的多列分别出图（<figure_prefix>_<列名去掉下划线>.png），表只读一次，复用同一个 Agg 图形
+    :return: 图片路径列表
+    """
+    data = read_columns(csv_filename)
+    figure_name = os.path.splitext(os.path.basename(csv_filename))[0]
+    filenames = []
+    with FigureBatch(FIGURE_SIZE) as batch:
+        for column in columns:
+            _draw_column(batch.axes(), data, column, figure_name)
+            filenames.append(f"{figure_prefix}_{column.replace('_', '')}.png")
+            batch.save(filenames[-1])
+    return filenames
 
 if __name__ == "__main__":
     # process data for aeb_stat
@@ -201,3 +79,6 @@ if __name__ == "__main__":
     process_log_file_vision('20241118/vision_aeb_object.log', '20241118/vision_aeb_object.csv', 'vision_aeb_objects')
 
     write_figure('20241106/vision_aeb_object.csv')
+
+    # 行车测试时实时跟随正在写入的日志
+    # follow_log_file('20241118/vision_object.log', 'vision_object', refresh_hz=5)
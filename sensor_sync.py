@@ -0,0 +1,222 @@
+"""
+多传感器时间对齐
+
+各提取结果（process_log 的感知表、IMU 表、SimOne 位姿表等）各自带有时间列，单位和时钟不同：
+    header.stamp / timestamp_ns   ns
+    sensor_timestamp_us / IMU timestamp_us   us
+    IMU header secs + nsecs
+    SimOne Msg time   s（浮点）
+Stream 把时间列统一为 int64 微秒（可加偏移换算到参考时钟），按时间稳定排序（只排下标，不拷贝列）；
+align 以参考流的每一行（或固定周期的时间网格）为基准，对其它流做 searchsorted 最近邻 / 向前 / 向后匹配，
+超出容差的记为缺失，输出一张同步表，复杂度 O(n log n)，百万行级别的流可直接处理。
+
+同步表的列：time_us，参考流的各列，其它流的各列，均以 <流名>_ 为前缀；
+每个被匹配的流另有 <流名>_dt_us（匹配到的时间 - 基准时间），未匹配为 MISSING_INT。
+同一时间戳有多行时（感知表每个目标一行），向后 / 最近匹配取该时刻的最后一行，向前匹配取第一行。
+"""
+import os
+import numpy as np
+
+from log_parser import MISSING_INT
+from table_io import read_columns, write_columns
+
+# 自动识别时间列的顺序：(列名, 单位)，列名为二元组时表示 (秒, 纳秒) 两列
+TIME_COLUMNS = [
+    ('timestamp_us', 'us'),
+    ('sensor_timestamp_us', 'us'),
+    ('timestamp_ns', 'ns'),
+    ('stamp', 'ns'),
+    (('secs', 'nsecs'), None),
+    ('Msg time', 's'),
+]
+UNIT_US = {'ns': 1e-3, 'us': 1, 'ms': 1e3, 's': 1e6}
+DIRECTIONS = ('nearest', 'backward', 'forward')
+
+
+def _unit_of(column):
+    """按列名推断单位：*_ns / *_us / *_ms，stamp 为 ns，其它为秒"""
+    for unit in ('ns', 'us', 'ms'):
+        if column.endswith('_' + unit):
+            return unit
+    return 'ns' if column.endswith('stamp') else 's'
+
+
+def to_us(values, unit):
+    """时间列 -> int64 微秒，缺失（MISSING_INT / NaN）为 MISSING_INT"""
+    values = np.asarray(values)
+    if values.dtype.kind in 'iu':
+        values = values.astype(np.int64)
+        missing = values == MISSING_INT
+        if unit == 'ns':
+            result = values // 1000
+        else:
+            result = values * int(UNIT_US[unit])
+    else:
+        values = values.astype(np.float64)
+        missing = np.isnan(values)
+        result = np.rint(np.where(missing, 0, values) * UNIT_US[unit]).astype(np.int64)
+    result[missing] = MISSING_INT
+    return result
+
+
+def clock_offset_us(columns, from_column, to_column):
+    """
+    同一张表中两个时钟的偏移（中位数），如雷达表中 timestamp_ns（系统时钟）-> sensor_timestamp_us（UTC）
+    :return: 加到 from_column 上即换算到 to_column 时钟的微秒数
+    """
+    source = to_us(columns[from_column], _unit_of(from_column))
+    target = to_us(columns[to_column], _unit_of(to_column))
+    valid = (source != MISSING_INT) & (target != MISSING_INT)
+    if not valid.any():
+        raise ValueError(f"no rows with both {from_column} and {to_column}")
+    return int(np.median(target[valid] - source[valid]))
+
+
+class Stream:
+    """
+    :param name: 流名，同步表中的列名前缀
+    :param columns: {列名: ndarray}
+    :param time_column: 时间列名，或 (秒列, 纳秒列)；None 则按 TIME_COLUMNS 自动识别
+    :param unit: 'ns' / 'us' / 'ms' / 's'；None 则按列名推断
+    :param offset_us: 加到归一化时间上的偏移，把该流的时钟换算到参考时钟
+    """
+
+    def __init__(self, name, columns, time_column=None, unit=None, offset_us=0):
+        self.name = name
+        self.columns = columns
+        if time_column is None:
+            for time_column, unit in TIME_COLUMNS:
+                names = time_column if isinstance(time_column, tuple) else (time_column,)
+                if all(column in columns for column in names):
+                    break
+            else:
+                raise ValueError(f"{name}: no time column, expected one of {[c for c, _ in TIME_COLUMNS]}")
+        self.time_column = time_column
+        if isinstance(time_column, tuple):
+            seconds, nanoseconds = to_us(columns[time_column[0]], 's'), to_us(columns[time_column[1]], 'ns')
+            time_us = np.where((seconds == MISSING_INT) | (nanoseconds == MISSING_INT), MISSING_INT,
+                               seconds + nanoseconds)
+        else:
+            time_us = to_us(columns[time_column], unit or _unit_of(time_column))
+        valid = time_us != MISSING_INT
+        time_us = time_us[valid] + offset_us
+        order = np.argsort(time_us, kind='stable')
+        self.rows = np.flatnonzero(valid)[order]  # 按时间排序后的行号
+        self.time_us = time_us[order]
+
+    @classmethod
+    def from_file(cls, filename, name=None, **kwargs):
+        """从导出文件读取（格式见 table_io），流名默认为文件名去掉扩展名"""
+        return cls(name or os.path.splitext(os.path.basename(filename))[0], read_columns(filename), **kwargs)
+
+    def __len__(self):
+        return len(self.time_us)
+
+    def __repr__(self):
+        return f"Stream({self.name!r}, {len(self)} rows, time={self.time_column!r})"
+
+
+def asof_index(times, targets, tolerance_us=None, direction='nearest'):
+    """
+    对每个目标时间在已排序的 times 中查找匹配位置
+    :param direction: 'backward' 取 <= 目标的最后一个，'forward' 取 >= 目标的第一个，'nearest' 取较近者（相等取 backward）
+    :param tolerance_us: 允许的最大时间差，None 不限
+    :return: int64 位置，没有匹配为 -1
+    """
+    if direction not in DIRECTIONS:
+        raise ValueError(f"direction must be one of {DIRECTIONS}")
+    count = len(times)
+    backward = np.searchsorted(times, targets, side='right') - 1
+    forward = np.searchsorted(times, targets, side='left')
+    if direction == 'backward':
+        position = backward
+    elif direction == 'forward':
+        position = np.where(forward < count, forward, -1)
+    else:
+        back_dt = np.where(backward >= 0, targets - times[np.maximum(backward, 0)], np.iinfo(np.int64).max)
+        forward_dt = np.where(forward < count, times[np.minimum(forward, count - 1)] - targets,
+                              np.iinfo(np.int64).max)
+        position = np.where(forward_dt < back_dt, forward, backward)
+        position[(backward < 0) & (forward >= count)] = -1
+    if tolerance_us is not None and count:
+        matched = position >= 0
+        dt = np.abs(times[np.maximum(position, 0)] - targets)
+        position = np.where(matched & (dt <= tolerance_us), position, -1)
+    return position.astype(np.int64)
+
+
+def _take(column, index):
+    """按行号取值，行号为 -1 的填缺失值（整数 MISSING_INT，浮点 NaN，其它 None）"""
+    column = np.asarray(column)
+    missing = index < 0
+    safe = np.where(missing, 0, index)
+    if column.dtype.kind in 'iub':
+        values = column[safe].astype(np.int64) if len(column) else np.zeros(len(index), dtype=np.int64)
+        values[missing] = MISSING_INT
+    elif column.dtype.kind == 'f':
+        values = column[safe] if len(column) else np.zeros(len(index), dtype=column.dtype)
+        values[missing] = np.nan
+    else:
+        values = column[safe].astype(object) if len(column) else np.empty(len(index), dtype=object)
+        values[missing] = None
+    return values
+
+
+def align(streams, reference=None, period_us=None, tolerance_us=None, direction='nearest'):
+    """
+    多流对齐为一张同步表
+    :param streams: [Stream]
+    :param reference: 基准流名，默认第一个；同步表每行对应基准流的一行
+    :param period_us: 指定时按固定周期的时间网格对齐（覆盖基准流的时间范围），所有流都按匹配取值
+    :param tolerance_us: 允许的最大时间差，None 不限
+    :param direction: 见 asof_index
+    :return: {列名: ndarray}
+    """
+    by_name = {stream.name: stream for stream in streams}
+    if len(by_name) != len(streams):
+        raise ValueError("stream names must be unique")
+    base = by_name[reference] if reference is not None else streams[0]
+
+    if period_us is None:
+        time_us = base.time_us
+        table = {'time_us': time_us}
+        for name, column in base.columns.items():
+            table[f'{base.name}_{name}'] = np.asarray(column)[base.rows]
+        matched = [stream for stream in streams if stream is not base]
+    else:
+        time_us = np.arange(base.time_us[0], base.time_us[-1] + 1, period_us) if len(base) else np.zeros(0, np.int64)
+        table = {'time_us': time_us}
+        matched = streams
+
+    for stream in matched:
+        position = asof_index(stream.time_us, time_us, tolerance_us, direction)
+        found = position >= 0
+        rows = np.where(found, stream.rows[np.maximum(position, 0)] if len(stream) else -1, -1)
+        dt = np.full(len(time_us), MISSING_INT, dtype=np.int64)
+        dt[found] = stream.time_us[position[found]] - time_us[found]
+        table[f'{stream.name}_dt_us'] = dt
+        for name, column in stream.columns.items():
+            table[f'{stream.name}_{name}'] = _take(column, rows)
+    return table
+
+
+def align_files(filenames, output_filename=None, time_columns=None, offsets_us=None, **kwargs):
+    """
+    读取多个导出文件并对齐
+    :param filenames: 文件名列表，流名为文件名去掉扩展名
+    :param time_columns: {流名: 时间列}，未指定的自动识别
+    :param offsets_us: {流名: 偏移}
+    :param kwargs: 传给 align（reference / period_us / tolerance_us / direction）
+    :return: 同步表，指定 output_filename 时同时写出
+    """
+    time_columns = time_columns or {}
+    offsets_us = offsets_us or {}
+    streams = []
+    for filename in filenames:
+        name = os.path.splitext(os.path.basename(filename))[0]
+        streams.append(Stream.from_file(filename, name, time_column=time_columns.get(name),
+                                        offset_us=offsets_us.get(name, 0)))
+    table = align(streams, **kwargs)
+    if output_filename:
+        write_columns(output_filename, table)
+    return table
@@ -0,0 +1,245 @@
+"""
+表格数据的输出与读取
+
+process_log / process_figure 的导出结果按输出文件扩展名选择格式：
+    .csv              文本，兼容 Excel
+    .parquet          Parquet（需要 pyarrow）
+    .feather / .arrow Arrow IPC / Feather v2（需要 pyarrow）
+    .npz              NumPy 压缩包，没有 pyarrow 时 parquet/feather 自动改写为 .npz
+列式格式保留 int64 纳秒时间戳，下游直接用 read_columns 读取，不再解析文本。
+整数列的缺失值为 MISSING_INT（Arrow 格式中写为 null），浮点列为 NaN。
+"""
+import os
+import csv
+import numpy as np
+
+from log_parser import MISSING_INT
+
+BATCH_ROWS = 1 << 16  # 每批写出的行数（Parquet row group / Arrow record batch）
+
+
+def _pyarrow():
+    """按需导入 pyarrow，没有安装时返回 None"""
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def is_missing(column):
+    """返回缺失值掩码"""
+    if column.dtype == np.int64:
+        return column == MISSING_INT
+    if column.dtype.kind == 'f':
+        return np.isnan(column)
+    if column.dtype == object:
+        return np.array([v is None for v in column], dtype=bool)
+    return np.zeros(len(column), dtype=bool)
+
+
+class TableSink:
+    """
+    输出接口：write(columns) 追加若干行，close() 结束写入
+    columns 为 {列名: ndarray}，列名与顺序以构造时的 names 为准
+    """
+
+    def __init__(self, filename, names):
+        self.filename = filename
+        self.names = list(names)
+
+    def write(self, columns):
+        """按 BATCH_ROWS 分批写出（没有数据时也写出一个空批次，保证文件带有表结构）"""
+        count = len(columns[self.names[0]]) if self.names else 0
+        for start in range(0, max(count, 1), BATCH_ROWS):
+            self.write_batch({name: np.asarray(columns[name])[start:start + BATCH_ROWS] for name in self.names})
+
+    def write_batch(self, columns):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CsvSink(TableSink):
+    """CSV 文本输出，缺失值写为空；append=True 时追加到已有文件末尾，不再写表头"""
+
+    def __init__(self, filename, names, append=False):
+        super().__init__(filename, names)
+        self.file = open(filename, 'a' if append else 'w', newline='')
+        self.writer = csv.writer(self.file)
+        if not append:
+            self.writer.writerow(self.names)
+
+    def write_batch(self, columns):
+        values = []
+        for name in self.names:
+            column = columns[name]
+            # tolist 得到 Python 原生数值，格式与逐行写出时一致
+            items = column.tolist()
+            for i in np.flatnonzero(is_missing(column)).tolist():
+                items[i] = ''
+            values.append(items)
+        self.writer.writerows(zip(*values))
+
+    def close(self):
+        self.file.close()
+
+
+class ArrowSink(TableSink):
+    """Parquet / Feather 输出（pyarrow），整数列中的 MISSING_INT 写为 null"""
+
+    def __init__(self, filename, names, file_format):
+        super().__init__(filename, names)
+        self.pa = _pyarrow()
+        self.file_format = file_format
+        self.writer = None
+
+    def _to_arrow(self, column):
+        pa = self.pa
+        if column.dtype == np.int64:
+            return pa.array(column, mask=column == MISSING_INT)
+        if column.dtype == object:
+            return pa.array(column.tolist())
+        return pa.array(column)
+
+    def write_batch(self, columns):
+        batch = self.pa.record_batch([self._to_arrow(columns[name]) for name in self.names], names=self.names)
+        if self.writer is None:
+            if self.file_format == 'parquet':
+                self.writer = self.pa.parquet.ParquetWriter(self.filename, batch.schema)
+            else:
+                self.writer = self.pa.ipc.new_file(self.filename, batch.schema)
+        if self.file_format == 'parquet':
+            self.writer.write_batch(batch)
+        else:
+            self.writer.write(batch)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class NpzSink(TableSink):
+    """NumPy .npz 输出：分批收集，关闭时一次写出（np.savez_compressed）"""
+
+    def __init__(self, filename, names):
+        super().__init__(filename, names)
+        self.chunks = {name: [] for name in self.names}
+
+    def write_batch(self, columns):
+        for name in self.names:
+            column = columns[name]
+            if column.dtype == object:
+                # 字符串列存为定长 unicode，读取时不需要 allow_pickle
+                column = np.array(['' if v is None else str(v) for v in column], dtype=str)
+            self.chunks[name].append(column)
+
+    def close(self):
+        arrays = {name: np.concatenate(chunks) if chunks else np.array([]) for name, chunks in self.chunks.items()}
+        np.savez_compressed(self.filename, **arrays)
+
+
+def sink_filename(filename):
+    """实际写出的文件名：没有 pyarrow 时 .parquet / .feather / .arrow 改为 .npz"""
+    ext = os.path.splitext(filename)[1].lower()
+    if ext in ('.parquet', '.feather', '.arrow') and _pyarrow() is None:
+        return os.path.splitext(filename)[0] + '.npz'
+    return filename
+
+
+def open_sink(filename, names):
+    """
+    按扩展名创建输出
+    :param filename: 输出文件路径（.csv / .parquet / .feather / .arrow / .npz）
+    :param names: 列名列表
+    :return: TableSink
+    """
+    actual = sink_filename(filename)
+    if actual != filename:
+        print(f"pyarrow is not installed, writing {actual} instead")
+    ext = os.path.splitext(actual)[1].lower()
+    if ext in ('.parquet', '.feather', '.arrow'):
+        return ArrowSink(actual, names, 'parquet' if ext == '.parquet' else 'feather')
+    if ext == '.npz':
+        return NpzSink(actual, names)
+    return CsvSink(actual, names)
+
+
+def write_columns(filename, columns):
+    """把 {列名: ndarray} 一次写入文件，格式由扩展名决定"""
+    with open_sink(filename, list(columns)) as sink:
+        sink.write(columns)
+
+
+def append_columns(filename, columns):
+    """
+    把 {列名: ndarray} 追加到已有的输出文件（列名与顺序须与文件一致）
+    CSV 直接追加到文件末尾；列式格式不支持追加，读出已有数据拼接后写入临时文件再替换
+    """
+    filename = sink_filename(filename)
+    ext = os.path.splitext(filename)[1].lower()
+    if ext not in ('.parquet', '.feather', '.arrow', '.npz'):
+        with CsvSink(filename, list(columns), append=True) as sink:
+            sink.write(columns)
+        return
+    existing = read_columns(filename)
+    merged = {name: np.concatenate([existing[name], column]) for name, column in columns.items()}
+    root, ext = os.path.splitext(filename)
+    temp_filename = root + '.tmp' + ext
+    write_columns(temp_filename, merged)
+    os.replace(temp_filename, filename)
+
+
+def columns_from_rows(rows, names):
+    """
+    把行列表转为 {列名: ndarray}，按值推断类型：
+    全部为整数 -> int64，数值 -> float64，其它 -> object；'' 和 None 视为缺失
+    """
+    columns = {}
+    for i, name in enumerate(names):
+        values = [row[i] for row in rows]
+        present = [v for v in values if v != '' and v is not None]
+        if all(type(v) is int for v in present):
+            columns[name] = np.array([MISSING_INT if v == '' or v is None else v for v in values], dtype=np.int64)
+        elif all(type(v) in (int, float) for v in present):
+            columns[name] = np.array([np.nan if v == '' or v is None else v for v in values], dtype=np.float64)
+        else:
+            columns[name] = np.array([None if v == '' else v for v in values], dtype=object)
+    return columns
+
+
+def read_columns(filename):
+    """
+    读取导出文件为 {列名: ndarray}
+    列式格式直接读取，不解析文本；CSV 通过 pandas 读取
+    """
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == '.npz':
+        with np.load(filename) as data:
+            return {name: data[name] for name in data.files}
+    if ext in ('.parquet', '.feather', '.arrow'):
+        pa = _pyarrow()
+        if ext == '.parquet':
+            table = pa.parquet.read_table(filename)
+        else:
+            with pa.memory_map(filename) as source:
+                table = pa.ipc.open_file(source).read_all()
+        columns = {}
+        for name, column in zip(table.column_names, table.columns):
+            if pa.types.is_integer(column.type):
+                column = column.fill_null(MISSING_INT)
+            columns[name] = column.to_numpy()
+        return columns
+
+    import pandas as pd
+    data = pd.read_csv(filename)
+    return {name: data[name].to_numpy() for name in data.columns}
@@ -0,0 +1,396 @@
+"""
+轨迹分析：SimOne / 导航位姿的传输时延、运动学量、相对参考路径的误差
+
+输入为 process_figure.read_poses 的列（或 simone 子命令导出的表格），全部整列计算：
+    latency_distribution   Rcv time - Msg time 的分布（分位数 + 直方图）
+    normalize_euler        欧拉角换到 |pitch| <= pi/2 的一支：(r, p, y) 与 (r + pi, pi - p, y + pi) 是同一个姿态，
+                           日志中 ori 偶尔以另一支输出（roll 约 3.14，yaw 从 -1.2 跳到 1.93），先换回来再解卷绕
+    kinematics             按时间的有限差分（np.gradient，支持不等间隔）：速度、加速度、航向角速度、曲率
+    SegmentIndex           折线的最近线段查询（均匀网格索引），十万级以上的路径点、几十万个查询点也只需线性时间
+    path_errors            相对参考路径的横向 / 纵向误差、里程、航向误差
+参考路径来自 path_viewer 使用的 SQLite 数据库（每条路径一张表：id, x, y, head, curv, type，x / y 为带带号的高斯坐标），
+load_path 按 coordinates.gauss_to_enu 换算为参考点下的 ENU，轨迹与路径需在同一坐标系下。
+"""
+import os
+import sqlite3
+from contextlib import closing
+import numpy as np
+
+import coordinates
+from latency_analysis import summarize
+from table_io import read_columns, write_columns
+
+# SimOne 位姿列（process_figure.POSE_COLUMNS）
+POSE_FIELDS = {'time': 'Msg time', 'x': 'Pos X', 'y': 'Pos Y', 'roll': 'Ori X', 'pitch': 'Ori Y', 'yaw': 'Ori Z'}
+LATENCY_BIN_MS = 1.0
+MIN_SPEED = 0.1       # 速度低于该值（m/s）时曲率、行驶方向为 NaN
+QUERY_CHUNK = 1 << 16  # 最近线段查询每批的点数，限制候选数组的内存
+LEVEL_FACTOR = 2       # 最近线段查询：近处没有线段的点换到网格边长 2 倍的下一级索引
+
+
+def _wrap(angle):
+    """角度换到 (-pi, pi]"""
+    return np.pi - np.mod(np.pi - angle, 2 * np.pi)
+
+
+# ---------------- 时延 ----------------
+
+def latency_distribution(columns, bin_ms=LATENCY_BIN_MS, send='Msg time', receive='Rcv time'):
+    """
+    传输时延（接收时间 - 发送时间，ms）的分布
+    Rcv time 只精确到毫秒，直方图的间隔不宜小于 1 ms
+    :return: {'latency_ms': 逐行时延, 'summary': {count, mean, std, min, latency_p50 ... latency_max},
+              'histogram': {'latency_ms': 区间左端, 'count': 行数}}
+    """
+    latency = (np.asarray(columns[receive], dtype=np.float64) - np.asarray(columns[send], dtype=np.float64)) * 1000
+    valid = latency[~np.isnan(latency)]
+    summary = {'count': len(valid),
+               'mean': float(valid.mean()) if len(valid) else np.nan,
+               'std': float(valid.std()) if len(valid) else np.nan,
+               'min': float(valid.min()) if len(valid) else np.nan}
+    summary.update(summarize(latency, 'latency'))
+    if len(valid):
+        first = np.floor(valid.min() / bin_ms)
+        bins = (np.floor(valid / bin_ms) - first).astype(np.int64)
+        counts = np.bincount(bins)
+        histogram = {'latency_ms': (first + np.arange(len(counts))) * bin_ms, 'count': counts}
+    else:
+        histogram = {'latency_ms': np.zeros(0), 'count': np.zeros(0, dtype=np.int64)}
+    return {'latency_ms': latency, 'summary': summary, 'histogram': histogram}
+
+
+# ---------------- 姿态 / 运动学 ----------------
+
+def normalize_euler(roll, pitch, yaw):
+    """
+    ZYX 欧拉角换到 |pitch| <= pi/2 的一支，各角在 (-pi, pi]
+    :return: (roll, pitch, yaw)
+    """
+    roll, pitch, yaw = (np.asarray(angle, dtype=np.float64) for angle in (roll, pitch, yaw))
+    flip = np.abs(_wrap(pitch)) > np.pi / 2
+    roll = _wrap(np.where(flip, roll + np.pi, roll))
+    pitch = _wrap(np.where(flip, np.pi - pitch, pitch))
+    yaw = _wrap(np.where(flip, yaw + np.pi, yaw))
+    return roll, pitch, yaw
+
+
+def unwrap_heading(yaw):
+    """航向解卷绕（连续的弧度），NaN 保持为 NaN，不影响之后的样本"""
+    yaw = np.asarray(yaw, dtype=np.float64)
+    result = np.full(len(yaw), np.nan)
+    valid = ~np.isnan(yaw)
+    result[valid] = np.unwrap(yaw[valid])
+    return result
+
+
+def kinematics(time_s, x, y, yaw=None):
+    """
+    有限差分（内部点为二阶中心差分，支持不等间隔的时间）
+    :param time_s: 已按时间排序、无重复的时间（秒）
+    :param yaw: 航向（弧度，已解卷绕）；None 时航向角速度按行驶方向计算
+    :return: {vx, vy, speed, ax, ay, acceleration（速度的变化率）, course（行驶方向，解卷绕）,
+              yaw_rate, curvature（轨迹曲率 1/m，左转为正）}
+    """
+    time_s = np.asarray(time_s, dtype=np.float64)
+    if len(time_s) < 3:
+        raise ValueError("need at least three poses for finite differences")
+    vx = np.gradient(x, time_s)
+    vy = np.gradient(y, time_s)
+    ax = np.gradient(vx, time_s)
+    ay = np.gradient(vy, time_s)
+    speed = np.hypot(vx, vy)
+    moving = speed >= MIN_SPEED
+    course = np.where(moving, np.arctan2(vy, vx), np.nan)
+    course = unwrap_heading(course)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        curvature = np.where(moving, (vx * ay - vy * ax) / speed ** 3, np.nan)
+    return {
+        'vx': vx, 'vy': vy, 'speed': speed,
+        'ax': ax, 'ay': ay, 'acceleration': np.gradient(speed, time_s),
+        'course': course,
+        'yaw_rate': np.gradient(course if yaw is None else yaw, time_s),
+        'curvature': curvature,
+    }
+
+
+def pose_track(columns, fields=POSE_FIELDS):
+    """
+    位姿列 -> 按时间排序的轨迹：去掉时间或位置缺失的行和重复的时间戳，姿态换到 |pitch| <= pi/2 的一支，航向解卷绕
+    :param fields: {'time', 'x', 'y', 'roll', 'pitch', 'yaw'} -> 列名，缺少 roll / pitch / yaw 时不计算姿态
+    :return: {'time_s', 'x', 'y'[, 'roll', 'pitch', 'yaw', 'heading']}，heading 为解卷绕的 yaw
+    """
+    time_s = np.asarray(columns[fields['time']], dtype=np.float64)
+    x = np.asarray(columns[fields['x']], dtype=np.float64)
+    y = np.asarray(columns[fields['y']], dtype=np.float64)
+    valid = np.flatnonzero(~(np.isnan(time_s) | np.isnan(x) | np.isnan(y)))
+    order = valid[np.argsort(time_s[valid], kind='stable')]
+    order = order[np.concatenate(([True], np.diff(time_s[order]) > 0))]  # 重复的时间戳取第一行
+    track = {'time_s': time_s[order], 'x': x[order], 'y': y[order]}
+    if all(fields.get(name) in columns for name in ('roll', 'pitch', 'yaw')):
+        roll, pitch, yaw = normalize_euler(*(np.asarray(columns[fields[name]], dtype=np.float64)[order]
+                                             for name in ('roll', 'pitch', 'yaw')))
+        track.update({'roll': roll, 'pitch': pitch, 'yaw': yaw, 'heading': unwrap_heading(yaw)})
+    return track
+
+
+# ---------------- 参考路径 ----------------
+
+def path_tables(db_path):
+    """数据库中的路径表名"""
+    with closing(sqlite3.connect(db_path)) as conn:
+        return [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")]
+
+
+def load_path(db_path, table, lat0=coordinates.base_lat, lon0=coordinates.base_lon, alt0=coordinates.base_alt):
+    """
+    读取 path_viewer 的路径表，高斯坐标整列换算为 ENU（curv 为中央子午线，缺失时按带号计算）
+    :return: {'id', 'x', 'y', 'head', 'curv', 'type', 'e', 'n', 'u'}
+    """
+    with closing(sqlite3.connect(db_path)) as conn:
+        rows = conn.execute(f'SELECT id, x, y, head, curv, type FROM "{table}" ORDER BY id').fetchall()
+    if not rows:
+        raise ValueError(f"{db_path}: path {table} is empty")
+    ids, xs, ys, heads, curvs, types = zip(*rows)
+    path = {
+        'id': np.array(ids, dtype=np.int64),
+        'x': np.array(xs, dtype=np.float64),
+        'y': np.array(ys, dtype=np.float64),
+        'head': np.array([np.nan if v is None else v for v in heads], dtype=np.float64),
+        'curv': np.array([np.nan if v is None else v for v in curvs], dtype=np.float64),
+        'type': np.array(types, dtype=object),
+    }
+    path['e'], path['n'], path['u'] = coordinates.gauss_to_enu(path['x'], path['y'], path['curv'],
+                                                               lat0=lat0, lon0=lon0, alt0=alt0)
+    return path
+
+
+class SegmentIndex:
+    """
+    折线的最近线段查询
+    每条线段按半个网格的间隔取点，记入这些点所在的网格（按网格编号排序，二分查找）；
+    查询点在所在网格及周围 8 格内的线段中求投影距离的最小值。距离超过 3/4 个网格时，
+    更近的线段可能没有记在这 9 格中，换到网格边长 LEVEL_FACTOR 倍的下一级索引重新查询，
+    网格大于整条路径时对剩下的点逐条线段计算，结果总是精确的最近线段
+    :param cell: 第一级网格边长，None 为线段长度中位数的 4 倍
+    """
+
+    def __init__(self, x, y, cell=None):
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        if len(self.x) < 2:
+            raise ValueError("a path needs at least two points")
+        self.dx = np.diff(self.x)
+        self.dy = np.diff(self.y)
+        self.length = np.hypot(self.dx, self.dy)
+        self.station = np.concatenate(([0.0], np.cumsum(self.length)))  # 各点的里程
+        extent = max(np.ptp(self.x), np.ptp(self.y), 1e-9)
+        positive = self.length[self.length > 0]
+        self.cell = cell or max(4 * float(np.median(positive)) if len(positive) else extent, extent * 1e-6)
+        self.extent = extent
+        self._levels = {}
+
+    def __len__(self):
+        return len(self.length)
+
+    def _level(self, level):
+        """第 level 级网格：(网格边长, 有线段的网格编号（已排序）, 每个网格在线段号数组中的起点, 线段号)"""
+        if level not in self._levels:
+            cell = self.cell * LEVEL_FACTOR ** level
+            samples = np.maximum(np.ceil(self.length / (cell / 2)).astype(np.int64), 1) + 1
+            segment = np.repeat(np.arange(len(self)), samples)
+            first = np.cumsum(samples) - samples
+            t = (np.arange(len(segment)) - first[segment]) / (samples[segment] - 1)
+            keys = self._keys(self.x[segment] + t * self.dx[segment], self.y[segment] + t * self.dy[segment], cell)
+            order = np.lexsort((segment, keys))
+            keys, segment = keys[order], segment[order]
+            keep = np.concatenate(([True], (np.diff(keys) != 0) | (np.diff(segment) != 0)))  # 同一网格只记一次
+            keys, segment = keys[keep], segment[keep]
+            cells, starts = np.unique(keys, return_index=True)
+            self._levels[level] = (cell, cells, np.append(starts, len(keys)), segment)
+        return self._levels[level]
+
+    def _keys(self, x, y, cell, dx=0, dy=0):
+        column = np.floor((x - self.x.min()) / cell).astype(np.int64) + dx + 1
+        row = np.floor((y - self.y.min()) / cell).astype(np.int64) + dy + 1
+        return column * (1 << 31) + row
+
+    def _project(self, qx, qy, segment):
+        """点到线段的投影：(线段上的比例 t, 距离的平方)"""
+        ox = qx - self.x[segment]
+        oy = qy - self.y[segment]
+        squared = self.length[segment] ** 2
+        with np.errstate(invalid='ignore', divide='ignore'):
+            t = np.clip(np.where(squared > 0, (ox * self.dx[segment] + oy * self.dy[segment]) / squared, 0.0), 0, 1)
+        return t, (ox - t * self.dx[segment]) ** 2 + (oy - t * self.dy[segment]) ** 2
+
+    def _query_level(self, qx, qy, level):
+        """在第 level 级网格中查询，返回 (线段号, 距离的平方)，不能确定的为 -1"""
+        cell, cells, starts, segments = self._level(level)
+        count = len(qx)
+        offsets = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+        lo = np.zeros((count, len(offsets)), dtype=np.int64)
+        hi = np.zeros_like(lo)
+        for i, (dx, dy) in enumerate(offsets):
+            query_keys = self._keys(qx, qy, cell, dx, dy)
+            position = np.minimum(np.searchsorted(cells, query_keys), len(cells) - 1)
+            hit = cells[position] == query_keys
+            lo[hit, i] = starts[position[hit]]
+            hi[hit, i] = starts[position[hit] + 1]
+        # 按查询点展开所有候选：每个查询点的候选在数组中相邻
+        sizes = (hi - lo).ravel()
+        total = int(sizes.sum())
+        candidate = np.arange(total) - np.repeat(np.cumsum(sizes) - sizes, sizes) + np.repeat(lo.ravel(), sizes)
+        owner = np.repeat(np.arange(count), (hi - lo).sum(axis=1))
+        segment = segments[candidate]
+        _, squared = self._project(qx[owner], qy[owner], segment)
+
+        best_segment = np.full(count, -1, dtype=np.int64)
+        best_squared = np.full(count, np.inf)
+        if total:
+            found, first = np.unique(owner, return_index=True)
+            best_squared[found] = np.minimum.reduceat(squared, first)
+            best = np.flatnonzero(squared == best_squared[owner])
+            found, first = np.unique(owner[best], return_index=True)  # 距离相同取第一条
+            best_segment[found] = segment[best[first]]
+        # 找到的距离不超过 3/4 网格时 9 格内一定包含最近的线段
+        best_segment[best_squared > (0.75 * cell) ** 2] = -1
+        return best_segment, best_squared
+
+    def _query_all(self, qx, qy):
+        """逐条线段计算（网格已大于整条路径时）"""
+        best_segment = np.empty(len(qx), dtype=np.int64)
+        step = max(1, (1 << 22) // len(self))
+        segment = np.arange(len(self))
+        for start in range(0, len(qx), step):
+            _, squared = self._project(qx[start:start + step, None], qy[start:start + step, None], segment)
+            best_segment[start:start + step] = np.argmin(squared, axis=1)
+        return best_segment
+
+    def nearest(self, qx, qy):
+        """
+        :return: {'segment': 线段号（起点的下标）, 't': 线段上的比例 0~1, 'distance': 到路径的距离,
+                  'station': 投影点的里程, 'lateral': 有符号距离（在路径左侧为正）}
+        """
+        qx = np.asarray(qx, dtype=np.float64)
+        qy = np.asarray(qy, dtype=np.float64)
+        segment = np.full(len(qx), -1, dtype=np.int64)
+        order = np.argsort(self._keys(qx, qy, self.cell))  # 按网格顺序查询，二分查找的访问更集中
+        for start in range(0, len(qx), QUERY_CHUNK):
+            pending = order[start:start + QUERY_CHUNK]
+            level = 0
+            while len(pending):
+                if self.cell * LEVEL_FACTOR ** level > self.extent * LEVEL_FACTOR:
+                    segment[pending] = self._query_all(qx[pending], qy[pending])
+                    break
+                found, _ = self._query_level(qx[pending], qy[pending], level)
+                segment[pending] = found
+                pending = pending[found < 0]
+                level += 1
+        t, squared = self._project(qx, qy, segment)
+        cross = self.dx[segment] * (qy - self.y[segment]) - self.dy[segment] * (qx - self.x[segment])
+        distance = np.sqrt(squared)
+        return {
+            'segment': segment,
+            't': t,
+            'distance': distance,
+            'station': self.station[segment] + t * self.length[segment],
+            'lateral': np.where(cross < 0, -distance, distance),
+        }
+
+
+def path_errors(track, path_x, path_y, index=None):
+    """
+    轨迹相对参考路径的误差
+        lateral_error        到最近线段的有符号距离，在路径左侧为正
+        longitudinal_error   匹配点到轨迹点的偏移在路径切向上的分量，只在越过路径起点 / 终点时不为 0
+        station              匹配点在路径上的里程，progress 为其与上一个点之差（倒退为负）
+        heading_error        轨迹航向 - 匹配线段的方向，(-pi, pi]（轨迹没有 yaw 时用行驶方向）
+    按最近线段匹配：路径往返经过同一条路时可能匹配到反向的一段（heading_error 接近 180 度），此时应分段分析
+    :param track: pose_track 的返回值（或含 x / y 的列）
+    :param index: 已建好的 SegmentIndex（同一路径分析多条轨迹时复用）
+    :return: {列名: ndarray}
+    """
+    index = index or SegmentIndex(path_x, path_y)
+    match = index.nearest(track['x'], track['y'])
+    segment, t = match['segment'], match['t']
+    direction = np.arctan2(index.dy[segment], index.dx[segment])
+    ox = track['x'] - (index.x[segment] + t * index.dx[segment])
+    oy = track['y'] - (index.y[segment] + t * index.dy[segment])
+    longitudinal = ox * np.cos(direction) + oy * np.sin(direction)
+    if 'heading' in track:
+        heading = track['heading']
+    else:
+        heading = kinematics(track['time_s'], track['x'], track['y'])['course']
+    return {
+        'path_segment': segment,
+        'station': match['station'],
+        'progress': np.concatenate(([0.0], np.diff(match['station']))),
+        'lateral_error': match['lateral'],
+        'longitudinal_error': np.where(np.abs(longitudinal) < 1e-9, 0.0, longitudinal),
+        'heading_error': _wrap(heading - direction),
+    }
+
+
+def error_summary(errors):
+    """横向误差、航向误差（度）的分位数统计，见 latency_analysis.summarize"""
+    summary = summarize(np.abs(errors['lateral_error']), 'lateral')
+    summary['lateral_rms'] = float(np.sqrt(np.nanmean(errors['lateral_error'] ** 2)))
+    summary.update(summarize(np.degrees(np.abs(errors['heading_error'])), 'heading_deg'))
+    return summary
+
+
+# ---------------- 整个文件 ----------------
+
+def read_pose_columns(filename):
+    """SimOne 位姿日志（.txt，按 process_figure.read_poses 解析）或导出的表格"""
+    if filename.endswith('.txt'):
+        from process_figure import read_poses
+        return read_poses(filename)
+    return read_columns(filename)
+
+
+def analyze_trajectory(filename, output_filename=None, path_db=None, path_table=None, fields=POSE_FIELDS,
+                       path_enu=True):
+    """
+    时延分布 + 运动学量 + （指定参考路径时）路径误差
+    :param path_db: path_viewer 的 SQLite 数据库；path_table 为表名，None 取第一张表
+    :param path_enu: True 使用路径的 ENU 坐标（e, n），False 使用原始高斯坐标（x, y）
+    :param output_filename: 逐点的轨迹表，格式由扩展名决定（见 table_io）
+    :return: {'latency': latency_distribution 的 summary, 'histogram': 时延直方图, 'table': 轨迹表,
+              'errors': error_summary（无路径时为 None）}
+    """
+    columns = read_pose_columns(filename)
+    latency = latency_distribution(columns)
+    track = pose_track(columns, fields)
+    table = dict(track)
+    table.update(kinematics(track['time_s'], track['x'], track['y'], track.get('heading')))
+    summary = None
+    if path_db:
+        path = load_path(path_db, path_table or path_tables(path_db)[0])
+        px, py = (path['e'], path['n']) if path_enu else (path['x'], path['y'])
+        errors = path_errors(track, px, py)
+        table.update(errors)
+        summary = error_summary(errors)
+    if output_filename:
+        write_columns(output_filename, table)
+    return {'latency': latency['summary'], 'histogram': latency['histogram'], 'table': table, 'errors': summary}
+
+
+def print_analysis(result):
+    latency = result['latency']
+    print(f"latency (ms): n={latency['count']} mean={latency['mean']:.2f} std={latency['std']:.2f} "
+          f"min={latency['min']:.2f} p50={latency['latency_p50']:.2f} p95={latency['latency_p95']:.2f} "
+          f"p99={latency['latency_p99']:.2f} max={latency['latency_max']:.2f}")
+    table = result['table']
+    duration = table['time_s'][-1] - table['time_s'][0] if len(table['time_s']) else 0.0
+    print(f"{len(table['time_s'])} poses over {duration:.1f} s, max speed {np.nanmax(table['speed']):.2f} m/s")
+    errors = result['errors']
+    if errors:
+        print(f"lateral error (m): rms={errors['lateral_rms']:.3f} p50={errors['lateral_p50']:.3f} "
+              f"p95={errors['lateral_p95']:.3f} max={errors['lateral_max']:.3f}; "
+              f"heading error (deg): p95={errors['heading_deg_p95']:.2f} max={errors['heading_deg_max']:.2f}")
+
+
+if __name__ == "__main__":
+    log = 'example/data.txt'
+    print_analysis(analyze_trajectory(log, os.path.splitext(os.path.basename(log))[0] + '_traj.csv'))